@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Admission Control
+=============================
+Fail-fast limits for expensive endpoints, so a burst of logins, imports or
+refund runs cannot starve cheap requests.
+
+Two independent checks, applied by the @limit decorator:
+  - Concurrency: at most `concurrency` requests of that endpoint in flight
+    in this process.  When full → 503 + Retry-After.  The slot is held
+    until the response has been fully sent (including streamed bodies).
+  - Rate: a token bucket per (endpoint, space) refilled at `rate` tokens
+    per second up to `burst`.  When empty → 429 + Retry-After (seconds
+    until the next token).
+
+Requests are never queued.  The concurrency slot is taken first, so a
+request turned away as busy never spends one of the space's tokens.
+
+Buckets live in process memory by default.  Set RATE_LIMIT_BACKEND=sqlite
+to keep them in .tmp/ratelimit.db instead, so several server processes on
+one host share the same budgets.
+
+Every limit can be overridden from .env, e.g.
+    LIMIT_LOGIN_CONCURRENCY=32   LIMIT_LOGIN_RATE=20   LIMIT_LOGIN_BURST=40
+A rate of 0 (or less) turns the rate check off; concurrency and burst are
+at least 1.
+
+Usage:
+    @app.post("/api/login")
+    @admission.limit("login", concurrency=16, rate=10, burst=20)
+    def api_login(): ...
+"""
+
+import functools
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DB_PATH  = BASE_DIR / ".tmp" / "ratelimit.db"
+
+BUSY_RETRY_AFTER = 1                    # seconds suggested when concurrency is full
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    try:
+        return float(raw) if raw not in (None, "") else default
+    except ValueError:
+        return default
+
+
+# ── Token bucket stores ────────────────────────────────────────────────────────
+
+class MemoryBucketStore:
+    """
+    Token buckets held in a dict; thread-safe, per process.  Keys carry the
+    space named by the request, so buckets that have refilled (a missing
+    bucket is a full one) are dropped every SWEEP_INTERVAL seconds; the dict
+    only holds buckets used within their refill time.
+    """
+
+    SWEEP_INTERVAL = 10                  # seconds
+
+    def __init__(self):
+        self._lock       = threading.Lock()
+        self._buckets    = {}            # key -> (tokens, updated_at, full_at)
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._buckets    = {k: b for k, b in self._buckets.items() if b[2] > now}
+                self._next_sweep = now + self.SWEEP_INTERVAL
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a small SQLite file, shared by every process on the host.
+    Like MemoryBucketStore, refilled buckets are deleted every SWEEP_INTERVAL.
+    """
+
+    SWEEP_INTERVAL = 10                  # seconds, per process
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = path
+        self.path.parent.mkdir(exist_ok=True)
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+        con = self._connect()
+        try:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key        TEXT PRIMARY KEY,
+                    tokens     REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    full_at    REAL NOT NULL DEFAULT 0
+                )
+            """)
+            if "full_at" not in {r[1] for r in con.execute("PRAGMA table_info(rate_buckets)")}:
+                con.execute("ALTER TABLE rate_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+        finally:
+            con.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        now = time.time()                # wall clock: shared across processes
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            if time.monotonic() >= self._next_sweep:
+                self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+                con.execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+            row = con.execute(
+                "SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            con.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (burst - tokens) / rate),
+            )
+            con.execute("COMMIT")
+            return wait
+        finally:
+            con.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    """Create the bucket store on first use (after .env has been loaded)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+            _store = SQLiteBucketStore() if backend == "sqlite" else MemoryBucketStore()
+        return _store
+
+
+# ── Concurrency ────────────────────────────────────────────────────────────────
+
+_in_flight = {}                          # endpoint name -> BoundedSemaphore
+_in_flight_lock = threading.Lock()
+
+
+def _semaphore(name: str, size: int) -> threading.BoundedSemaphore:
+    with _in_flight_lock:
+        if name not in _in_flight:
+            _in_flight[name] = threading.BoundedSemaphore(size)
+        return _in_flight[name]
+
+
+def _request_space(request) -> str:
+    """The space a request targets: ?space=, else the JSON body's 'space'."""
+    space = request.args.get("space", "")
+    if not space and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            space = body.get("space", "") or ""
+    return str(space).strip().lower()
+
+
+def _reject(status: int, message: str, retry_after: float):
+    from flask import jsonify
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# ── Decorator ──────────────────────────────────────────────────────────────────
+
+def limit(name: str, concurrency: int, rate: float, burst: float):
+    """
+    Guard a Flask view with a per-process concurrency cap and a per-space
+    token bucket.  *name* also selects the LIMIT_<NAME>_* env overrides.
+    """
+    prefix      = f"LIMIT_{name.upper()}_"
+    concurrency = max(1, int(_env_number(prefix + "CONCURRENCY", concurrency)))
+    rate        = _env_number(prefix + "RATE", rate)
+    burst       = max(1.0, _env_number(prefix + "BURST", burst))
+    sem         = _semaphore(name, concurrency)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import make_response, request
+            from werkzeug.wsgi import ClosingIterator
+
+            if not sem.acquire(blocking=False):
+                return _reject(503, "Server is busy. Please retry shortly.", BUSY_RETRY_AFTER)
+            try:
+                wait = _get_store().take(f"{name}:{_request_space(request)}", rate, burst) if rate > 0 else 0.0
+            except BaseException:
+                sem.release()
+                raise
+            if wait > 0:
+                sem.release()
+                return _reject(429, "Too many requests for this space. Please retry shortly.", wait)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                sem.release()
+                raise
+            if response.direct_passthrough:
+                # Werkzeug hands a passthrough body (send_file) to the server
+                # as is and never runs call_on_close callbacks for it
+                response.response = ClosingIterator(response.response, sem.release)
+            else:
+                response.call_on_close(sem.release)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — AI Transaction Categoriser
+======================================
+Fills in the category of "Uncategorised" transactions using an LLM, making
+as few model calls as possible.
+
+Pipeline:
+  1. Collect the descriptions of every Uncategorised row and normalise them
+     to a cache key (upper-case, single-spaced).  Merchant strings repeat
+     thousands of times, so this usually shrinks the work by orders of
+     magnitude.
+  2. Look the distinct keys up in the `category_cache` table.
+  3. Send only the unseen keys to the backend, in batches of `batch_size`,
+     with at most `max_workers` requests in flight and `retries` attempts
+     per batch (exponential backoff).  Descriptions a reply leaves out (or
+     answers with an unknown category) are asked again in the next attempt;
+     any still unanswered stay Uncategorised and uncached, so a later run
+     retries them instead of caching a guess.
+  4. Persist the new results to `category_cache` and write the categories
+     back onto the transactions.
+
+Backends implement `categorise(descriptions) -> {description: category}`,
+returning only the descriptions they have a valid category for:
+  - OpenAIBackend — chat completion returning a JSON object
+  - LocalBackend  — deterministic keyword stand-in for tests and offline runs
+
+Usage:
+    from ai_categoriser import categorise_transactions, get_backend
+    stats = categorise_transactions(transactions, get_backend("local"))
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DB_PATH  = BASE_DIR / ".tmp" / "finflowai.db"
+
+UNCATEGORISED = "Uncategorised"
+
+CATEGORIES = [
+    "Groceries", "Eating Out", "Transport", "Fuel", "Utilities", "Rent & Mortgage",
+    "Subscriptions", "Shopping", "Health", "Insurance", "Travel", "Entertainment",
+    "Income", "Transfers", "Fees & Charges", "Tax", "Other",
+]
+
+_SPACES = re.compile(r"\s+")
+_SQL_CHUNK = 900                       # stay below SQLite's host-parameter limit
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _get_connection() -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH)
+
+
+def normalise_description(description: str) -> str:
+    """Cache key for a transaction description: upper-case, single-spaced."""
+    return _SPACES.sub(" ", (description or "").strip().upper())
+
+
+def _load_cached(keys: list[str]) -> dict[str, str]:
+    found = {}
+    con = _get_connection()
+    try:
+        for i in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[i:i + _SQL_CHUNK]
+            rows = con.execute(
+                f"SELECT description_key, category FROM category_cache "
+                f"WHERE description_key IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            found.update(rows)
+        return found
+    finally:
+        con.close()
+
+
+def _store_cached(results: dict[str, str], backend_name: str) -> None:
+    if not results:
+        return
+    con = _get_connection()
+    try:
+        con.executemany(
+            """INSERT INTO category_cache (description_key, category, backend)
+               VALUES (?, ?, ?)
+               ON CONFLICT(description_key) DO UPDATE SET
+                   category = excluded.category,
+                   backend  = excluded.backend,
+                   updated_at = strftime('%Y-%m-%dT%H:%M:%SZ', 'now')""",
+            [(k, v, backend_name) for k, v in results.items()],
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+
+class LocalBackend:
+    """
+    Deterministic stand-in for the LLM: keyword lookup, otherwise "Other".
+    Counts calls so tests can assert on batching behaviour.
+    """
+    name = "local"
+
+    KEYWORDS = {
+        "TESCO": "Groceries", "LIDL": "Groceries", "ALDI": "Groceries",
+        "DUNNES": "Groceries", "SUPERVALU": "Groceries",
+        "NETFLIX": "Subscriptions", "SPOTIFY": "Subscriptions",
+        "SALARY": "Income", "PAYROLL": "Income",
+        "CIRCLE K": "Fuel", "APPLEGREEN": "Fuel",
+        "LEAP": "Transport", "IRISH RAIL": "Transport", "UBER": "Transport",
+        "ESB": "Utilities", "BORD GAIS": "Utilities", "EIR": "Utilities",
+        "REVENUE": "Tax",
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def categorise(self, descriptions: list[str]) -> dict[str, str]:
+        self.calls += 1
+        out = {}
+        for d in descriptions:
+            upper = d.upper()
+            out[d] = next((c for k, c in self.KEYWORDS.items() if k in upper), "Other")
+        return out
+
+
+class OpenAIBackend:
+    """Chat-completion backend. Reads OPENAI_API_KEY and OPENAI_MODEL from the environment."""
+    name = "openai"
+
+    def __init__(self, model: str | None = None):
+        from openai import OpenAI
+        self.client = OpenAI()
+        self.model  = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+    def categorise(self, descriptions: list[str]) -> dict[str, str]:
+        prompt = (
+            "Classify each bank transaction description into exactly one of these "
+            f"categories: {', '.join(CATEGORIES)}.\n"
+            "Reply with a JSON object mapping each description, verbatim, to its category.\n\n"
+            + json.dumps(descriptions)
+        )
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0,
+        )
+        data = json.loads(resp.choices[0].message.content or "{}")
+        if not isinstance(data, dict):
+            return {}
+        # Match keys loosely (the model may change case or spacing); drop the rest
+        answers = {normalise_description(k): v for k, v in data.items() if isinstance(k, str)}
+        return {
+            d: answers[normalise_description(d)]
+            for d in descriptions
+            if answers.get(normalise_description(d)) in CATEGORIES
+        }
+
+
+BACKENDS = {"local": LocalBackend, "openai": OpenAIBackend}
+
+
+def get_backend(name: str = "openai"):
+    """Instantiate a backend by name ('openai' or 'local')."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown categoriser backend '{name}'. Use one of: {', '.join(BACKENDS)}.")
+    if name == "openai":
+        from dotenv import load_dotenv
+        load_dotenv(BASE_DIR / ".env")
+    return BACKENDS[name]()
+
+
+def _call_with_retries(backend, batch: list[str], retries: int, backoff: float) -> dict[str, str]:
+    """
+    Categories for *batch*; each attempt asks only for what is still
+    unanswered.  Raises the last error if no attempt answered anything.
+    """
+    out, pending = {}, list(batch)
+    for attempt in range(retries):
+        try:
+            answered = backend.categorise(pending)
+            out.update((d, answered[d]) for d in pending if answered.get(d) in CATEGORIES)
+            pending = [d for d in pending if d not in out]
+            if not pending:
+                break
+        except Exception:
+            if attempt == retries - 1 and not out:
+                raise
+        if attempt < retries - 1:
+            time.sleep(backoff * (2 ** attempt))
+    return out
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def categorise_transactions(
+    transactions: list[dict],
+    backend=None,
+    batch_size: int = 50,
+    max_workers: int = 4,
+    retries: int = 3,
+    backoff: float = 1.0,
+) -> dict:
+    """
+    Fill in the category of every Uncategorised transaction in place.
+
+    Only distinct descriptions not already in `category_cache` are sent to
+    *backend* (default: OpenAIBackend).  Batches that still fail after
+    *retries* attempts leave their rows Uncategorised.
+
+    Returns stats:
+        { "rows": int, "distinct": int, "cached": int, "requested": int,
+          "batches": int, "failed_batches": int, "categorised": int }
+    """
+    backend = backend or get_backend("openai")
+
+    todo = [t for t in transactions if (t.get("category") or UNCATEGORISED) == UNCATEGORISED]
+    keys = list(dict.fromkeys(normalise_description(t.get("description", "")) for t in todo))
+    keys = [k for k in keys if k]
+    resolved = _load_cached(keys)
+    unseen   = [k for k in keys if k not in resolved]
+    batches  = [unseen[i:i + batch_size] for i in range(0, len(unseen), batch_size)]
+
+    failed = 0
+    if batches:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_call_with_retries, backend, b, retries, backoff)
+                for b in batches
+            ]
+            fresh = {}
+            for fut in futures:
+                try:
+                    fresh.update({normalise_description(d): c for d, c in fut.result().items()})
+                except Exception:
+                    failed += 1
+        _store_cached(fresh, getattr(backend, "name", type(backend).__name__))
+        resolved.update(fresh)
+
+    categorised = 0
+    for t in todo:
+        category = resolved.get(normalise_description(t.get("description", "")))
+        if category:
+            t["category"] = category
+            categorised += 1
+
+    return {
+        "rows":           len(todo),
+        "distinct":       len(keys),
+        "cached":         len(keys) - len(unseen),
+        "requested":      len(unseen),
+        "batches":        len(batches),
+        "failed_batches": failed,
+        "categorised":    categorised,
+    }
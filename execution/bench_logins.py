@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Login Throughput Benchmark
+Concurrent logins against scrypt hashes (password_hasher.py), comparing:
+  - inline:       KDF on the calling thread (KDF_WORKERS=0)
+  - pool:         KDF in the process pool, verification cache off
+  - pool + cache: the same logins repeated within LOGIN_CACHE_TTL
+While the logins run, a probe thread times a cheap query (list_users) to
+show how much the burst slows everything else down.
+Works on a throwaway copy of the database, so .tmp/finflowai.db is never
+modified.
+
+Usage:
+    python execution/bench_logins.py [--threads 32] [--logins 400] [--users 50]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import password_hasher as ph
+import user_manager as um
+
+SPACE = "bench-logins"
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _run(users: int, threads: int, logins: int) -> tuple[float, list[float], list[float], int]:
+    """(seconds, login latencies, probe latencies, logins rejected as busy) for one burst."""
+    latencies, probes, busy = [], [], []
+    done = threading.Event()
+
+    def login(n):
+        t0 = time.perf_counter()
+        try:
+            user = um.get_user(SPACE, f"user{n % users}", f"pw-{n % users}")
+        except ph.KDFBusy:
+            busy.append(n)               # the server would answer 503 + Retry-After
+            return
+        latencies.append(time.perf_counter() - t0)
+        assert user is not None
+
+    def probe():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            um.list_users(SPACE)
+            probes.append(time.perf_counter() - t0)
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(login, range(logins)))
+    secs = time.perf_counter() - t0
+    done.set()
+    prober.join()
+    return secs, latencies, probes, len(busy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI login throughput benchmark")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--logins",  type=int, default=400)
+    parser.add_argument("--users",   type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "finflowai.db"
+        con = sqlite3.connect(um.DB_PATH)
+        try:
+            con.execute("VACUUM INTO ?", (str(copy),))
+        finally:
+            con.close()
+        um.DB_PATH = copy
+
+        workers = ph._workers() or 4
+        os.environ["KDF_WORKERS"] = str(workers)
+        ph.warm()
+        for i in range(args.users):
+            um.add_user(SPACE, f"user{i}", f"pw-{i}")
+
+        print(f"{args.logins} logins from {args.threads} threads, "
+              f"{args.users} users, {workers} KDF workers")
+        modes = (
+            ("inline      ", "0",          "0"),
+            ("pool        ", str(workers), "0"),
+            ("pool + cache", str(workers), "60"),
+        )
+        for label, kdf_workers, ttl in modes:
+            os.environ["KDF_WORKERS"] = kdf_workers
+            os.environ["LOGIN_CACHE_TTL"] = ttl
+            ph.clear_cache()
+            secs, lat, probes, busy = _run(args.users, args.threads, args.logins)
+            print(f"  {label}: {len(lat) / secs:7,.0f} logins/s   "
+                  f"p50 {statistics.median(lat) * 1000:6.1f} ms   "
+                  f"p99 {_percentile(lat, 99) * 1000:6.1f} ms   "
+                  f"probe p99 {_percentile(probes, 99) * 1000:6.1f} ms   "
+                  f"busy {busy}")
+        ph.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Refund Run Benchmark
+Runs a synthetic refund batch against the fake Revenue server and compares
+sequential checks with the concurrent HTTP backend.  No database needed.
+
+Usage:
+    python execution/bench_refunds.py [--clients 500] [--latency 0.05] [--concurrency 8]
+                                      [--trace bench.trace.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import refund_backend as rb
+import refund_processor as rp
+import tracing
+from fake_revenue_server import start_fake_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI refund run benchmark")
+    parser.add_argument("--clients",     type=int,   default=500)
+    parser.add_argument("--latency",     type=float, default=0.05, help="Fake server seconds per request")
+    parser.add_argument("--concurrency", type=int,   default=8)
+    parser.add_argument("--skip-sequential", action="store_true")
+    parser.add_argument("--trace", default=None, help="write the concurrent run's Chrome trace here")
+    args = parser.parse_args()
+
+    os.environ["REFUND_CONCURRENCY"] = str(args.concurrency)
+    server, url = start_fake_server(latency=args.latency)
+    backend = rb.HttpRevenueBackend(url, pool_size=args.concurrency)
+    rb.set_backend(backend)
+
+    ids     = list(range(1, args.clients + 1))
+    clients = {i: {"id": i, "name": f"Client {i}", "pps_number": f"{1000000 + i:07d}{'ABCDEFGHJKLMNPQRSTVWX'[i % 21]}"}
+               for i in ids}
+    settings = {"tain": "12345T", "ros_id": "ROS1"}
+
+    print(f"{args.clients} clients, {args.latency * 1000:.0f} ms server latency, concurrency {args.concurrency}")
+
+    if not args.skip_sequential:
+        t0 = time.perf_counter()
+        for i in ids:
+            backend.check(clients[i], settings)
+        seq = time.perf_counter() - t0
+        print(f"  sequential : {seq:7.2f} s")
+
+    trace = tracing.Trace("bench-refunds")
+    t0 = time.perf_counter()
+    results = list(rp._check_clients(ids, clients, "bench", settings, trace))
+    par = time.perf_counter() - t0
+    trace.close()
+    ideal = args.clients / args.concurrency * args.latency
+    print(f"  concurrent : {par:7.2f} s   (ideal {ideal:.2f} s)")
+    print(f"  statuses   : { {s: sum(r['status'] == s for r in results) for s in {r['status'] for r in results}} }")
+    for name, p in trace.summary()["phases"].items():
+        print(f"  {name:<16} mean {p['mean_ms']:8.2f} ms   p95 {p['p95_ms']:8.2f} ms   max {p['max_ms']:8.2f} ms")
+    if args.trace:
+        with open(args.trace, "w", encoding="utf-8") as f:
+            json.dump(trace.to_chrome(), f)
+        print(f"  trace      : {args.trace}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Concurrent Write Benchmark
+Many threads updating clients at once, with and without the group-commit
+write queue (write_queue.py).  Works on a throwaway copy of the database,
+so .tmp/finflowai.db is never modified.
+
+Usage:
+    python execution/bench_writes.py [--threads 32] [--writes 2000] [--space ge-souza-tax]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import client_manager as cm
+import db
+import write_queue as wq
+
+
+def _run(ids: list[int], space: str, threads: int, writes: int) -> float:
+    def work(n):
+        cm.update_client(ids[n % len(ids)], {"other_phone": f"08{n:08d}"}, space)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(work, range(writes)))
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI concurrent write benchmark")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes",  type=int, default=2000)
+    parser.add_argument("--space",   default="ge-souza-tax")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "finflowai.db"
+        con = sqlite3.connect(db.CATALOG_PATH)
+        try:
+            con.execute("VACUUM INTO ?", (str(copy),))
+        finally:
+            con.close()
+        db.CATALOG_PATH = copy
+        os.environ["DB_LAYOUT"] = "single"
+
+        ids = [c["id"] for c in cm.list_clients(args.space)]
+        if not ids:
+            ids = [cm.add_client({"name": f"Bench {i}"}, args.space)["id"] for i in range(50)]
+
+        print(f"{args.writes} updates from {args.threads} threads on {len(ids)} clients")
+        for label, flag in (("per-call commit", "false"), ("write queue    ", "true")):
+            os.environ["WRITE_QUEUE"] = flag
+            secs = _run(ids, args.space, args.threads, args.writes)
+            print(f"  {label}: {secs:6.2f} s   {args.writes / secs:8,.0f} writes/s")
+        for path, s in wq.stats().items():
+            print(f"  queue batches: {s['batches']}  avg batch: {s['avg_batch']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,15 @@ Every client belongs to a space. The FinFlow Number prefix is derived from
 the space name: first two letters uppercased.
   e.g.  "ge-souza-tax"  →  "GE"  →  "GE-0001"
 """
+import os
 import sqlite3
-from pathlib import Path
+import sys
+import time
+from datetime import datetime, timedelta, timezone
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH  = BASE_DIR / ".tmp" / "finflowai.db"
+import db
+import validators
+import write_queue as wq
 
 # All writable data fields (order matches the form sections)
 CLIENT_FIELDS = [
@@ -34,13 +38,31 @@ CLIENT_FIELDS = [
     "bank_bic",
 ]
 
+# CSV import modes:
+#   insert        — always add a new client (original behaviour)
+#   upsert        — update the existing client if one matches, else add
+#   skip-existing — leave matching clients untouched, add the rest
+IMPORT_MODES = ("insert", "upsert", "skip-existing")
+
+# Fields that identify an existing client during import, in match order
+IMPORT_KEYS = ("pps_number", "email", "client_reg_number")
+
+BULK_OPS     = ("update", "delete")
+MAX_BULK_OPS = 10000
+_SQL_CHUNK   = 900                 # stay below SQLite's host-parameter limit
+CHANGES_PAGE = 5000                # client_changes rows per /api/clients/changes page
+COMPACT_INTERVAL = 24 * 3600       # seconds between client_changes compactions in the server
+
+
+class DuplicatePPS(ValueError):
+    """The PPS number already belongs to another client of the space."""
+
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def get_connection() -> sqlite3.Connection:
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+def get_connection(space: str) -> sqlite3.Connection:
+    """Connection to the database holding *space*'s clients (see db.py)."""
+    return db.connect(space)
 
 
 def space_code(space: str) -> str:
@@ -55,6 +77,24 @@ def _finflow_number(record_id: int, space: str) -> str:
     return f"{space_code(space)}-{record_id:04d}"
 
 
+def _import_key(field: str, value: str) -> str:
+    """Normalised lookup key for an identifying field ('' if blank)."""
+    value = (value or "").strip()
+    if field == "pps_number":                   # as stored (validators / migrate_clients_normalise_pps)
+        return "".join(value.split()).replace("-", "").upper()
+    if field == "email":
+        return value.lower()
+    return value
+
+
+def _clean(data: dict) -> dict:
+    """Keep only CLIENT_FIELDS, stripped; non-string values become ''."""
+    return {
+        f: (data[f].strip() if isinstance(data[f], str) else "")
+        for f in CLIENT_FIELDS if f in data
+    }
+
+
 def _enrich(record: dict) -> dict:
     """Add the computed finflow_number field to a record dict."""
     record["finflow_number"] = _finflow_number(record["id"], record.get("space", ""))
@@ -68,10 +108,13 @@ def add_client(data: dict, space: str) -> dict:
     Add a new client for *space*.
     `data` is a dict with any subset of CLIENT_FIELDS.
     `name` is required. Returns the created record (with finflow_number).
+    Identifiers are validated and normalised first (validators.clean).
+    Raises ValueError for invalid fields, DuplicatePPS if the PPS number is taken.
     """
     name = data.get("name", "").strip()
     if not name:
         raise ValueError("Client name is required.")
+    data = validators.clean(data)
 
     cols   = ["space"]
     values = [space]
@@ -80,53 +123,62 @@ def add_client(data: dict, space: str) -> dict:
         val = data.get(field, "")
         values.append(val.strip() if isinstance(val, str) else "")
 
-    con = get_connection()
-    try:
+    placeholders = ", ".join("?" * len(cols))
+    col_str = ", ".join(cols)
+
+    def op(con):
         cur = con.cursor()
-        placeholders = ", ".join("?" * len(cols))
-        col_str = ", ".join(cols)
-        cur.execute(
-            f"INSERT INTO clients ({col_str}) VALUES ({placeholders})",
-            values,
-        )
-        con.commit()
+        try:
+            cur.execute(
+                f"INSERT INTO clients ({col_str}) VALUES ({placeholders})",
+                values,
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicatePPS(f"A client with PPS number '{data.get('pps_number')}' already exists in this space.")
         cur.execute("SELECT * FROM clients WHERE id = ?", (cur.lastrowid,))
         return _enrich(dict(cur.fetchone()))
-    finally:
-        con.close()
+
+    return wq.run(space, op)
 
 
 def update_client(client_id: int, data: dict, space: str) -> dict | None:
-    """Update an existing client (must belong to *space*). Returns updated record or None."""
-    con = get_connection()
-    try:
+    """
+    Update an existing client (must belong to *space*). Returns updated record or None.
+    Raises ValueError if a validated identifier (see validators.py) is malformed,
+    DuplicatePPS if the new PPS number belongs to another client.
+    Only values that differ from the stored ones are validated, so re-sending
+    a record saved before validation existed does not block the edit.
+    """
+    fields = [f for f in CLIENT_FIELDS if f in data]
+    if not fields:
+        return get_client(client_id, space)
+    values = {f: data[f].strip() if isinstance(data[f], str) else "" for f in fields}
+
+    def op(con):
         cur = con.cursor()
-        sets   = []
-        values = []
-        for field in CLIENT_FIELDS:
-            if field in data:
-                sets.append(f"{field} = ?")
-                val = data[field]
-                values.append(val.strip() if isinstance(val, str) else "")
-        if not sets:
-            return get_client(client_id, space)
-        values.extend([client_id, space])
-        cur.execute(
-            f"UPDATE clients SET {', '.join(sets)} WHERE id = ? AND space = ?",
-            values,
-        )
-        con.commit()
-        if cur.rowcount == 0:
+        row = cur.execute(
+            "SELECT * FROM clients WHERE id = ? AND space = ?", (client_id, space)
+        ).fetchone()
+        if row is None:
             return None
+        changed = validators.clean({f: v for f, v in values.items() if v != (row[f] or "")})
+        sets = {**values, **changed}
+        try:
+            cur.execute(
+                f"UPDATE clients SET {', '.join(f + ' = ?' for f in sets)} WHERE id = ? AND space = ?",
+                [*sets.values(), client_id, space],
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicatePPS(f"A client with PPS number '{sets.get('pps_number')}' already exists in this space.")
         cur.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
         return _enrich(dict(cur.fetchone()))
-    finally:
-        con.close()
+
+    return wq.run(space, op)
 
 
 def delete_client(client_id: int, space: str) -> bool:
     """Delete a client by ID within *space*. Returns True if deleted."""
-    con = get_connection()
+    con = get_connection(space)
     try:
         cur = con.cursor()
         cur.execute("DELETE FROM clients WHERE id = ? AND space = ?", (client_id, space))
@@ -136,11 +188,458 @@ def delete_client(client_id: int, space: str) -> bool:
         con.close()
 
 
+def import_index(space: str) -> dict:
+    """
+    In-memory match index of *space*'s clients for import_clients():
+    {field: {key: ("db", client id)}} for every IMPORT_KEYS field (one query).
+    """
+    index = {f: {} for f in IMPORT_KEYS}
+    con = get_connection(space)
+    try:
+        for row in con.execute(f"SELECT id, {', '.join(IMPORT_KEYS)} FROM clients WHERE space = ?", (space,)):
+            for f in IMPORT_KEYS:
+                key = _import_key(f, row[f])
+                if key:
+                    index[f].setdefault(key, ("db", row["id"]))
+        return index
+    finally:
+        con.close()
+
+
+def import_clients(rows: list[tuple[int, dict]], space: str, mode: str = "insert",
+                   dry_run: bool = False, index: dict | None = None) -> dict:
+    """
+    Import many clients into *space* in one transaction.
+
+    `rows` is a list of (row_number, data) pairs; row_number is only used in
+    error reports.  Rows without a name are skipped.  The named rows are
+    validated column-wise first (validators.validate_rows); rows with a bad
+    identifier are reported in errors and not imported.
+
+    The space's existing pps_number / email / client_reg_number values are
+    loaded once into in-memory indexes, so each row is matched with dict
+    lookups instead of a query.  Rows are matched on the first identifying
+    field they share with an existing client (or an earlier row of the same
+    file).  New clients are written with one executemany; updates are
+    grouped by column set and also written with executemany.
+
+    In upsert mode only non-blank values overwrite existing data.
+
+    With dry_run nothing is written: the result shows what the import would
+    do, with the same counts and errors.
+
+    A file imported in chunks passes the same *index* (from import_index())
+    to every call: it is updated with each chunk's rows — as ("db", id) once
+    written, as ("prior", row number) by a dry run — so later chunks match earlier
+    ones exactly as in a single call, without reloading the space.
+
+    Returns { "added", "updated", "skipped", "errors": [{row, name, [field], error}],
+              "dry_run" }.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}'. Use one of: {', '.join(IMPORT_MODES)}.")
+
+    # field -> key -> ("db", id) | ("new", i) | ("prior", row_no): a row of an earlier dry-run chunk
+    index = import_index(space) if index is None else index
+    con = get_connection(space)
+    try:
+        cur = con.cursor()
+
+        inserts = []                   # cleaned data dicts
+        origins = []                   # row number each insert came from
+        updates = {}                   # client id -> {field: value}
+        fresh   = []                   # (field, key) of index entries pointing at inserts
+
+        named   = [(row_no, _clean(data)) for row_no, data in rows]
+        named   = [(row_no, data) for row_no, data in named if data.get("name")]
+        skipped = len(rows) - len(named)
+        named, errors = validators.validate_rows(named)
+
+        for row_no, data in named:
+            name = data["name"]
+
+            keys  = {f: _import_key(f, data.get(f, "")) for f in IMPORT_KEYS}
+            match = next(
+                (index[f][keys[f]] for f in IMPORT_KEYS if keys[f] and keys[f] in index[f]),
+                None,
+            ) if mode != "insert" else None
+
+            if match and mode == "skip-existing":
+                skipped += 1
+                continue
+
+            # The PPS number must stay unique within the space
+            pps_owner = index["pps_number"].get(keys["pps_number"]) if keys["pps_number"] else None
+            if pps_owner and pps_owner != match:
+                errors.append({"row": row_no, "name": name,
+                               "error": f"PPS number '{data['pps_number']}' already exists in this space."})
+                continue
+
+            if match:
+                changes = {k: v for k, v in data.items() if v}
+                if match[0] == "new":
+                    inserts[match[1]].update(changes)
+                else:                  # "prior" counts like the update the real chunk would make
+                    updates.setdefault(match if match[0] == "prior" else match[1], {}).update(changes)
+            else:
+                inserts.append(data)
+                origins.append(row_no)
+                match = ("new", len(inserts) - 1)
+
+            for f in IMPORT_KEYS:
+                if keys[f] and keys[f] not in index[f]:
+                    index[f][keys[f]] = match
+                    if match[0] == "new":
+                        fresh.append((f, keys[f]))
+
+        errors.sort(key=lambda e: e["row"])
+        result = {
+            "added":   len(inserts),
+            "updated": len(updates),
+            "skipped": skipped,
+            "errors":  errors,
+            "dry_run": dry_run,
+        }
+        if dry_run:
+            for f, key in fresh:
+                index[f][key] = ("prior", origins[index[f][key][1]])
+            return result
+
+        # ── Apply in one transaction ───────────────────────────────────────────
+        cols = ["space"] + CLIENT_FIELDS
+        cur.executemany(
+            f"INSERT INTO clients ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            [[space] + [d.get(f, "") for f in CLIENT_FIELDS] for d in inserts],
+        )
+        # One transaction holds the write lock, so the new ids are consecutive
+        first_id = con.execute("SELECT last_insert_rowid()").fetchone()[0] - len(inserts) + 1
+        by_columns = {}
+        for client_id, changes in updates.items():
+            fields = tuple(sorted(changes))
+            by_columns.setdefault(fields, []).append(
+                [changes[f] for f in fields] + [client_id, space]
+            )
+        for fields, params in by_columns.items():
+            cur.executemany(
+                f"UPDATE clients SET {', '.join(f + ' = ?' for f in fields)} WHERE id = ? AND space = ?",
+                params,
+            )
+        con.commit()
+        for f, key in fresh:
+            index[f][key] = ("db", first_id + index[f][key][1])
+        return result
+    except sqlite3.IntegrityError as e:
+        con.rollback()
+        raise ValueError(f"Import rejected by the database, nothing was written: {e}")
+    finally:
+        con.close()
+
+
+def bulk_apply(ops: list[dict], space: str) -> dict:
+    """
+    Apply many update/delete operations to clients of *space* in ONE
+    transaction (one commit).
+
+    Each op is  {"op": "update", "id": 12, "fields": {"city_county": "Cork"}}
+            or  {"op": "delete", "id": 12}.
+
+    Ops are validated first and the target ids checked with one query, then
+    the deletes run, followed by the updates grouped by column set and run
+    with executemany.  Deleting first frees the PPS numbers of deleted
+    clients, so a batch may hand one on to another client.  An update to an
+    id deleted earlier in the same list is reported as not_found.  If the batch hits a constraint (duplicate PPS
+    number) it is replayed statement by statement inside the same
+    transaction so only the offending items fail.
+
+    Returns {
+        "updated": int, "deleted": int, "failed": int,
+        "results": [ {"index", "op", "id", "status", ["error"]}, ... ],
+    }
+    with status one of "updated" | "deleted" | "not_found" | "error".
+    """
+    if not isinstance(ops, list) or not ops:
+        raise ValueError("'operations' must be a non-empty list.")
+    if len(ops) > MAX_BULK_OPS:
+        raise ValueError(f"At most {MAX_BULK_OPS} operations per request.")
+
+    results = []
+    for i, op in enumerate(ops):
+        kind = op.get("op") if isinstance(op, dict) else None
+        cid  = op.get("id") if isinstance(op, dict) else None
+        res  = {"index": i, "op": kind, "id": cid}
+        if kind not in BULK_OPS:
+            res.update(status="error", error=f"'op' must be one of: {', '.join(BULK_OPS)}.")
+        elif not isinstance(cid, int) or isinstance(cid, bool):
+            res.update(status="error", error="'id' must be an integer.")
+        elif kind == "update":
+            fields = op.get("fields")
+            changes = _clean(fields) if isinstance(fields, dict) else {}
+            if not changes:
+                res.update(status="error", error="'fields' must contain at least one client field.")
+            elif "name" in changes and not changes["name"]:
+                res.update(status="error", error="Client name cannot be blank.")
+            else:
+                try:
+                    res["_changes"] = validators.clean(changes)
+                except ValueError as e:
+                    res.update(status="error", error=str(e))
+        results.append(res)
+
+    con = get_connection(space)
+    try:
+        cur = con.cursor()
+
+        wanted   = list({r["id"] for r in results if "status" not in r})
+        existing = set()
+        for i in range(0, len(wanted), _SQL_CHUNK):
+            chunk = wanted[i:i + _SQL_CHUNK]
+            cur.execute(
+                f"SELECT id FROM clients WHERE space = ? AND id IN ({', '.join('?' * len(chunk))})",
+                [space] + chunk,
+            )
+            existing.update(r[0] for r in cur.fetchall())
+
+        updates = {}                       # id -> merged changes
+        deletes = []
+        for r in results:
+            if "status" in r:
+                continue
+            if r["id"] not in existing:
+                r["status"] = "not_found"
+            elif r["op"] == "update":
+                updates.setdefault(r["id"], {}).update(r["_changes"])
+                r["status"] = "updated"
+            else:
+                deletes.append(r["id"])
+                existing.discard(r["id"])
+                r["status"] = "deleted"
+
+        by_columns = {}
+        for cid, changes in updates.items():
+            fields = tuple(sorted(changes))
+            by_columns.setdefault(fields, []).append([changes[f] for f in fields] + [cid, space])
+
+        def _update_sql(fields):
+            return f"UPDATE clients SET {', '.join(f + ' = ?' for f in fields)} WHERE id = ? AND space = ?"
+
+        def _delete():
+            cur.executemany(
+                "DELETE FROM clients WHERE id = ? AND space = ?",
+                [(cid, space) for cid in deletes],
+            )
+
+        try:
+            _delete()
+            for fields, params in by_columns.items():
+                cur.executemany(_update_sql(fields), params)
+        except sqlite3.IntegrityError:
+            con.rollback()
+            _delete()
+            failed_ids = set()
+            for fields, params in by_columns.items():
+                for p in params:
+                    try:
+                        cur.execute(_update_sql(fields), p)
+                    except sqlite3.IntegrityError:
+                        failed_ids.add(p[-2])
+            for r in results:
+                if r.get("status") == "updated" and r["id"] in failed_ids:
+                    r.update(status="error", error="PPS number already exists in this space.")
+        con.commit()
+    finally:
+        con.close()
+
+    for r in results:
+        r.pop("_changes", None)
+    return {
+        "updated": sum(r["status"] == "updated" for r in results),
+        "deleted": sum(r["status"] == "deleted" for r in results),
+        "failed":  sum(r["status"] in ("error", "not_found") for r in results),
+        "results": results,
+    }
+
+
 # ── Read operations ────────────────────────────────────────────────────────────
 
+def _json_select(con: sqlite3.Connection) -> str:
+    """
+    SELECT expression that renders one client row as a JSON object inside
+    SQLite (json_object), including the computed finflow_number.  Takes one
+    parameter: the space code.
+    """
+    cols = [r[1] for r in con.execute("PRAGMA table_info(clients)").fetchall()]
+    pairs = ", ".join(f"'{c}', {c}" for c in cols)
+    return f"json_object({pairs}, 'finflow_number', printf('%s-%04d', ?, id))"
+
+
+def iter_clients_json(space: str, batch: int = 500):
+    """
+    Yield every client of *space* as a JSON object string (same content as
+    list_clients), straight from the cursor.
+
+    Each row is rendered to JSON by SQLite and fetched as a single string,
+    so no per-client dict is built, enriched or walked by an encoder, and
+    only *batch* rows are held in memory at a time.
+    """
+    con = db.connect(space, row_factory=None)
+    try:
+        cur = con.execute(
+            f"SELECT {_json_select(con)} FROM clients WHERE space = ? ORDER BY id ASC",
+            (space_code(space), space),
+        )
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            for r in rows:
+                yield r[0]
+    finally:
+        con.close()
+
+
+def clients_version(space: str, con: sqlite3.Connection | None = None) -> tuple[int, int]:
+    """
+    (latest client_changes sequence number, client count) for *space*.
+    Changes whenever the client list does; used as the list's ETag and as
+    the export cache key.  Pass *con* to read it inside an open transaction.
+    """
+    own = con is None
+    if own:
+        con = get_connection(space)
+    try:
+        seq, count = con.execute(
+            """SELECT MAX(IFNULL((SELECT MAX(seq) FROM client_changes WHERE space = ?), 0),
+                          IFNULL((SELECT seq FROM client_changes_floor WHERE space = ?), 0)),
+                      (SELECT COUNT(*) FROM clients WHERE space = ?)""",
+            (space, space, space),
+        ).fetchone()
+        return seq, count
+    finally:
+        if own:
+            con.close()
+
+
+def client_changes(space: str, since: int, limit: int = CHANGES_PAGE) -> dict:
+    """
+    Changes to *space*'s clients after sequence number *since*, collapsed to
+    the latest change per client:
+        { "seq": int, "more": bool, "reset": bool,
+          "deletes": [id, ...], "upserts": [client JSON string, ...] }
+    Apply deletes and upserts (same content as iter_clients_json) to a local
+    copy, then ask again with since=seq; `more` means another page is ready.
+    `reset` means *since* is not from this database (e.g. it was re-created
+    or sharded) or is older than the compaction floor (deletes it never saw
+    have been pruned), and the caller must reload the full list.
+    """
+    con = db.connect(space, row_factory=None)
+    try:
+        current, floor = con.execute(
+            """SELECT IFNULL((SELECT MAX(seq) FROM client_changes WHERE space = ?), 0),
+                      IFNULL((SELECT seq FROM client_changes_floor WHERE space = ?), 0)""",
+            (space, space),
+        ).fetchone()
+        current = max(current, floor)
+        if since > current or since < floor:
+            return {"seq": current, "more": False, "reset": True, "deletes": [], "upserts": []}
+
+        rows = con.execute(
+            "SELECT seq, client_id, op FROM client_changes WHERE space = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (space, since, limit + 1),
+        ).fetchall()
+        more, rows = len(rows) > limit, rows[:limit]
+        latest = {cid: op for _, cid, op in rows}
+
+        upserts, found = [], set()
+        ids = [cid for cid, op in latest.items() if op == "upsert"]
+        select = _json_select(con)
+        for i in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[i:i + _SQL_CHUNK]
+            for cid, text in con.execute(
+                f"SELECT id, {select} FROM clients WHERE space = ? AND id IN ({', '.join('?' * len(chunk))})",
+                [space_code(space), space] + chunk,
+            ):
+                found.add(cid)
+                upserts.append(text)
+        # An upsert whose row is gone was deleted after this page's last change
+        deletes = [cid for cid in latest if cid not in found]
+        return {
+            "seq":     rows[-1][0] if rows else since,
+            "more":    more,
+            "reset":   False,
+            "deletes": deletes,
+            "upserts": upserts,
+        }
+    finally:
+        con.close()
+
+
+def tombstone_days() -> float:
+    """Days a delete stays in client_changes after compaction (CLIENT_CHANGES_TOMBSTONE_DAYS)."""
+    return float(os.getenv("CLIENT_CHANGES_TOMBSTONE_DAYS", "30"))
+
+
+def compact_changes(space: str, days: float | None = None) -> int:
+    """
+    Shrink *space*'s client_changes log: keep only the latest change per
+    client, and drop deletes older than *days* (default tombstone_days()).
+    Dropping a delete raises the space's floor to its seq, so a caller whose
+    `since` is below it gets `reset` instead of silently keeping the client.
+    Returns the number of rows removed.
+    """
+    days   = tombstone_days() if days is None else days
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    space  = space.strip().lower()
+    con = get_connection(space)
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        removed = con.execute(
+            """DELETE FROM client_changes WHERE space = ? AND seq NOT IN
+                   (SELECT MAX(seq) FROM client_changes WHERE space = ? GROUP BY client_id)""",
+            (space, space),
+        ).rowcount
+        floor = con.execute(
+            "SELECT MAX(seq) FROM client_changes WHERE space = ? AND op = 'delete' AND changed_at < ?",
+            (space, cutoff),
+        ).fetchone()[0]
+        if floor is not None:
+            removed += con.execute(
+                "DELETE FROM client_changes WHERE space = ? AND op = 'delete' AND seq <= ?",
+                (space, floor),
+            ).rowcount
+            con.execute(
+                """INSERT INTO client_changes_floor (space, seq) VALUES (?, ?)
+                   ON CONFLICT (space) DO UPDATE SET seq = MAX(seq, excluded.seq)""",
+                (space, floor),
+            )
+        con.commit()
+        return removed
+    finally:
+        con.close()
+
+
+def compact_all_changes(days: float | None = None) -> dict[str, int]:
+    """compact_changes() for every space. Returns {space: rows removed}."""
+    con = db.connect()
+    try:
+        spaces = [r[0] for r in con.execute("SELECT name FROM spaces ORDER BY name")]
+    finally:
+        con.close()
+    return {space: compact_changes(space, days) for space in spaces}
+
+
+def compact_changes_forever(interval: float = COMPACT_INTERVAL) -> None:
+    """compact_all_changes() now and every *interval* seconds (server daemon thread)."""
+    while True:
+        try:
+            compact_all_changes()
+        except sqlite3.Error as e:
+            print(f"client_changes compaction failed: {e!r}", file=sys.stderr)
+        time.sleep(interval)
+
+
 def list_clients(space: str) -> list[dict]:
     """Return all clients for *space*, most recent first, with finflow_number."""
-    con = get_connection()
+    con = get_connection(space)
     try:
         cur = con.cursor()
         cur.execute("SELECT * FROM clients WHERE space = ? ORDER BY id ASC", (space,))
@@ -151,7 +650,7 @@ def list_clients(space: str) -> list[dict]:
 
 def get_client(client_id: int, space: str) -> dict | None:
     """Return a single client by id within *space*, or None."""
-    con = get_connection()
+    con = get_connection(space)
     try:
         cur = con.cursor()
         cur.execute("SELECT * FROM clients WHERE id = ? AND space = ?", (client_id, space))
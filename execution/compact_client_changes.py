@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Client Change Log Compaction
+========================================
+Shrinks client_changes (filled by triggers on every client write, see
+migrate_create_client_changes.py) to the latest change per client, and
+drops deletes older than CLIENT_CHANGES_TOMBSTONE_DAYS.  The server does
+this once a day; run it by hand or from cron when the server does not.
+
+CLI Usage:
+    python execution/compact_client_changes.py                     # every space
+    python execution/compact_client_changes.py --space acme --days 7
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+import client_manager as cm
+
+load_dotenv()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact the client_changes log.")
+    parser.add_argument("--space", help="Only this space (default: every space)")
+    parser.add_argument("--days", type=float, default=None,
+                        help="Keep deletes this many days (default: CLIENT_CHANGES_TOMBSTONE_DAYS or 30)")
+    args = parser.parse_args()
+
+    if args.space:
+        removed = {args.space.strip().lower(): cm.compact_changes(args.space, args.days)}
+    else:
+        removed = cm.compact_all_changes(args.days)
+    for space, count in removed.items():
+        print(f"{space:<24} {count:>8} row(s) removed")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Response Compression
+================================
+after_request hook that compresses API responses according to the
+request's Accept-Encoding header.
+
+Rules:
+  - Encodings: zstd (if the optional `zstandard` package is installed) and
+    gzip; the client's q-values decide, ties go to zstd.
+  - Only text-like types are compressed (JSON, NDJSON, CSV, text/*, JS).
+    Images, PDFs, archives and anything that already has a
+    Content-Encoding are left alone.
+  - Buffered responses smaller than MIN_SIZE bytes are sent as-is.
+  - Streamed responses (stream_json) are compressed chunk by chunk and
+    flushed after every chunk, so the first byte is not delayed.
+  - File responses served with send_file (direct passthrough) are skipped
+    so they can still use sendfile.
+
+Compression ratios are recorded per encoding and exposed through stats()
+(GET /api/metrics/compression).
+
+Usage:
+    from compression import Compress
+    Compress(app)
+"""
+
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:                      # optional dependency
+    zstandard = None
+
+MIN_SIZE   = 1024                        # bytes — smaller bodies are not worth it
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/csv",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+}
+
+
+# ── Metrics ────────────────────────────────────────────────────────────────────
+
+_lock  = threading.Lock()
+_stats = {}                              # encoding -> {"responses", "bytes_in", "bytes_out"}
+
+
+def _record(encoding: str, bytes_in: int, bytes_out: int) -> None:
+    with _lock:
+        s = _stats.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+        s["responses"] += 1
+        s["bytes_in"]  += bytes_in
+        s["bytes_out"] += bytes_out
+
+
+def stats() -> dict:
+    """Per-encoding totals plus the overall ratio (bytes_in / bytes_out)."""
+    with _lock:
+        out = {}
+        for enc, s in _stats.items():
+            out[enc] = dict(s, ratio=round(s["bytes_in"] / s["bytes_out"], 2) if s["bytes_out"] else None)
+        return out
+
+
+# ── Compressors ────────────────────────────────────────────────────────────────
+
+def _compressor(encoding: str):
+    """Return (compress(chunk) -> bytes, flush() -> bytes, finish() -> bytes)."""
+    if encoding == "zstd":
+        obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return (
+            obj.compress,
+            lambda: obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            lambda: obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH),
+        )
+    obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)      # 31 = gzip container
+    return (
+        obj.compress,
+        lambda: obj.flush(zlib.Z_SYNC_FLUSH),
+        lambda: obj.flush(zlib.Z_FINISH),
+    )
+
+
+def _compress_all(data: bytes, encoding: str) -> bytes:
+    compress, _flush, finish = _compressor(encoding)
+    return compress(data) + finish()
+
+
+def _compress_stream(chunks, encoding: str):
+    compress, flush, finish = _compressor(encoding)
+    bytes_in = bytes_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            bytes_in += len(chunk)
+            out = compress(chunk) + flush()
+            bytes_out += len(out)
+            if out:
+                yield out
+        tail = finish()
+        bytes_out += len(tail)
+        yield tail
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        _record(encoding, bytes_in, bytes_out)
+
+
+# ── Flask integration ──────────────────────────────────────────────────────────
+
+class Compress:
+    """Registers the compression after_request hook on a Flask app."""
+
+    def __init__(self, app=None):
+        self.encodings = (["zstd"] if zstandard is not None else []) + ["gzip"]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.after_request(self._after_request)
+
+    def _choose(self, request) -> str | None:
+        best = request.accept_encodings.best_match(self.encodings)
+        return best if best and request.accept_encodings[best] > 0 else None
+
+    def _after_request(self, response):
+        from flask import request
+
+        if response.mimetype not in COMPRESSIBLE:
+            return response
+        response.vary.add("Accept-Encoding")
+
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough
+            or request.method == "HEAD"
+        ):
+            return response
+
+        encoding = self._choose(request)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < MIN_SIZE:
+                return response
+            body = _compress_all(data, encoding)
+            _record(encoding, len(data), len(body))
+            response.set_data(body)
+
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Database Routing
+============================
+One place that decides which SQLite file a query runs against.
+
+Layouts (DB_LAYOUT in .env):
+  single  — everything in .tmp/finflowai.db (default, the original layout)
+  sharded — .tmp/finflowai.db is the catalog (spaces, users, shared caches,
+            run/schedule headers) and each space's own data lives in
+            .tmp/spaces/<space>.db
+
+SQLite allows one writer per file, so in the sharded layout a large import
+into one space no longer blocks client edits in another.
+
+Shard tables (per space):  SHARD_TABLES below.
+Catalog tables:            spaces, users, category_cache, refund_runs,
+                           refund_schedules.
+
+A shard is created with the schema of the catalog's shard tables (the
+migrate_*.py scripts keep creating them in the catalog), in WAL mode, only
+when its space is registered (space_manager.create_space) or by
+shard_admin.py split.  connect() never creates one: for a space without a
+shard file it returns an empty, read-only in-memory database, so reads of
+an unknown space find nothing and writes fail instead of leaving a stray
+file behind.  Schema changes made after sharding are applied to every shard with
+`python execution/shard_admin.py exec "ALTER TABLE ..."`.
+
+The client change log (client_changes, client_changes_floor and the
+triggers on clients that fill them; CHANGE_LOG_SCHEMA) is the exception:
+connect() adds it to any database that has a clients table but not the
+log, so /api/clients works before migrate_create_client_changes.py has run.
+
+Usage:
+    import db
+    con = db.connect(space)     # the space's shard (the main DB when single)
+    con = db.connect()          # the catalog
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+BASE_DIR     = Path(__file__).resolve().parent.parent
+CATALOG_PATH = BASE_DIR / ".tmp" / "finflowai.db"
+SHARD_DIR    = BASE_DIR / ".tmp" / "spaces"
+
+LAYOUTS      = ("single", "sharded")
+
+# Tables whose rows belong to exactly one space
+SHARD_TABLES = (
+    "clients",
+    "client_changes",
+    "client_changes_floor",
+    "space_settings",
+    "transactions",
+    "category_rules",
+    "refund_run_items",
+    "refund_results",
+)
+
+# Same as migrate_create_client_changes.py
+CHANGE_LOG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS client_changes (
+        seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+        space      TEXT    NOT NULL,
+        client_id  INTEGER NOT NULL,
+        op         TEXT    NOT NULL,            -- 'upsert' | 'delete'
+        changed_at TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_client_changes_space_seq ON client_changes (space, seq);
+    CREATE TABLE IF NOT EXISTS client_changes_floor (
+        space TEXT    PRIMARY KEY,
+        seq   INTEGER NOT NULL
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_clients_changes_insert AFTER INSERT ON clients
+    BEGIN
+        INSERT INTO client_changes (space, client_id, op) VALUES (NEW.space, NEW.id, 'upsert');
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_clients_changes_update AFTER UPDATE ON clients
+    BEGIN
+        INSERT INTO client_changes (space, client_id, op) VALUES (NEW.space, NEW.id, 'upsert');
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_clients_changes_delete AFTER DELETE ON clients
+    BEGIN
+        INSERT INTO client_changes (space, client_id, op) VALUES (OLD.space, OLD.id, 'delete');
+    END;
+"""
+CHANGE_LOG_OBJECTS = {
+    "client_changes", "client_changes_floor",
+    "trg_clients_changes_insert", "trg_clients_changes_update", "trg_clients_changes_delete",
+}
+
+BUSY_TIMEOUT = 10                        # seconds to wait for another writer
+
+_SAFE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+_provisioned = set()                     # shard paths known to have the schema
+_change_logged = set()                   # paths known to have CHANGE_LOG_SCHEMA
+_provision_lock = threading.Lock()
+
+
+# ── Layout ─────────────────────────────────────────────────────────────────────
+
+def layout() -> str:
+    """Current layout from DB_LAYOUT (read on every call, so .env applies)."""
+    value = os.getenv("DB_LAYOUT", "single").strip().lower()
+    return value if value in LAYOUTS else "single"
+
+
+def sharded() -> bool:
+    return layout() == "sharded"
+
+
+def shard_path(space: str) -> Path:
+    """File holding *space*'s data in the sharded layout."""
+    space = space.strip().lower()
+    if not space:
+        raise ValueError("space is required.")
+    if _SAFE_NAME.match(space):
+        return SHARD_DIR / f"{space}.db"
+    digest = hashlib.sha1(space.encode("utf-8")).hexdigest()[:12]
+    return SHARD_DIR / f"space-{digest}.db"
+
+
+def path_for(space: str | None = None) -> Path:
+    """The file a connection for *space* (None = catalog) should open."""
+    if space is None or not sharded():
+        return CATALOG_PATH
+    return shard_path(space)
+
+
+# ── Connections ────────────────────────────────────────────────────────────────
+
+def _ensure_change_log(path: Path) -> None:
+    """Add CHANGE_LOG_SCHEMA to *path* if it has clients but not (all of) the log."""
+    if path in _change_logged:
+        return
+    with _provision_lock:
+        if path in _change_logged or not path.exists():
+            return
+        con = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        try:
+            existing = {r[0] for r in con.execute("SELECT name FROM sqlite_master")}
+            if "clients" not in existing:            # checked again once migrations add it
+                return
+            if not CHANGE_LOG_OBJECTS <= existing:
+                con.executescript(CHANGE_LOG_SCHEMA)
+        finally:
+            con.close()
+        _change_logged.add(path)
+
+
+def _provision(path: Path) -> None:
+    """Create the shard tables, their indexes and triggers in a new shard file."""
+    with _provision_lock:
+        if path in _provisioned:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            existing = {r[0] for r in con.execute("SELECT name FROM sqlite_master")}
+            con.execute("ATTACH DATABASE ? AS catalog", (str(CATALOG_PATH),))
+            marks = ", ".join("?" * len(SHARD_TABLES))
+            schema = con.execute(
+                f"""SELECT name, sql FROM catalog.sqlite_master
+                    WHERE sql IS NOT NULL AND tbl_name IN ({marks})
+                    ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END""",
+                SHARD_TABLES,
+            ).fetchall()
+            con.execute("DETACH DATABASE catalog")
+            for name, sql in schema:
+                if name not in existing:
+                    con.execute(sql)
+            con.commit()
+        finally:
+            con.close()
+        _provisioned.add(path)
+
+
+def provision_shard(space: str) -> Path:
+    """Create *space*'s shard file with the current schema if needed (any layout)."""
+    path = shard_path(space)
+    _provision(path)
+    return path
+
+
+def _empty_shard() -> sqlite3.Connection:
+    """In-memory database with the shard schema and no rows, read-only."""
+    _ensure_change_log(CATALOG_PATH)
+    con = sqlite3.connect(":memory:")
+    con.execute("ATTACH DATABASE ? AS catalog", (f"file:{CATALOG_PATH}?mode=ro",))
+    marks = ", ".join("?" * len(SHARD_TABLES))
+    schema = con.execute(
+        f"""SELECT sql FROM catalog.sqlite_master
+            WHERE sql IS NOT NULL AND type IN ('table', 'index') AND tbl_name IN ({marks})
+            ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END""",
+        SHARD_TABLES,
+    ).fetchall()
+    con.execute("DETACH DATABASE catalog")
+    for (sql,) in schema:
+        con.execute(sql)
+    con.execute("PRAGMA query_only = ON")
+    return con
+
+
+def connect(space: str | None = None, row_factory=sqlite3.Row) -> sqlite3.Connection:
+    """
+    Open a connection for *space*'s data, or for the catalog when *space*
+    is None.  In the single layout both are the main database.
+    Sharded: raises ValueError for a blank space; a space without a shard
+    file gets an empty read-only database (see _empty_shard).
+    """
+    path = path_for(space)
+    if path != CATALOG_PATH:
+        if not path.exists():
+            con = _empty_shard()
+            con.row_factory = row_factory
+            return con
+        _provision(path)                         # bring an older shard's schema up to date
+    _ensure_change_log(path)
+    con = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    con.row_factory = row_factory
+    return con
+
+
+def shard_spaces() -> list[str]:
+    """Spaces from the catalog whose shard file exists (empty when single)."""
+    if not sharded():
+        return []
+    con = sqlite3.connect(CATALOG_PATH)
+    try:
+        names = [r[0] for r in con.execute("SELECT name FROM spaces ORDER BY name")]
+    finally:
+        con.close()
+    return [n for n in names if shard_path(n).exists()]
+
+
+# ── Cross-space queries (ATTACH) ───────────────────────────────────────────────
+
+MAX_ATTACHED = 10                        # SQLite's default SQLITE_MAX_ATTACHED
+
+
+def query_all_spaces(sql: str, params: tuple = ()) -> list[dict]:
+    """
+    Run a read-only query against every space's data and return the rows,
+    each with a leading "space" key.  Write tables as {db}.table:
+
+        query_all_spaces("SELECT count(*) AS n FROM {db}.clients")
+
+    Sharded: shards are ATTACHed to a catalog connection, up to MAX_ATTACHED
+    at a time, and each batch is one UNION ALL statement.  Single: the query
+    runs once against the main database with space "*".
+    """
+    spaces = shard_spaces()
+    if not spaces:
+        con = connect()
+        try:
+            return [{"space": "*", **dict(r)} for r in con.execute(sql.format(db="main"), params)]
+        finally:
+            con.close()
+
+    rows = []
+    con = sqlite3.connect(f"file:{CATALOG_PATH}?mode=ro", uri=True)
+    con.row_factory = sqlite3.Row
+    try:
+        for i in range(0, len(spaces), MAX_ATTACHED):
+            batch   = spaces[i:i + MAX_ATTACHED]
+            aliases = [f"s{n}" for n in range(len(batch))]
+            for alias, space in zip(aliases, batch):
+                con.execute(f"ATTACH DATABASE ? AS {alias}", (f"file:{shard_path(space)}?mode=ro",))
+            try:
+                union = " UNION ALL ".join(
+                    f"SELECT ? AS space, * FROM ({sql.format(db=alias)})" for alias in aliases
+                )
+                args = []
+                for space in batch:
+                    args += [space, *params]
+                rows += [dict(r) for r in con.execute(union, args)]
+            finally:
+                for alias in aliases:
+                    con.execute(f"DETACH DATABASE {alias}")
+    finally:
+        con.close()
+    return rows
+
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Space Events (Server-Sent Events)
+=============================================
+Pushes activity in a space to every open browser tab of that space, so
+pages react to colleagues' edits without polling.
+
+  - publish(space, event, data)  → fan an event out to the space's subscribers
+  - stream(space, subscriber, last_event_id)
+                                 → SSE text generator for one subscriber
+                                   (GET /api/spaces/<name>/events)
+
+One Broadcaster per space lives in this process; publishing is a put into
+each subscriber's bounded queue, so nothing touches the database per
+connection.  A subscriber that falls QUEUE_SIZE events behind is sent a
+single "resync" event and disconnected; the browser's EventSource
+reconnects and the page catches up through /api/clients/changes.
+
+Events:
+  client   { "op": "created" | "updated" | "deleted", "id": int }
+  clients  { "op": "bulk", "updated": n, "deleted": n }
+  import   { "job_id", "status", "dry_run", "done", "total", "added": n, "updated": n,
+             "skipped": n, "errors": n }                (every terminal status, see import_jobs.py)
+  refund   { "run_id", "status", "done", "total" }     (throttled per run)
+  resync   {}                                          (reload via the change feed)
+
+Usage:
+    events.publish(space, "client", {"op": "created", "id": record["id"]})
+"""
+
+import json
+import os
+import queue
+import threading
+
+QUEUE_SIZE      = 256                    # events buffered per subscriber
+KEEPALIVE       = 15                     # seconds between comment pings
+RETRY_MS        = 3000                   # EventSource reconnect delay
+DEFAULT_MAX_SUBSCRIBERS = 100            # per space (SSE_MAX_SUBSCRIBERS)
+
+_OVERFLOW = object()
+
+
+def max_subscribers() -> int:
+    try:
+        return max(1, int(os.getenv("SSE_MAX_SUBSCRIBERS", DEFAULT_MAX_SUBSCRIBERS)))
+    except ValueError:
+        return DEFAULT_MAX_SUBSCRIBERS
+
+
+# ── Broadcaster ────────────────────────────────────────────────────────────────
+
+class Broadcaster:
+    """Subscribers of one space, each with its own bounded queue."""
+
+    def __init__(self):
+        self._lock        = threading.Lock()
+        self._subscribers = set()
+        self._next_id     = 0
+
+    def subscribe(self) -> queue.Queue | None:
+        """New subscriber queue, or None if the space is at max_subscribers()."""
+        with self._lock:
+            if len(self._subscribers) >= max_subscribers():
+                return None
+            q = queue.Queue(maxsize=QUEUE_SIZE)
+            self._subscribers.add(q)
+            return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event: str, data: dict) -> int:
+        """Queue the event for every subscriber. Returns the number reached."""
+        with self._lock:
+            self._next_id += 1
+            message = (self._next_id, event, data)
+            subscribers = list(self._subscribers)
+        reached = 0
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+                reached += 1
+            except queue.Full:
+                # Too far behind: replace the backlog with one overflow marker
+                with q.mutex:
+                    q.queue.clear()
+                try:
+                    q.put_nowait(_OVERFLOW)
+                except queue.Full:       # refilled by a concurrent publish
+                    pass
+        return reached
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+_broadcasters = {}                       # space -> Broadcaster
+_broadcasters_lock = threading.Lock()
+
+
+def broadcaster(space: str) -> Broadcaster:
+    space = space.strip().lower()
+    with _broadcasters_lock:
+        if space not in _broadcasters:
+            _broadcasters[space] = Broadcaster()
+        return _broadcasters[space]
+
+
+def publish(space: str, event: str, data: dict) -> int:
+    """Send *event* to every open events stream of *space*. Never blocks."""
+    if not space:
+        return 0
+    return broadcaster(space).publish(event, data)
+
+
+# ── SSE stream ─────────────────────────────────────────────────────────────────
+
+def _format(event_id, event: str, data: dict) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def stream(space: str, subscriber: queue.Queue, last_event_id: str | None = None):
+    """
+    Yield SSE text for *subscriber* until the client disconnects.
+    A reconnect (Last-Event-ID set) starts with "resync", because events
+    sent while the tab was disconnected are not replayed.
+    """
+    b = broadcaster(space)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if last_event_id:
+            yield _format(None, "resync", {})
+        while True:
+            try:
+                message = subscriber.get(timeout=KEEPALIVE)
+            except queue.Empty:
+                yield ": ping\n\n"               # keeps proxies open, detects gone clients
+                continue
+            if message is _OVERFLOW:
+                yield _format(None, "resync", {})
+                return
+            yield _format(*message)
+    finally:
+        b.unsubscribe(subscriber)
+
+
+def stats() -> dict:
+    """{ space: subscriber count } for spaces with open streams."""
+    with _broadcasters_lock:
+        items = list(_broadcasters.items())
+    return {space: len(b) for space, b in items if len(b)}
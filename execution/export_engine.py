@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Client Export Engine
+================================
+Writes a space's client list as CSV, NDJSON, XLSX or Parquet, and keeps
+each generated file on disk so repeat downloads cost a file send.
+
+Architecture:
+  - An export is keyed by (space, format, data version).  The data version
+    is client_manager.clients_version() — the space's latest client_changes
+    seq plus its client count — so any insert, edit or delete makes a new
+    version and an unchanged space reuses the last file.
+  - Files live at .tmp/exports/<space>/clients-<seq>-<count>-v<EXPORT_VERSION>.<fmt>.
+    Writing a new version deletes that format's older files; a download that
+    looked up the old file just before that retries once with the new one
+    (server.py), and one already sending keeps its open file.
+  - Rows are streamed from SQLite straight into the file writer in batches of
+    ROW_BATCH, inside one read transaction so the file matches its version.
+    Files are written to a temporary name and renamed into place.
+  - XLSX is produced by a small streaming writer (zipfile + inline strings),
+    so memory does not grow with the number of clients.  Parquet needs the
+    optional pyarrow package.
+  - One lock per (space, format): simultaneous clicks generate the file once.
+  - Text formats (PRECOMPRESSED) also get .gz and, with the optional
+    zstandard package, .zst copies written next to the file, so a
+    compressed download is a file send too.
+
+The server sends cached files with send_file, which hands them to the WSGI
+server's file wrapper (sendfile where available) and answers conditional
+and Range requests.  send_file responses bypass compression.py, so the
+server picks the precompressed copy matching Accept-Encoding itself
+(encoded_path()).
+
+Bump EXPORT_VERSION whenever the columns or file layout change.
+
+Usage:
+    python execution/export_engine.py export --space ge-souza-tax --format xlsx
+    python execution/export_engine.py clean  [--space ge-souza-tax]
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import client_manager as cm
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:                      # optional — Parquet exports only
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:                      # optional — .zst copies only
+    zstandard = None
+
+BASE_DIR   = Path(__file__).resolve().parent.parent
+EXPORT_DIR = BASE_DIR / ".tmp" / "exports"
+
+EXPORT_VERSION = 1
+ROW_BATCH      = 5000
+
+# Never exported
+EXCLUDED = {"revenue_password", "legacy_phone", "space"}
+
+FORMATS = {
+    "csv":     "text/csv",
+    "ndjson":  "application/x-ndjson",
+    "xlsx":    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Formats kept precompressed, and the encodings written (preferred first)
+PRECOMPRESSED = ("csv", "ndjson")
+ENCODINGS     = {"zstd": ".zst", "gzip": ".gz"}
+GZIP_LEVEL    = 9
+ZSTD_LEVEL    = 10
+_COPY_CHUNK   = 1 << 20
+
+_SAFE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _validate_format(fmt: str) -> str:
+    fmt = (fmt or "").strip().lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    if fmt == "parquet" and pq is None:
+        raise ValueError("Parquet export needs the 'pyarrow' package (pip install pyarrow).")
+    return fmt
+
+
+def space_dir(space: str) -> Path:
+    if _SAFE_NAME.match(space):
+        return EXPORT_DIR / space
+    return EXPORT_DIR / f"space-{hashlib.sha1(space.encode('utf-8')).hexdigest()[:12]}"
+
+
+def artifact_path(space: str, fmt: str, version: tuple[int, int]) -> Path:
+    # The cache key is only the data version plus EXPORT_VERSION: any change
+    # to the columns or a file layout (a migration adding a clients column
+    # included) must bump EXPORT_VERSION, or stale files keep being served.
+    seq, count = version
+    return space_dir(space) / f"clients-{seq}-{count}-v{EXPORT_VERSION}.{fmt}"
+
+
+def encoded_path(path: Path, encoding: str) -> Path:
+    """The precompressed copy of *path* for *encoding* (may not exist)."""
+    return path.with_name(path.name + ENCODINGS[encoding])
+
+
+def available_encodings(path: Path) -> list[str]:
+    """Encodings with a precompressed copy of *path* on disk, preferred first."""
+    return [e for e in ENCODINGS if encoded_path(path, e).exists()]
+
+
+def download_name(space: str, fmt: str) -> str:
+    return f"finflowai_{cm.space_code(space).lower()}_clients.{fmt}"
+
+
+_locks = {}                              # (space, fmt) -> Lock
+_locks_lock = threading.Lock()
+
+
+def _lock(space: str, fmt: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault((space, fmt), threading.Lock())
+
+
+def _batches(cur):
+    while True:
+        rows = cur.fetchmany(ROW_BATCH)
+        if not rows:
+            return
+        yield rows
+
+
+# ── Writers: (path, columns, batches of row tuples) ────────────────────────────
+
+def _write_csv(path: Path, columns: list[str], batches) -> None:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:   # BOM for Excel
+        writer = csv.writer(f, lineterminator="\r\n")
+        writer.writerow(columns)
+        for rows in batches:
+            writer.writerows(["" if v is None else v for v in row] for row in rows)
+
+
+def _write_ndjson(path: Path, columns: list[str], batches) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for rows in batches:
+            f.writelines(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+            )
+
+
+_XML_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_STATIC = {
+    "[Content_Types].xml":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>',
+    "_rels/.rels":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>',
+    "xl/workbook.xml":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Clients" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>',
+    "xl/_rels/workbook.xml.rels":
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>',
+}
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _xlsx_row(number: int, values, letters: list[str]) -> str:
+    cells = []
+    for letter, v in zip(letters, values):
+        ref = f"{letter}{number}"
+        if v is None or v == "":
+            continue
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            cells.append(f'<c r="{ref}"><v>{v}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub("", str(v)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def _write_xlsx(path: Path, columns: list[str], batches) -> None:
+    letters = [_column_letter(i) for i in range(len(columns))]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for name, xml in _XLSX_STATIC.items():
+            z.writestr(name, xml)
+        with z.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as raw:
+            def put(text: str):
+                raw.write(text.encode("utf-8"))
+            put('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>')
+            put(_xlsx_row(1, columns, letters))
+            number = 1
+            for rows in batches:
+                chunk = []
+                for row in rows:
+                    number += 1
+                    chunk.append(_xlsx_row(number, row, letters))
+                put("".join(chunk))
+            put("</sheetData></worksheet>")
+
+
+def _write_parquet(path: Path, columns: list[str], batches) -> None:
+    schema = pa.schema([(c, pa.int64() if c == "id" else pa.string()) for c in columns])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in batches:
+            data = {c: [row[i] for row in rows] for i, c in enumerate(columns)}
+            writer.write_table(pa.table(data, schema=schema))
+
+
+def _precompress(src: Path, dest: Path) -> list[tuple[Path, Path]]:
+    """Write .gz (and .zst) copies of *src*; returns (temp file, final name) pairs."""
+    out = []
+    for encoding, suffix in ENCODINGS.items():
+        if encoding == "zstd" and zstandard is None:
+            continue
+        tmp = src.with_name(src.name + suffix)
+        with open(src, "rb") as fin, open(tmp, "wb") as raw:
+            if encoding == "zstd":
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(fin, raw)
+            else:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as z:
+                    shutil.copyfileobj(fin, z, _COPY_CHUNK)
+        out.append((tmp, dest.with_name(dest.name + suffix)))
+    return out
+
+
+_WRITERS = {"csv": _write_csv, "ndjson": _write_ndjson, "xlsx": _write_xlsx, "parquet": _write_parquet}
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def _generate(space: str, fmt: str) -> Path:
+    """Write the export inside one read transaction. Returns the new file."""
+    con = cm.get_connection(space)
+    try:
+        con.execute("BEGIN")                         # one snapshot for version + rows
+        version = cm.clients_version(space, con)
+        path = artifact_path(space, fmt, version)
+        if path.exists():
+            return path
+
+        cur = con.execute("SELECT * FROM clients WHERE space = ? LIMIT 0", (space,))
+        fields = [d[0] for d in cur.description if d[0] not in EXCLUDED]
+        cols = ", ".join(f'"{f}"' for f in fields)
+        cur = con.execute(
+            f"""SELECT {cols}, printf('%s-%04d', ?, id) AS finflow_number
+                FROM clients WHERE space = ? ORDER BY id""",
+            (cm.space_code(space), space),
+        )
+        columns = fields + ["finflow_number"]
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        copies = []
+        try:
+            _WRITERS[fmt](tmp, columns, _batches(cur))
+            if fmt in PRECOMPRESSED:
+                copies = _precompress(tmp, path)
+            for tmp_copy, final in copies:           # copies first: the file implies them
+                os.replace(tmp_copy, final)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+            for tmp_copy, _ in copies:
+                tmp_copy.unlink(missing_ok=True)
+    finally:
+        con.close()
+
+    current = {path.name} | {encoded_path(path, e).name for e in ENCODINGS}
+    for old in path.parent.glob(f"clients-*.{fmt}*"):  # superseded versions and their copies
+        if old.name not in current and not old.name.endswith(".tmp"):
+            try:
+                old.unlink()
+            except OSError:                          # still being sent (Windows)
+                pass
+    return path
+
+
+def export_clients(space: str, fmt: str) -> tuple[Path, bool]:
+    """
+    Path of the current *fmt* export of *space*, generating it only if the
+    space changed since the last one.  Returns (path, served_from_cache).
+    Raises ValueError for an unknown format or a missing optional package.
+    """
+    fmt   = _validate_format(fmt)
+    space = space.strip().lower()
+    if not space:
+        raise ValueError("space is required.")
+
+    path = artifact_path(space, fmt, cm.clients_version(space))
+    if path.exists():
+        return path, True
+    with _lock(space, fmt):
+        existed = artifact_path(space, fmt, cm.clients_version(space)).exists()
+        return _generate(space, fmt), existed
+
+
+def clean(space: str | None = None) -> int:
+    """Delete cached exports (of one space, or all). Returns files removed."""
+    target = space_dir(space.strip().lower()) if space else EXPORT_DIR
+    if not target.exists():
+        return 0
+    removed = sum(1 for p in target.rglob("*") if p.is_file())
+    shutil.rmtree(target, ignore_errors=True)
+    return removed
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI client exports")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_exp = sub.add_parser("export", help="Write (or reuse) an export and print its path")
+    p_exp.add_argument("--space",  required=True)
+    p_exp.add_argument("--format", default="csv", choices=list(FORMATS))
+
+    p_cln = sub.add_parser("clean", help="Delete cached exports")
+    p_cln.add_argument("--space", default=None)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            path, cached = export_clients(args.space, args.format)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            raise SystemExit(1)
+        print(f"{'Cached' if cached else 'Written'}: {path} ({path.stat().st_size:,} bytes)")
+
+    elif args.command == "clean":
+        print(f"Removed {clean(args.space)} cached export(s).")
+
+
+if __name__ == "__main__":
+    main()
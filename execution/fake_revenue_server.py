@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Fake Revenue Server
+===============================
+Local stand-in for the Revenue refund service, for tests and benchmarks.
+Implements the contract documented in refund_backend.py with a fixed
+latency and an optional random failure rate.
+
+Responses are deterministic per PPS number:
+  - PPS ending in a letter A–M → "success" with a refund amount
+  - any other PPS               → "no_data"
+  - a PPS starting with "0000"  → HTTP 404 (unknown taxpayer)
+
+Usage:
+    python execution/fake_revenue_server.py [--port 8765] [--latency 0.2] [--fail-rate 0.0]
+
+    # or in-process (tests / benchmarks):
+    server, url = start_fake_server(latency=0.05)
+    ...
+    server.shutdown()
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"            # keep-alive
+    disable_nagle_algorithm = True           # headers and body are separate writes
+
+    def log_message(self, fmt, *args):       # keep benchmark output clean
+        pass
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"message": "Invalid JSON."})
+
+        if self.path != "/refunds/check":
+            return self._send(404, {"message": "Not found."})
+
+        srv = self.server
+        with srv.lock:
+            srv.requests += 1
+        time.sleep(srv.latency)
+        if srv.fail_rate and random.random() < srv.fail_rate:
+            return self._send(503, {"message": "Service temporarily unavailable."})
+
+        pps = (data.get("pps_number") or "").strip().upper()
+        if not pps:
+            return self._send(400, {"message": "pps_number is required."})
+        if pps.startswith("0000"):
+            return self._send(404, {"message": f"No taxpayer record for PPS {pps}."})
+
+        if "A" <= pps[-1] <= "M":
+            cents = int(hashlib.sha256(pps.encode()).hexdigest()[:6], 16) % 250000
+            return self._send(200, {
+                "status":  "success",
+                "message": f"Refund of €{cents / 100:,.2f} available.",
+                "detail":  {"refund_amount": round(cents / 100, 2), "tax_year": 2025},
+            })
+        return self._send(200, {"status": "no_data", "message": "No refund due.", "detail": {}})
+
+
+def start_fake_server(host: str = "127.0.0.1", port: int = 0,
+                      latency: float = 0.2, fail_rate: float = 0.0):
+    """Start the fake server in a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.latency   = latency
+    server.fail_rate = fail_rate
+    server.requests  = 0
+    server.lock      = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI Fake Revenue Server")
+    parser.add_argument("--host",      default="127.0.0.1")
+    parser.add_argument("--port",      type=int,   default=8765)
+    parser.add_argument("--latency",   type=float, default=0.2, help="Seconds per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, url = start_fake_server(args.host, args.port, args.latency, args.fail_rate)
+    print(f"Fake Revenue server at {url}  (latency={args.latency}s, fail_rate={args.fail_rate})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
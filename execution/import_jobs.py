@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Background Client Import Jobs
+=========================================
+Large CSV imports run outside the HTTP request: the upload is spooled to
+.tmp/imports/<job_id>.csv, a job row is recorded in import_jobs, and a
+background worker thread imports the file while the page polls for
+progress.
+
+  - submit(space, mode, stream, filename, dry_run) → job dict (status 'queued')
+  - get_job(job_id)                                → job dict with progress, or None
+  - run_for_real(job_id)                           → re-queue a finished dry run as a real import
+  - errors_path(job_id)                            → CSV of rejected rows (row, name, field, error)
+  - recover()                                      → at startup: re-queue 'queued' jobs, mark
+                                                     'running' ones 'interrupted', purge old files
+
+Processing:
+  - Rows are read from the spooled file as a stream, CHUNK_ROWS at a time,
+    and each chunk goes through client_manager.import_clients() in its own
+    transaction, so progress (done / added / updated / skipped / errors) is
+    saved after every chunk and pages see the new clients as they land.
+    The space's match index (client_manager.import_index) is built once per
+    job and carried from chunk to chunk, so rows of a later chunk match
+    clients added by an earlier one exactly as in a single-call import.
+  - A dry run reads and checks the file in the same chunks, with
+    import_clients(dry_run=True) (nothing is written), so memory stays
+    bounded by CHUNK_ROWS however large the file.  Once it is 'completed',
+    run_for_real() imports the same spooled file — no second upload.
+  - Rejected rows are appended to .tmp/imports/<job_id>.errors.csv.
+  - A job interrupted by a restart keeps its counts; the chunks before
+    `done` were committed, the rest were not.
+  - An "import" event (events.py) is published after every chunk of a real
+    import that changed clients (status 'running'), and once whenever a job
+    reaches completed, failed or interrupted — dry runs and imports that
+    changed nothing included.
+
+Job statuses: queued → running → completed | failed | interrupted.
+Jobs and their files are deleted after RETENTION_DAYS.
+"""
+
+import csv
+import io
+import logging
+import queue
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import client_manager as cm
+import db
+import events
+
+BASE_DIR   = Path(__file__).resolve().parent.parent
+IMPORT_DIR = BASE_DIR / ".tmp" / "imports"
+
+CHUNK_ROWS     = 5000
+RETENTION_DAYS = 7
+ERROR_COLUMNS  = ["row", "name", "field", "error"]
+
+log = logging.getLogger(__name__)
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _get_connection():
+    """Jobs live in the catalog, next to refund_runs (see db.py)."""
+    return db.connect()
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def spool_path(job_id: str) -> Path:
+    return IMPORT_DIR / f"{job_id}.csv"
+
+
+def errors_path(job_id: str) -> Path:
+    return IMPORT_DIR / f"{job_id}.errors.csv"
+
+
+def _update(job_id: str, **fields) -> None:
+    fields["updated_at"] = _utc_now()
+    con = _get_connection()
+    try:
+        con.execute(
+            f"UPDATE import_jobs SET {', '.join(f + ' = ?' for f in fields)} WHERE id = ?",
+            [*fields.values(), job_id],
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def _publish(job: dict) -> None:
+    """Push the job's status and counts to the space's open pages as an "import" event."""
+    events.publish(job["space"], "import", {
+        "job_id": job["id"], "status": job["status"], "dry_run": bool(job["dry_run"]),
+        "done": job["done"], "total": job["total"], "added": job["added"],
+        "updated": job["updated"], "skipped": job["skipped"], "errors": job["errors"],
+    })
+
+
+def _finish(job_id: str, status: str, **fields) -> None:
+    """Record a terminal status (completed / failed) and announce it."""
+    _update(job_id, status=status, **fields)
+    job = get_job(job_id)
+    if job is not None:
+        _publish(job)
+
+
+def _read_rows(path: Path):
+    """Yield (row_number, data) from the spooled CSV; row 1 is the header."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f), start=2):
+            yield i, {k.strip(): (v or "").strip() for k, v in row.items() if k}
+
+
+def _count_rows(path: Path) -> int:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def submit(space: str, mode: str, stream, filename: str = "", dry_run: bool = False) -> dict:
+    """
+    Spool *stream* (a binary file object) to disk and queue an import job.
+    Raises ValueError for an unknown mode or a file that is not UTF-8 CSV.
+    """
+    if mode not in cm.IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}'. Use one of: {', '.join(cm.IMPORT_MODES)}.")
+    job_id = uuid.uuid4().hex
+    path = spool_path(job_id)
+    IMPORT_DIR.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as out:
+        while block := stream.read(1 << 20):
+            out.write(block)
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            header = next(csv.reader(io.StringIO(f.readline())), [])
+    except UnicodeDecodeError:
+        path.unlink(missing_ok=True)
+        raise ValueError("Could not parse CSV: the file is not UTF-8 text.")
+    if "name" not in [h.strip() for h in header]:
+        path.unlink(missing_ok=True)
+        raise ValueError("Could not parse CSV: the header row must include a 'name' column.")
+
+    con = _get_connection()
+    try:
+        con.execute(
+            "INSERT INTO import_jobs (id, space, mode, dry_run, filename) VALUES (?, ?, ?, ?, ?)",
+            (job_id, space.strip().lower(), mode, int(dry_run), filename),
+        )
+        con.commit()
+    finally:
+        con.close()
+    _enqueue(job_id)
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> dict | None:
+    con = _get_connection()
+    try:
+        row = con.execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        con.close()
+    if row is None:
+        return None
+    job = dict(row)
+    job["dry_run"] = bool(job["dry_run"])
+    return job
+
+
+def list_jobs(space: str, limit: int = 20) -> list[dict]:
+    con = _get_connection()
+    try:
+        rows = con.execute(
+            "SELECT * FROM import_jobs WHERE space = ? ORDER BY created_at DESC LIMIT ?",
+            (space.strip().lower(), limit),
+        ).fetchall()
+    finally:
+        con.close()
+    return [dict(r, dry_run=bool(r["dry_run"])) for r in rows]
+
+
+def run_for_real(job_id: str) -> dict | None:
+    """
+    Queue the real import of a completed dry run (same spooled file).
+    Returns the job, or None if there is no such job.
+    Raises ValueError if the job is not a completed dry run.
+    """
+    if get_job(job_id) is None:
+        return None
+    if not spool_path(job_id).exists():
+        raise ValueError("The uploaded file has expired. Please upload it again.")
+    con = _get_connection()
+    try:
+        cur = con.execute(
+            """UPDATE import_jobs
+               SET dry_run = 0, status = 'queued', done = 0, added = 0, updated = 0,
+                   skipped = 0, errors = 0, message = '', updated_at = ?
+               WHERE id = ? AND dry_run = 1 AND status = 'completed'""",
+            (_utc_now(), job_id),
+        )
+        con.commit()
+    finally:
+        con.close()
+    if cur.rowcount == 0:                        # also stops a double click queuing it twice
+        raise ValueError("Only a completed dry run can be imported.")
+    _enqueue(job_id)
+    return get_job(job_id)
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _enqueue(job_id: str) -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name="import-jobs", daemon=True)
+            _worker.start()
+    _queue.put(job_id)
+
+
+def _work() -> None:
+    while True:
+        job_id = _queue.get()
+        try:
+            _process(job_id)
+        except Exception as e:                   # never let one file stop the worker
+            log.exception("Import job %s failed", job_id)
+            _finish(job_id, "failed", message=str(e))
+
+
+def _claim(job_id: str) -> dict | None:
+    """Move a queued job to 'running' (only one worker/process gets it)."""
+    con = _get_connection()
+    try:
+        cur = con.execute(
+            "UPDATE import_jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (_utc_now(), job_id),
+        )
+        con.commit()
+    finally:
+        con.close()
+    return get_job(job_id) if cur.rowcount else None
+
+
+def _process(job_id: str) -> None:
+    job = _claim(job_id)
+    if job is None:
+        return
+    space, path = job["space"], spool_path(job_id)
+    total = _count_rows(path)
+    _update(job_id, total=total)
+
+    counts = {"done": 0, "added": 0, "updated": 0, "skipped": 0, "errors": 0}
+    with open(errors_path(job_id), "w", encoding="utf-8-sig", newline="") as ef:
+        writer = csv.DictWriter(ef, fieldnames=ERROR_COLUMNS, extrasaction="ignore", lineterminator="\r\n")
+        writer.writeheader()
+
+        index = cm.import_index(space)
+        for rows in _chunks(_read_rows(path), CHUNK_ROWS):
+            try:
+                result = cm.import_clients(rows, space, job["mode"], dry_run=job["dry_run"], index=index)
+            except ValueError as e:
+                _finish(job_id, "failed", message=f"{e} (after row {counts['done'] + 1})", **counts)
+                return
+            writer.writerows(result["errors"])
+            ef.flush()
+            counts["done"]    += len(rows)
+            counts["added"]   += result["added"]
+            counts["updated"] += result["updated"]
+            counts["skipped"] += result["skipped"]
+            counts["errors"]  += len(result["errors"])
+            _update(job_id, **counts)
+            if not job["dry_run"] and (result["added"] or result["updated"]):
+                _publish({**job, **counts, "total": total})
+
+    _finish(job_id, "completed", **counts)
+    if not job["dry_run"]:
+        path.unlink(missing_ok=True)             # keep the upload only for a dry run's follow-up
+
+
+# ── Startup ────────────────────────────────────────────────────────────────────
+
+def recover() -> dict:
+    """
+    Re-queue jobs that never started, mark jobs cut off mid-run as
+    'interrupted', and delete jobs (and files) older than RETENTION_DAYS.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    con = _get_connection()
+    try:
+        old = [r[0] for r in con.execute("SELECT id FROM import_jobs WHERE created_at < ?", (cutoff,))]
+        con.execute("DELETE FROM import_jobs WHERE created_at < ?", (cutoff,))
+        cut_off = [r[0] for r in con.execute("SELECT id FROM import_jobs WHERE status = 'running'")]
+        con.execute(
+            "UPDATE import_jobs SET status = 'interrupted', message = ?, updated_at = ? WHERE status = 'running'",
+            ("The server restarted during this import; rows before 'done' were imported.", _utc_now()),
+        )
+        queued = [r[0] for r in con.execute(
+            "SELECT id FROM import_jobs WHERE status = 'queued' ORDER BY created_at"
+        )]
+        con.commit()
+    finally:
+        con.close()
+    for job_id in old:
+        spool_path(job_id).unlink(missing_ok=True)
+        errors_path(job_id).unlink(missing_ok=True)
+    for job_id in cut_off:
+        job = get_job(job_id)
+        if job is not None:
+            _publish(job)
+    for job_id in queued:
+        _enqueue(job_id)
+    return {"requeued": len(queued), "interrupted": len(cut_off), "purged": len(old)}
@@ -6,10 +6,20 @@ then writes a normalised JSON file to .tmp/.
 
 Usage:
     python execution/ingest_transactions.py [path/to/transactions.csv]
+    python execution/ingest_transactions.py statement.csv --space ge-souza-tax --client-id 12
+
+    python execution/ingest_transactions.py statement.csv --categorise openai
+    python execution/ingest_transactions.py statement.csv --space ge-souza-tax --rules --categorise openai
 
 If no path is provided, defaults to .tmp/transactions_raw.csv
+With --rules, Uncategorised rows are first matched against the space's
+merchant rules (execution/rules_categoriser.py).
+With --categorise, remaining Uncategorised rows are classified by execution/ai_categoriser.py.
+With --space and --client-id the cleaned rows are also stored in the
+`transactions` table for that client (replacing any previous import).
 """
 
+import argparse
 import sys
 import os
 import json
@@ -18,6 +28,8 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
+import db
+
 # ── Setup ──────────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent
 TMP_DIR = BASE_DIR / ".tmp"
@@ -87,7 +99,7 @@ def ingest(filepath: Path) -> list[dict]:
                 "date": date,
                 "description": row.get("description", ""),
                 "amount": amount,
-                "category": row.get("category", "Uncategorised"),
+                "category": row.get("category") or "Uncategorised",
                 "type": "income" if amount > 0 else "expense",
             })
 
@@ -95,6 +107,34 @@ def ingest(filepath: Path) -> list[dict]:
     return transactions
 
 
+def store(transactions: list[dict], space: str, client_id: int) -> int:
+    """
+    Replace the stored transactions for (space, client_id) with *transactions*.
+    Runs as a single transaction with one executemany. Returns rows written.
+    """
+    space = space.strip().lower()
+    con = db.connect(space)
+    try:
+        con.execute(
+            "DELETE FROM transactions WHERE space = ? AND client_id = ?",
+            (space, client_id),
+        )
+        con.executemany(
+            """INSERT INTO transactions
+               (space, client_id, date, description, amount, category, type)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (space, client_id, t["date"], t["description"], t["amount"],
+                 t["category"], t["type"])
+                for t in transactions
+            ],
+        )
+        con.commit()
+        return len(transactions)
+    finally:
+        con.close()
+
+
 def summarise(transactions: list[dict]) -> None:
     income = sum(t["amount"] for t in transactions if t["type"] == "income")
     expenses = sum(abs(t["amount"]) for t in transactions if t["type"] == "expense")
@@ -109,7 +149,20 @@ def summarise(transactions: list[dict]) -> None:
 # ── Main ───────────────────────────────────────────────────────────────────────
 
 def main():
-    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else TMP_DIR / "transactions_raw.csv"
+    parser = argparse.ArgumentParser(description="FinFlowAI Transaction Ingestion")
+    parser.add_argument("path", nargs="?", default=str(TMP_DIR / "transactions_raw.csv"))
+    parser.add_argument("--space",     default=None, help="Store rows for this space")
+    parser.add_argument("--client-id", type=int, default=None, help="Store rows for this client")
+    parser.add_argument("--rules", action="store_true",
+                        help="Apply the space's merchant rules (requires --space)")
+    parser.add_argument("--categorise", default=None, choices=["openai", "local"],
+                        help="Categorise Uncategorised rows with this backend")
+    args = parser.parse_args()
+
+    if args.rules and not args.space:
+        parser.error("--rules requires --space")
+
+    input_path = Path(args.path)
 
     if not input_path.exists():
         log.error(f"Input file not found: {input_path}")
@@ -118,13 +171,44 @@ def main():
     log.info(f"Ingesting transactions from: {input_path}")
     transactions = ingest(input_path)
 
+    ruleset = None
+    if args.rules:
+        import rules_categoriser as rc
+        ruleset = rc.load_ruleset(args.space)
+        stats = rc.categorise_transactions(transactions, ruleset)
+        log.info(
+            f"Rules matched {stats['matched']}/{stats['rows']} Uncategorised rows "
+            f"({ruleset.rule_count} rules)."
+        )
+
+    if args.categorise:
+        import ai_categoriser as ac
+        stats = ac.categorise_transactions(transactions, ac.get_backend(args.categorise))
+        log.info(
+            f"Categorised {stats['categorised']}/{stats['rows']} rows: "
+            f"{stats['distinct']} distinct descriptions, {stats['cached']} cached, "
+            f"{stats['requested']} sent in {stats['batches']} batch(es), "
+            f"{stats['failed_batches']} failed."
+        )
+
     output_path = TMP_DIR / "transactions_clean.json"
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(transactions, f, indent=2)
 
     log.info(f"Cleaned data saved to: {output_path}")
+
+    if args.space and args.client_id is not None:
+        n = store(transactions, args.space, args.client_id)
+        log.info(f"Stored {n} transactions for client {args.client_id} in space '{args.space}'.")
+
     summarise(transactions)
 
+    if ruleset is not None:
+        print("Rule hits:")
+        for r in ruleset.report():
+            print(f"  {r['hits']:>8}  {r['kind']:<7} {r['pattern']:<40} -> {r['category']}")
+        print(f"  {ruleset.misses:>8}  (no rule matched)")
+
 
 if __name__ == "__main__":
     main()
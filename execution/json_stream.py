@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — JSON Streaming Helpers
+==================================
+Helpers for sending large JSON payloads without building them in memory.
+
+  - stream_json(items, ...)  → Flask Response that emits a JSON array (or
+    NDJSON, one object per line) chunk by chunk as *items* is consumed.
+    Items may be dicts (encoded here) or strings that are already JSON,
+    e.g. rows rendered by SQLite's json_object().
+  - wants_ndjson(request)    → True if the client prefers application/x-ndjson
+  - FastJSONProvider         → Flask JSON provider that uses orjson when it is
+    installed (falls back to the standard library otherwise).
+
+Usage:
+    app.json = FastJSONProvider(app)
+    return stream_json(cm.iter_clients_json(space), ndjson=wants_ndjson(request))
+"""
+
+import json
+from typing import Iterable, Iterator
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:                      # optional dependency
+    orjson = None
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+JSON_MIMETYPE   = "application/json"
+
+CHUNK_SIZE = 64 * 1024                   # bytes buffered before each write
+
+
+def encode(obj) -> str:
+    """Compact JSON text for *obj* (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def wants_ndjson(req) -> bool:
+    """True if the request's Accept header prefers NDJSON over JSON."""
+    return req.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _chunks(items: Iterable, ndjson: bool, wrap: str | None, meta: dict | None) -> Iterator[bytes]:
+    buf  = []
+    size = 0
+    sep  = "\n" if ndjson else ","
+
+    if not ndjson:
+        if wrap:
+            fields = "".join(f"{encode(k)}:{encode(v)}," for k, v in (meta or {}).items())
+            buf.append(f'{{{fields}"{wrap}":[')
+        else:
+            buf.append("[")
+    first = True
+    for item in items:
+        text = item if isinstance(item, str) else encode(item)
+        if ndjson:
+            buf.append(text + sep)
+        else:
+            buf.append(text if first else sep + text)
+        first = False
+        size += len(text) + 1
+        if size >= CHUNK_SIZE:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if not ndjson:
+        buf.append("]}" if wrap else "]")
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def stream_json(items: Iterable, ndjson: bool = False, wrap: str | None = None,
+                meta: dict | None = None, status: int = 200) -> Response:
+    """
+    Stream *items* as a JSON array, or as NDJSON when *ndjson* is True.
+    With *wrap*, the JSON array is emitted as {**meta, "<wrap>": [...]}
+    (ignored for NDJSON, which is always one object per line).
+    """
+    return Response(
+        _chunks(items, ndjson, wrap, meta),
+        status=status,
+        mimetype=NDJSON_MIMETYPE if ndjson else JSON_MIMETYPE,
+    )
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider that encodes with orjson when it is installed."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs.get("indent"):
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj, **kwargs)
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — HTTP Load Test
+==========================
+Drives a running server.py with N concurrent virtual staff members and
+reports what one node sustains: throughput, p50/p95/p99 latency and error
+rate per endpoint.
+
+Commands:
+  seed — create SPACES spaces named <prefix>01, <prefix>02, ..., each with
+         STAFF logins and CLIENTS clients imported through the CSV import
+         API.  Client data looks Irish and passes validators.py: PPS numbers
+         with correct check letters, Eircodes, IE IBANs with matching BICs.
+         Re-running tops the spaces up (upsert on PPS number).
+  run  — VUSERS threads, each logged in as one staff member of one seeded
+         space, repeat a weighted mix of operations for DURATION seconds:
+
+           login    POST /api/login
+           list     GET  /api/clients?space=
+           search   GET  /api/clients/<id>           (look one client up)
+           edit     PUT  /api/clients/<id>
+           import   POST /api/clients/import.csv     (IMPORT_ROWS rows, upsert)
+           export   GET  /api/clients/export.<csv|xlsx|ndjson>
+           refund   POST /api/processes/refunds      (REFUND_BATCH clients)
+           stats    GET  /api/spaces/<name>/stats
+
+         Imports run as background jobs: "import" times the upload and
+         "import-job" the time until the job completed.
+
+Responses 429 and 503 (admission control, busy password pool) are counted
+as "rejected", not errors: they show where the node sheds load.
+
+Usage:
+    python execution/load_test.py seed --url http://127.0.0.1:5000 --spaces 5 --clients 2000
+    python execution/load_test.py run  --url http://127.0.0.1:5000 --vusers 50 --duration 60 \\
+        --mix login=2,list=10,search=40,edit=20,import=1,export=3,refund=2,stats=10 \\
+        [--think 0.5] [--json report.json]
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import string
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+DEFAULT_URL    = "http://127.0.0.1:5000"
+DEFAULT_PREFIX = "load-"
+DEFAULT_MIX    = "login=2,list=10,search=40,edit=20,import=1,export=3,refund=2,stats=10"
+PASSWORD       = "load-test-password"
+IMPORT_ROWS    = 200
+REFUND_BATCH   = 5
+SEED_CHUNK     = 5000                           # clients per seed import
+TIMEOUT        = 60                             # seconds per request
+
+REJECTED = (429, 503)
+
+
+# ── Irish test data ────────────────────────────────────────────────────────────
+
+FIRST_NAMES = [
+    "Aoife", "Ciara", "Niamh", "Saoirse", "Siobhán", "Róisín", "Orla", "Sinéad", "Áine", "Emma",
+    "Sarah", "Mary", "Caoimhe", "Grainne", "Clodagh", "Seán", "Conor", "Cian", "Darragh", "Oisín",
+    "Pádraig", "Eoin", "Ciarán", "Liam", "Jack", "James", "Michael", "Declan", "Fionn", "Ruairí",
+]
+LAST_NAMES = [
+    "Murphy", "Kelly", "O'Sullivan", "Walsh", "Smith", "O'Brien", "Byrne", "Ryan", "O'Connor",
+    "O'Neill", "O'Reilly", "Doyle", "McCarthy", "Gallagher", "O'Doherty", "Kennedy", "Lynch",
+    "Murray", "Quinn", "Moore", "McLoughlin", "Carroll", "Connolly", "Daly", "Connell", "Brennan",
+    "Fitzgerald", "Nolan", "Kavanagh", "Ní Bhriain",
+]
+STREETS = [
+    "Main Street", "Church Road", "Ashgrove Avenue", "Meadow Park", "Castle View", "Bridge Street",
+    "Oak Drive", "The Green", "Riverside Court", "Hillcrest", "Sea Road", "Abbey Lane",
+]
+# Eircode routing key, town, county
+PLACES = [
+    ("D02", "Dublin 2", "Dublin"), ("D04", "Dublin 4", "Dublin"), ("D08", "Dublin 8", "Dublin"),
+    ("D15", "Dublin 15", "Dublin"), ("D6W", "Dublin 6W", "Dublin"), ("A94", "Blackrock", "Dublin"),
+    ("A96", "Dún Laoghaire", "Dublin"), ("T12", "Cork", "Cork"), ("T23", "Cork", "Cork"),
+    ("P85", "Clonakilty", "Cork"), ("H91", "Galway", "Galway"), ("V94", "Limerick", "Limerick"),
+    ("X91", "Waterford", "Waterford"), ("R95", "Kilkenny", "Kilkenny"), ("W23", "Celbridge", "Kildare"),
+    ("F92", "Letterkenny", "Donegal"), ("N91", "Mullingar", "Westmeath"), ("Y35", "Wexford", "Wexford"),
+    ("K78", "Lucan", "Dublin"), ("V92", "Tralee", "Kerry"), ("A92", "Drogheda", "Louth"),
+]
+# IBAN bank code, BIC
+BANKS = [("AIBK", "AIBKIE2D"), ("BOFI", "BOFIIE2D"), ("IPBS", "IPBSIE2D"), ("ULSB", "ULSBIE2D")]
+CIVIL_STATUSES = ["Single", "Married", "Married", "Divorced", "Widowed", "Separated", "Civil Partnership"]
+
+_EIRCODE_CHARS = "0123456789ACDEFHKNPRTVWXY"
+
+
+def pps_number(n: int, second: str = "") -> str:
+    """PPS number for the 7-digit *n* with its mod-23 check letter."""
+    digits = f"{n % 10_000_000:07d}"
+    total = sum(int(d) * w for d, w in zip(digits, range(8, 1, -1)))
+    if second:
+        total += (0 if second == "W" else ord(second) - 64) * 9
+    return digits + ("W" if total % 23 == 0 else chr(64 + total % 23)) + second
+
+
+def iban(rng: random.Random, bank: str) -> str:
+    """IE IBAN: bank code, 6-digit sort code, 8-digit account, valid check digits."""
+    bban = bank + "".join(rng.choices(string.digits, k=14))
+    rearranged = "".join(str(int(ch, 36)) for ch in bban + "IE00")
+    return f"IE{98 - int(rearranged) % 97:02d}{bban}"
+
+
+def client_row(rng: random.Random, n: int) -> dict:
+    """One plausible client; *n* makes the PPS number and email unique."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    key, town, county = rng.choice(PLACES)
+    bank, bic = rng.choice(BANKS)
+    handle = "".join(c for c in f"{first}.{last}".lower() if c.isascii() and (c.isalnum() or c == "."))
+    return {
+        "name":             f"{first} {last}",
+        "civil_status":     rng.choice(CIVIL_STATUSES),
+        "pps_number":       pps_number(n, "A" if rng.random() < 0.2 else ""),
+        "date_of_birth":    f"{rng.randint(1940, 2004)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "revenue_password": "".join(rng.choices(string.ascii_letters + string.digits, k=10)),
+        "email":            f"{handle}{n}@example.ie",
+        "mobile":           f"08{rng.choice('35679')} {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "address_line1":    f"{rng.randint(1, 220)} {rng.choice(STREETS)}",
+        "city_county":      f"{town}, Co. {county}",
+        "eir_code":         f"{key} {''.join(rng.choices(_EIRCODE_CHARS, k=4))}",
+        "bank_holder_name": f"{first} {last}",
+        "bank_iban":        iban(rng, bank),
+        "bank_bic":         bic,
+    }
+
+
+def clients_csv(rows: list[dict]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(rows[0]), lineterminator="\r\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+# ── HTTP helpers ───────────────────────────────────────────────────────────────
+
+def _import(session: requests.Session, url: str, space: str, rows: list[dict]) -> requests.Response:
+    return session.post(
+        f"{url}/api/clients/import.csv",
+        params={"space": space, "mode": "upsert"},
+        files={"file": ("load-test.csv", clients_csv(rows), "text/csv")},
+        timeout=TIMEOUT,
+    )
+
+
+def _wait_for_job(session: requests.Session, url: str, job: dict, poll: float = 0.5) -> dict:
+    while job["status"] in ("queued", "running"):
+        time.sleep(poll)
+        job = session.get(f"{url}/api/clients/imports/{job['id']}", timeout=TIMEOUT).json()
+    return job
+
+
+def _space_names(url: str, prefix: str) -> list[str]:
+    spaces = requests.get(f"{url}/api/spaces", timeout=TIMEOUT).json()
+    return sorted(s["name"] for s in spaces if s["name"].startswith(prefix))
+
+
+# ── Seed ───────────────────────────────────────────────────────────────────────
+
+def seed(url: str, prefix: str, spaces: int, staff: int, clients: int, seed_value: int) -> None:
+    session = requests.Session()
+    existing = {s["name"]: s for s in session.get(f"{url}/api/spaces", timeout=TIMEOUT).json()}
+    used_codes = {s["code"] for s in existing.values()}
+    free_codes = (a + b for a in "QXZJKVWY" for b in string.ascii_uppercase if a + b not in used_codes)
+
+    for s in range(1, spaces + 1):
+        name = f"{prefix}{s:02d}"
+        if name not in existing:
+            r = session.post(f"{url}/api/spaces", json={"name": name, "code": next(free_codes)}, timeout=TIMEOUT)
+            if r.status_code != 201:
+                raise SystemExit(f"Could not create space {name}: {r.json().get('error')}")
+
+        for u in range(1, staff + 1):
+            r = session.post(f"{url}/api/users", json={
+                "space": name, "login": f"staff{u:02d}", "password": PASSWORD, "name": f"Staff {u:02d}",
+            }, timeout=TIMEOUT)
+            if r.status_code not in (201, 409):          # 409: already seeded
+                raise SystemExit(f"Could not create staff{u:02d} in {name}: {r.text}")
+
+        rng = random.Random(seed_value * 1000 + s)
+        t0 = time.perf_counter()
+        added = updated = 0
+        for start in range(0, clients, SEED_CHUNK):
+            rows = [client_row(rng, s * 1_000_000 + n) for n in range(start, min(clients, start + SEED_CHUNK))]
+            r = _import(session, url, name, rows)
+            if r.status_code != 202:
+                raise SystemExit(f"Import into {name} failed: {r.text}")
+            job = _wait_for_job(session, url, r.json())
+            if job["status"] != "completed":
+                raise SystemExit(f"Import into {name} {job['status']}: {job['message']}")
+            added, updated = added + job["added"], updated + job["updated"]
+        print(f"  {name}: {staff} staff, {added:,} clients added, {updated:,} updated "
+              f"({time.perf_counter() - t0:.1f} s)")
+
+
+# ── Run ────────────────────────────────────────────────────────────────────────
+
+class Recorder:
+    """Latencies and outcomes per operation, shared by all virtual users."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes  = defaultdict(lambda: {"ok": 0, "rejected": 0, "errors": 0})
+
+    def add(self, op: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self.latencies[op].append(seconds)
+            self.outcomes[op][outcome] += 1
+
+
+def _outcome(status: int) -> str:
+    if status < 400:
+        return "ok"
+    return "rejected" if status in REJECTED else "errors"
+
+
+class VirtualUser(threading.Thread):
+    """One staff member working in one space until the deadline."""
+
+    def __init__(self, n: int, url: str, space: str, login: str, ids: list[int],
+                 mix: dict, think: float, deadline: float, recorder: Recorder, seed_value: int):
+        super().__init__(name=f"vuser-{n}", daemon=True)
+        self.url, self.space, self.login, self.ids = url, space, login, ids
+        self.ops, self.weights = list(mix), list(mix.values())
+        self.think, self.deadline, self.recorder = think, deadline, recorder
+        self.rng = random.Random(seed_value * 100_000 + n)
+        self.session = requests.Session()
+        self.n = n
+        self.imports = 0
+
+    # Each operation returns the response; run() times it.
+    def op_login(self):
+        return self.session.post(f"{self.url}/api/login", json={
+            "space": self.space, "login": self.login, "password": PASSWORD}, timeout=TIMEOUT)
+
+    def op_list(self):
+        return self.session.get(f"{self.url}/api/clients", params={"space": self.space}, timeout=TIMEOUT)
+
+    def op_search(self):
+        cid = self.rng.choice(self.ids)
+        return self.session.get(f"{self.url}/api/clients/{cid}", params={"space": self.space}, timeout=TIMEOUT)
+
+    def op_edit(self):
+        cid = self.rng.choice(self.ids)
+        return self.session.put(f"{self.url}/api/clients/{cid}", json={
+            "space": self.space, "other_phone": f"01 {self.rng.randint(100, 999)} {self.rng.randint(1000, 9999)}",
+        }, timeout=TIMEOUT)
+
+    def op_import(self):
+        # New clients numbered after the seeded range, so they never clash with another user's
+        self.imports += 1
+        base = 9_000_000 + self.n * 10_000 + (self.imports * IMPORT_ROWS) % 10_000
+        rows = [client_row(self.rng, base + i) for i in range(IMPORT_ROWS)]
+        return _import(self.session, self.url, self.space, rows)
+
+    def op_export(self):
+        fmt = self.rng.choice(("csv", "csv", "xlsx", "ndjson"))
+        return self.session.get(f"{self.url}/api/clients/export.{fmt}", params={"space": self.space},
+                                timeout=TIMEOUT)
+
+    def op_refund(self):
+        return self.session.post(f"{self.url}/api/processes/refunds", json={
+            "space": self.space, "client_ids": self.rng.sample(self.ids, min(REFUND_BATCH, len(self.ids))),
+        }, timeout=TIMEOUT)
+
+    def op_stats(self):
+        return self.session.get(f"{self.url}/api/spaces/{self.space}/stats", timeout=TIMEOUT)
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            op = self.rng.choices(self.ops, self.weights)[0]
+            t0 = time.perf_counter()
+            try:
+                response = getattr(self, f"op_{op}")()
+                response.content                      # read the whole body
+                outcome = _outcome(response.status_code)
+            except requests.RequestException:
+                response, outcome = None, "errors"
+            self.recorder.add(op, time.perf_counter() - t0, outcome)
+
+            if op == "import" and outcome == "ok":
+                try:
+                    job = _wait_for_job(self.session, self.url, response.json())
+                    self.recorder.add("import-job", time.perf_counter() - t0,
+                                      "ok" if job["status"] == "completed" else "errors")
+                except requests.RequestException:
+                    self.recorder.add("import-job", time.perf_counter() - t0, "errors")
+            if self.think:
+                time.sleep(self.rng.expovariate(1 / self.think))
+
+
+def _parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        op = op.strip()
+        if not hasattr(VirtualUser, f"op_{op}"):
+            raise SystemExit(f"Unknown operation '{op}' in --mix.")
+        mix[op] = float(weight or 1)
+    return {op: w for op, w in mix.items() if w > 0}
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(url: str, prefix: str, vusers: int, staff: int, duration: float, mix: dict,
+        think: float, seed_value: int) -> dict:
+    spaces = _space_names(url, prefix)
+    if not spaces:
+        raise SystemExit(f"No spaces named {prefix}*. Run the 'seed' command first.")
+    ids = {}
+    for space in spaces:
+        clients = requests.get(f"{url}/api/clients", params={"space": space}, timeout=TIMEOUT).json()
+        ids[space] = [c["id"] for c in clients] or [0]
+
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    users = [
+        VirtualUser(n, url, spaces[n % len(spaces)], f"staff{(n // len(spaces)) % staff + 1:02d}",
+                    ids[spaces[n % len(spaces)]], mix, think, deadline, recorder, seed_value)
+        for n in range(vusers)
+    ]
+    print(f"{vusers} virtual users on {len(spaces)} space(s) for {duration:.0f} s ...")
+    t0 = time.perf_counter()
+    for u in users:
+        u.start()
+    for u in users:
+        u.join()
+    elapsed = time.perf_counter() - t0
+
+    report = {"url": url, "vusers": vusers, "spaces": len(spaces), "seconds": round(elapsed, 1),
+              "mix": mix, "operations": {}}
+    for op in sorted(recorder.latencies):
+        lat = recorder.latencies[op]
+        counts = recorder.outcomes[op]
+        report["operations"][op] = {
+            **counts,
+            "requests":   len(lat),
+            "per_second": round(len(lat) / elapsed, 2),
+            "error_rate": round(counts["errors"] / len(lat), 4),
+            "p50_ms":     round(_percentile(lat, 50) * 1000, 1),
+            "p95_ms":     round(_percentile(lat, 95) * 1000, 1),
+            "p99_ms":     round(_percentile(lat, 99) * 1000, 1),
+            "max_ms":     round(max(lat) * 1000, 1),
+        }
+    requests_total = sum(len(v) for op, v in recorder.latencies.items() if op != "import-job")
+    errors_total = sum(c["errors"] for op, c in recorder.outcomes.items() if op != "import-job")
+    report["total"] = {
+        "requests":   requests_total,
+        "per_second": round(requests_total / elapsed, 2),
+        "rejected":   sum(c["rejected"] for op, c in recorder.outcomes.items() if op != "import-job"),
+        "errors":     errors_total,
+        "error_rate": round(errors_total / requests_total, 4) if requests_total else 0,
+    }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'operation':<11} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'rejected':>9} {'errors':>7} {'err %':>6}")
+    for op, s in report["operations"].items():
+        print(f"{op:<11} {s['requests']:>9,} {s['per_second']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+              f"{s['p99_ms']:>8.1f} {s['max_ms']:>8.1f} {s['rejected']:>9,} {s['errors']:>7,} "
+              f"{s['error_rate'] * 100:>6.2f}")
+    t = report["total"]
+    print(f"\nTotal: {t['requests']:,} requests in {report['seconds']} s = {t['per_second']:.1f} req/s, "
+          f"{t['rejected']:,} rejected, {t['errors']:,} errors ({t['error_rate'] * 100:.2f} %)")
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--url",    default=DEFAULT_URL, help="server.py base URL")
+    common.add_argument("--prefix", default=DEFAULT_PREFIX, help="name prefix of the load-test spaces")
+    common.add_argument("--staff",  type=int, default=5, help="logins per space")
+    common.add_argument("--seed",   type=int, default=1, help="random seed (data and traffic)")
+
+    parser = argparse.ArgumentParser(description="FinFlowAI HTTP load test")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_seed = sub.add_parser("seed", parents=[common], help="Create spaces, staff logins and clients")
+    p_seed.add_argument("--spaces",  type=int, default=5)
+    p_seed.add_argument("--clients", type=int, default=1000, help="clients per space")
+
+    p_run = sub.add_parser("run", parents=[common], help="Replay a traffic mix and report latency per endpoint")
+    p_run.add_argument("--vusers",   type=int,   default=20, help="concurrent virtual users")
+    p_run.add_argument("--duration", type=float, default=30, help="seconds")
+    p_run.add_argument("--mix",      default=DEFAULT_MIX, help="op=weight,... (ops: login list search "
+                                                               "edit import export refund stats)")
+    p_run.add_argument("--think",    type=float, default=0.0, help="mean seconds between a user's requests")
+    p_run.add_argument("--json",     default=None, help="also write the report to this file")
+
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+
+    if args.command == "seed":
+        print(f"Seeding {args.spaces} space(s) at {url} ...")
+        seed(url, args.prefix, args.spaces, args.staff, args.clients, args.seed)
+
+    elif args.command == "run":
+        report = run(url, args.prefix, args.vusers, args.staff, args.duration,
+                     _parse_mix(args.mix), args.think, args.seed)
+        print_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
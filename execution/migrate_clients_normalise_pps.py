@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — DB Migration: store PPS numbers normalised.
+Rewrites clients.pps_number upper-case without spaces or hyphens (the form
+validators.py stores and import matching compares), so the unique index on
+(space, pps_number) agrees with the import's in-memory index.  Applied to
+the main database and to every existing per-space shard (.tmp/spaces/*.db).
+Refuses to touch a database (and lists the offenders) where two clients of
+a space would end up with the same PPS number.
+Safe to run multiple times (idempotent).
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+TMP_DIR = Path(__file__).resolve().parent.parent / ".tmp"
+DB_PATH = TMP_DIR / "finflowai.db"
+
+NORMALISED = ("UPPER(REPLACE(REPLACE(REPLACE(REPLACE(pps_number, ' ', ''), '-', ''), "
+              "char(9), ''), char(160), ''))")
+
+failed = False
+for path in [DB_PATH] + sorted((TMP_DIR / "spaces").glob("*.db")):
+    con = sqlite3.connect(path)
+    cur = con.cursor()
+
+    dupes = cur.execute(f"""
+        SELECT space, {NORMALISED} AS pps, COUNT(*), GROUP_CONCAT(id)
+        FROM clients
+        WHERE pps_number <> ''
+        GROUP BY space, pps
+        HAVING COUNT(*) > 1
+    """).fetchall()
+    if dupes:
+        print(f"{path.name}: cannot normalise — these clients would share a PPS number:")
+        for space, pps, n, ids in dupes:
+            print(f"  {space}  {pps}  x{n}  (client ids: {ids})")
+        con.close()
+        failed = True
+        continue
+
+    cur.execute(f"UPDATE clients SET pps_number = {NORMALISED} WHERE pps_number <> {NORMALISED}")
+    con.commit()
+    con.close()
+    print(f"{path.name}: {cur.rowcount} PPS number(s) normalised.")
+
+if failed:
+    print("Merge or fix these clients, then re-run the migration.")
+    sys.exit(1)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — DB Migration: unique PPS number per space.
+Creates a partial unique index on clients(space, pps_number), ignoring
+blank PPS numbers.  Refuses to run (and lists the offenders) if the table
+already contains duplicates.
+Safe to run multiple times (idempotent).
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+dupes = cur.execute("""
+    SELECT space, pps_number, COUNT(*), GROUP_CONCAT(id)
+    FROM clients
+    WHERE pps_number <> ''
+    GROUP BY space, pps_number
+    HAVING COUNT(*) > 1
+""").fetchall()
+
+if dupes:
+    print("Cannot create unique index — duplicate PPS numbers found:")
+    for space, pps, n, ids in dupes:
+        print(f"  {space}  {pps}  x{n}  (client ids: {ids})")
+    print("Merge or fix these clients, then re-run the migration.")
+    con.close()
+    sys.exit(1)
+
+cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_space_pps
+    ON clients (space, pps_number)
+    WHERE pps_number <> ''
+""")
+
+con.commit()
+con.close()
+print("Migration complete: unique index on clients(space, pps_number) ready.")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Migration: create the category_cache table (description → category results
+from the AI categoriser).
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS category_cache (
+        description_key TEXT PRIMARY KEY,
+        category        TEXT NOT NULL,
+        backend         TEXT NOT NULL DEFAULT '',
+        updated_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    )
+""")
+
+con.commit()
+con.close()
+print("category_cache table ready.")
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Migration: create the category_rules table (per-space merchant rules used by
+rules_categoriser.py).
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS category_rules (
+        id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        space      TEXT    NOT NULL,
+        kind       TEXT    NOT NULL CHECK (kind IN ('keyword', 'regex')),
+        pattern    TEXT    NOT NULL,
+        category   TEXT    NOT NULL,
+        priority   INTEGER NOT NULL DEFAULT 100,
+        created_at TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+        UNIQUE(space, kind, pattern)
+    )
+""")
+
+con.commit()
+con.close()
+print("category_rules table ready.")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Migration: create the client_changes log and the triggers that fill it.
+Every insert, update and delete on clients appends (seq, space, client_id, op);
+seq is AUTOINCREMENT, so it only ever grows.  client_changes_floor holds,
+per space, the highest seq that compaction has deleted a tombstone at
+(see client_manager.compact_changes).  Applied to the main database
+and to every existing per-space shard (.tmp/spaces/*.db).
+db.connect() applies the same SCHEMA (db.CHANGE_LOG_SCHEMA) to a database
+that has clients but no log, so the API works before this has run.
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+TMP_DIR = Path(__file__).resolve().parent.parent / ".tmp"
+DB_PATH = TMP_DIR / "finflowai.db"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS client_changes (
+        seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+        space      TEXT    NOT NULL,
+        client_id  INTEGER NOT NULL,
+        op         TEXT    NOT NULL,            -- 'upsert' | 'delete'
+        changed_at TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_client_changes_space_seq ON client_changes (space, seq);
+    CREATE TABLE IF NOT EXISTS client_changes_floor (
+        space TEXT    PRIMARY KEY,
+        seq   INTEGER NOT NULL
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_clients_changes_insert AFTER INSERT ON clients
+    BEGIN
+        INSERT INTO client_changes (space, client_id, op) VALUES (NEW.space, NEW.id, 'upsert');
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_clients_changes_update AFTER UPDATE ON clients
+    BEGIN
+        INSERT INTO client_changes (space, client_id, op) VALUES (NEW.space, NEW.id, 'upsert');
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_clients_changes_delete AFTER DELETE ON clients
+    BEGIN
+        INSERT INTO client_changes (space, client_id, op) VALUES (OLD.space, OLD.id, 'delete');
+    END;
+"""
+
+for path in [DB_PATH] + sorted((TMP_DIR / "spaces").glob("*.db")):
+    con = sqlite3.connect(path)
+    con.executescript(SCHEMA)
+    con.close()
+    print(f"client_changes log and triggers ready in {path.name}.")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Migration: create the import_jobs table (background CSV client imports,
+see import_jobs.py).  Lives in the main database next to refund_runs.
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS import_jobs (
+        id          TEXT    PRIMARY KEY,
+        space       TEXT    NOT NULL,
+        mode        TEXT    NOT NULL,
+        dry_run     INTEGER NOT NULL DEFAULT 0,
+        filename    TEXT    NOT NULL DEFAULT '',
+        status      TEXT    NOT NULL DEFAULT 'queued',
+        total       INTEGER,
+        done        INTEGER NOT NULL DEFAULT 0,
+        added       INTEGER NOT NULL DEFAULT 0,
+        updated     INTEGER NOT NULL DEFAULT 0,
+        skipped     INTEGER NOT NULL DEFAULT 0,
+        errors      INTEGER NOT NULL DEFAULT 0,
+        message     TEXT    NOT NULL DEFAULT '',
+        created_at  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+        updated_at  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    )
+""")
+cur.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_space ON import_jobs (space, created_at)")
+
+con.commit()
+con.close()
+print("import_jobs table ready.")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Migration: create the refund_runs and refund_run_items tables
+(checkpoints for resumable refund runs), and add refund_runs.kind
+('manual' for API runs, 'sweep' for refund_scheduler.py batches) to
+tables created before it existed.
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS refund_runs (
+        id          TEXT    PRIMARY KEY,
+        space       TEXT    NOT NULL,
+        status      TEXT    NOT NULL DEFAULT 'running',
+        kind        TEXT    NOT NULL DEFAULT 'manual',
+        total       INTEGER NOT NULL,
+        created_at  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+        updated_at  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    )
+""")
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS refund_run_items (
+        run_id     TEXT    NOT NULL,
+        position   INTEGER NOT NULL,
+        client_id  INTEGER NOT NULL,
+        status     TEXT,
+        result     TEXT,
+        attempts   INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT,
+        PRIMARY KEY (run_id, position)
+    )
+""")
+cols = {row[1] for row in cur.execute("PRAGMA table_info(refund_runs)")}
+if "kind" not in cols:
+    cur.execute("ALTER TABLE refund_runs ADD COLUMN kind TEXT NOT NULL DEFAULT 'manual'")
+cur.execute("CREATE INDEX IF NOT EXISTS idx_refund_runs_space ON refund_runs (space, created_at)")
+
+con.commit()
+con.close()
+print("refund_runs / refund_run_items tables ready (with kind column).")
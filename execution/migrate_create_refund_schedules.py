@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Migration: create refund_results (latest refund result per client) and
+refund_schedules (per-space background sweep settings).
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS refund_results (
+        space      TEXT    NOT NULL,
+        client_id  INTEGER NOT NULL,
+        status     TEXT    NOT NULL,
+        result     TEXT    NOT NULL,
+        checked_at TEXT    NOT NULL,
+        PRIMARY KEY (space, client_id)
+    )
+""")
+cur.execute("CREATE INDEX IF NOT EXISTS idx_refund_results_age ON refund_results (space, checked_at)")
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS refund_schedules (
+        space          TEXT    PRIMARY KEY,
+        cron           TEXT    NOT NULL DEFAULT '0 1 * * *',
+        per_minute     INTEGER NOT NULL DEFAULT 30,
+        window_minutes INTEGER NOT NULL DEFAULT 360,
+        enabled        INTEGER NOT NULL DEFAULT 1,
+        last_started   TEXT,
+        last_finished  TEXT,
+        last_checked   INTEGER NOT NULL DEFAULT 0
+    )
+""")
+
+con.commit()
+con.close()
+print("refund_results / refund_schedules tables ready.")
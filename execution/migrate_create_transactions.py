@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Migration: create the transactions table (per-client transaction store).
+Idempotent — safe to run multiple times.
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS transactions (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        space       TEXT    NOT NULL,
+        client_id   INTEGER NOT NULL,
+        date        TEXT    NOT NULL,
+        description TEXT    NOT NULL DEFAULT '',
+        amount      REAL    NOT NULL,
+        category    TEXT    NOT NULL DEFAULT 'Uncategorised',
+        type        TEXT    NOT NULL,
+        created_at  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+    )
+""")
+cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_transactions_space_client
+    ON transactions (space, client_id, date)
+""")
+
+con.commit()
+con.close()
+print("transactions table ready.")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — DB Migration: drop UNIQUE(space, login, password_hash) on users.
+Passwords are salted scrypt hashes, so two rows never share a hash and the
+constraint enforces nothing (uniqueness of (space, login, password) is
+checked by user_manager.add_user).  Rebuilds the table without it and adds
+a plain index on (space, login) for the login lookups the constraint's
+index used to serve.
+Safe to run multiple times (idempotent).
+"""
+import sqlite3
+from pathlib import Path
+
+DB_PATH = Path(__file__).resolve().parent.parent / ".tmp" / "finflowai.db"
+
+con = sqlite3.connect(DB_PATH)
+cur = con.cursor()
+
+sql = cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'users'").fetchone()[0]
+if "UNIQUE" in sql.upper():
+    cur.executescript("""
+        BEGIN;
+        CREATE TABLE users_new (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            space         TEXT    NOT NULL,
+            login         TEXT    NOT NULL,
+            password_hash TEXT    NOT NULL,
+            name          TEXT    NOT NULL DEFAULT "",
+            created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO users_new (id, space, login, password_hash, name, created_at)
+            SELECT id, space, login, password_hash, name, created_at FROM users;
+        DROP TABLE users;
+        ALTER TABLE users_new RENAME TO users;
+        COMMIT;
+    """)
+    print("Rebuilt users without UNIQUE(space, login, password_hash).")
+
+cur.execute("CREATE INDEX IF NOT EXISTS idx_users_space_login ON users (space, login)")
+con.commit()
+con.close()
+print("Migration complete: users indexed on (space, login).")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Password Hashing
+============================
+Salted scrypt hashes for user passwords, computed off the request threads.
+
+  - hash_password(password)   → new "scrypt$..." string for storage
+  - check(password, stored)   → True if *password* matches *stored*
+  - needs_upgrade(stored)     → True for legacy SHA-256 or older scrypt parameters
+
+Stored formats:
+  scrypt$<n>$<r>$<p>$<salt b64>$<hash b64>    current (16-byte random salt)
+  <64 hex chars>                              legacy SHA-256(password + APP_SECRET)
+
+scrypt is deliberately slow and memory-hard (~16 MB, tens of ms per call),
+so it runs in a process pool of KDF_WORKERS processes instead of the Flask
+thread that received the login; other requests keep being served during a
+login burst.  At most KDF_MAX_PENDING hashes may be queued or running; a
+caller that cannot get a slot within KDF_QUEUE_TIMEOUT seconds gets
+KDFBusy (→ 503) rather than waiting behind an unbounded queue, which keeps
+login latency bounded.  KDF_WORKERS=0 hashes inline (CLI scripts).
+
+Successful checks are remembered for LOGIN_CACHE_TTL seconds, keyed by an
+HMAC of (stored hash, password) under a per-process random key, so a user
+re-submitting the same login does not pay for the KDF again.  Because the
+stored hash is part of the key, a password change invalidates the entry.
+Failed checks are never cached.
+
+Legacy SHA-256 hashes are still accepted; user_manager rewrites them as
+scrypt after the first successful login.
+"""
+
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# ── Parameters ─────────────────────────────────────────────────────────────────
+SCRYPT_N     = 2 ** 14                   # CPU/memory cost: 128 * N * r bytes = 16 MB
+SCRYPT_R     = 8
+SCRYPT_P     = 1
+SALT_BYTES   = 16
+HASH_BYTES   = 32
+SCRYPT_MAXMEM = 64 * 1024 * 1024
+
+CACHE_SIZE   = 1024                      # remembered successful checks
+
+APP_SECRET = os.getenv("APP_SECRET", "finflowai-default-secret-change-in-production")
+
+
+class KDFBusy(Exception):
+    """The hashing pool is saturated; the caller should retry shortly."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# ── KDF (runs in the worker processes) ─────────────────────────────────────────
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=SCRYPT_MAXMEM, dklen=HASH_BYTES)
+
+
+def _legacy(password: str) -> str:
+    return hashlib.sha256(f"{password}{APP_SECRET}".encode("utf-8")).hexdigest()
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _parse(stored: str) -> tuple[int, int, int, bytes, bytes] | None:
+    """(n, r, p, salt, digest) of a scrypt string, or None if it is not one."""
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != "scrypt":
+        return None
+    try:
+        return (int(parts[1]), int(parts[2]), int(parts[3]),
+                base64.b64decode(parts[4]), base64.b64decode(parts[5]))
+    except ValueError:
+        return None
+
+
+# ── Pool ───────────────────────────────────────────────────────────────────────
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = None
+
+
+def _workers() -> int:
+    return max(0, _env_int("KDF_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def _get_pool() -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+    """Start the pool on first use.  'spawn' workers never inherit server threads or locks."""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            workers = _workers()
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            _slots = threading.BoundedSemaphore(max(workers, _env_int("KDF_MAX_PENDING", workers * 4)))
+        return _pool, _slots
+
+
+def _replace_broken(pool: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """Swap in a new pool if *pool* (which lost a worker) is still the current one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=_workers(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _run(fn, *args):
+    """
+    Run *fn* in the pool (or inline when KDF_WORKERS=0).  A pool broken by a
+    dead worker process is replaced and the call retried once.
+    """
+    if _workers() == 0:
+        return fn(*args)
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=_env_float("KDF_QUEUE_TIMEOUT", 2.0)):
+        raise KDFBusy("Password hashing is saturated. Please retry shortly.")
+    try:
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            return _replace_broken(pool).submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def warm() -> None:
+    """Start the worker processes now instead of on the first login."""
+    if _workers():
+        pool, _ = _get_pool()
+        for future in [pool.submit(int) for _ in range(_workers())]:
+            future.result()
+
+
+def shutdown() -> None:
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool, _slots = None, None
+
+
+# ── Verification cache ─────────────────────────────────────────────────────────
+
+_cache_key  = secrets.token_bytes(32)
+_cache      = OrderedDict()              # hmac digest -> expires_at (monotonic)
+_cache_lock = threading.Lock()
+
+
+def _cache_id(password: str, stored: str) -> bytes:
+    return hmac.new(_cache_key, f"{stored}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+
+def _cache_hit(key: bytes) -> bool:
+    now = time.monotonic()
+    with _cache_lock:
+        expires = _cache.get(key)
+        if expires is None:
+            return False
+        if expires < now:
+            del _cache[key]
+            return False
+        _cache.move_to_end(key)
+        return True
+
+
+def _cache_put(key: bytes, ttl: float) -> None:
+    with _cache_lock:
+        _cache[key] = time.monotonic() + ttl
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def hash_password(password: str) -> str:
+    """New salted scrypt string for *password*.  Raises KDFBusy."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = _run(_scrypt, password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def check(password: str, stored: str) -> bool:
+    """True if *password* matches the *stored* hash (either format).  Raises KDFBusy."""
+    ttl = _env_float("LOGIN_CACHE_TTL", 60)
+    key = _cache_id(password, stored) if ttl > 0 else None
+    if key is not None and _cache_hit(key):
+        return True
+
+    parsed = _parse(stored)
+    if parsed:
+        n, r, p, salt, digest = parsed
+        ok = hmac.compare_digest(_run(_scrypt, password, salt, n, r, p), digest)
+    else:
+        ok = hmac.compare_digest(_legacy(password), stored)
+
+    if ok and key is not None:
+        _cache_put(key, ttl)
+    return ok
+
+
+def needs_upgrade(stored: str) -> bool:
+    """True if *stored* is legacy SHA-256 or uses weaker scrypt parameters."""
+    parsed = _parse(stored)
+    return parsed is None or parsed[:3] != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Refund Backends
+===========================
+Pluggable backends that perform the Revenue refund check for one client.
+refund_processor calls get_backend().check(client, settings) from several
+threads at once, so every backend must be thread-safe.
+
+Backends:
+  - StubBackend        — returns 'pending' (the original placeholder)
+  - HttpRevenueBackend — JSON over HTTP with a pooled keep-alive
+                         requests.Session, jittered retries and a circuit
+                         breaker
+
+The HTTP contract (implemented by fake_revenue_server.py for tests):
+    POST {REVENUE_API_URL}/refunds/check
+    Body: { "pps_number": "...", "tain": "...", "ros_id": "..." }
+    200 → { "status": "success" | "no_data", "message": "...", "detail": {...} }
+    4xx → client-specific error (not retried)
+    5xx / 429 / connection error → transient (retried)
+
+Configuration (.env):
+    REFUND_BACKEND=stub | http
+    REVENUE_API_URL=http://127.0.0.1:8765
+    REVENUE_TIMEOUT=10          seconds per request
+    REVENUE_RETRIES=3           attempts per client
+    REFUND_CONCURRENCY=8        parallel checks per space
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import tracing
+
+DEFAULT_CONCURRENCY = 8
+
+
+# ── Errors ─────────────────────────────────────────────────────────────────────
+
+class TransientError(Exception):
+    """Failure worth retrying (timeouts, 5xx, 429)."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the service while the circuit breaker is open."""
+
+
+# ── Circuit breaker ────────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """
+    closed    → calls go through; `threshold` consecutive failures open it.
+    open      → calls fail immediately for `reset_after` seconds.
+    half-open → one trial call; success closes, failure re-opens.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold   = threshold
+        self.reset_after = reset_after
+        self._lock       = threading.Lock()
+        self._failures   = 0
+        self._opened_at  = None
+        self._trial      = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_after or self._trial:
+                raise CircuitOpenError("Revenue service unavailable (circuit open).")
+            self._trial = True                       # let exactly one call probe
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures  = 0
+            self._opened_at = None
+            self._trial     = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+
+class StubBackend:
+    """Placeholder used until a real Revenue endpoint is configured."""
+    name = "stub"
+
+    def check(self, client: dict, settings: dict) -> dict:
+        return {
+            "status":  "pending",
+            "message": "Refund check not yet implemented. Logic will be wired up in the next phase.",
+            "detail":  {},
+        }
+
+
+class HttpRevenueBackend:
+    """Refund checks against an HTTP Revenue service, sharing one pooled Session."""
+    name = "http"
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        pool_size: int = DEFAULT_CONCURRENCY,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout  = timeout
+        self.retries  = max(1, retries)
+        self.backoff  = backoff
+        self.breaker  = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, payload: dict) -> dict:
+        try:
+            resp = self.session.post(
+                f"{self.base_url}/refunds/check", json=payload, timeout=self.timeout
+            )
+        except requests.RequestException as exc:    # connection, timeout, broken chunked body...
+            raise TransientError(str(exc))
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise TransientError(f"Revenue service returned HTTP {resp.status_code}.")
+        if resp.status_code >= 400:
+            try:
+                body = resp.json()
+                message = (body.get("message") if isinstance(body, dict) else None) or resp.text
+            except ValueError:
+                message = resp.text
+            return {"status": "error", "message": message or f"HTTP {resp.status_code}", "detail": {}}
+        try:
+            data = resp.json()
+        except ValueError:
+            raise TransientError("Revenue service returned a response that is not JSON.")
+        if not isinstance(data, dict):
+            raise TransientError("Revenue service returned an unexpected response.")
+        return {
+            "status":  data.get("status", "error"),
+            "message": data.get("message", ""),
+            "detail":  data.get("detail", {}) or {},
+        }
+
+    def check(self, client: dict, settings: dict) -> dict:
+        if not (client.get("pps_number") or "").strip():
+            return {"status": "no_data", "message": "Client has no PPS number.", "detail": {}}
+
+        payload = {
+            "pps_number": client["pps_number"].strip(),
+            "tain":       settings.get("tain", ""),
+            "ros_id":     settings.get("ros_id", ""),
+        }
+        for attempt in range(1, self.retries + 1):
+            self.breaker.before_call()
+            try:
+                with tracing.span("backend.attempt", attempt=attempt):
+                    outcome = self._post(payload)
+            except TransientError:
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                # Full jitter: sleep uniformly in [0, backoff * 2^(attempt-1)]
+                with tracing.span("backend.backoff", attempt=attempt):
+                    time.sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+                continue
+            except BaseException:
+                # Any other way out must still end a half-open trial, or the
+                # breaker would refuse every later call
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            outcome.setdefault("detail", {})["attempts"] = attempt
+            return outcome
+        raise TransientError("Retries exhausted.")
+
+
+# ── Factory ────────────────────────────────────────────────────────────────────
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def concurrency() -> int:
+    """Parallel refund checks allowed per space (REFUND_CONCURRENCY)."""
+    try:
+        return max(1, int(os.getenv("REFUND_CONCURRENCY", DEFAULT_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_CONCURRENCY
+
+
+def get_backend():
+    """Process-wide backend selected by REFUND_BACKEND (created on first use)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            kind = os.getenv("REFUND_BACKEND", "stub").strip().lower()
+            if kind == "http":
+                _backend = HttpRevenueBackend(
+                    os.getenv("REVENUE_API_URL", "http://127.0.0.1:8765"),
+                    timeout=float(os.getenv("REVENUE_TIMEOUT", "10")),
+                    retries=int(os.getenv("REVENUE_RETRIES", "3")),
+                    pool_size=concurrency(),
+                )
+            else:
+                _backend = StubBackend()
+        return _backend
+
+
+def set_backend(backend) -> None:
+    """Replace the process-wide backend (tests, benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -5,10 +5,61 @@ FinFlowAI — Refund Processor
 Standalone module for the Refunds Check process.
 
 Architecture:
-  - run_refunds(client_ids, space) → generator that yields one result dict per client
+  - iter_refunds(client_ids, space) → generator that yields one result dict per client
+  - run_refunds(client_ids, space)  → the same results collected into a list
   - Each result has a fixed schema so the API and UI can depend on it
-  - The actual refund-check logic lives in _check_single_client() — to be implemented
-    in the next phase. Right now it returns a 'pending' status as a placeholder.
+  - The actual refund check is done by the backend from refund_backend.get_backend()
+    (REFUND_BACKEND=stub|http).  The stub returns a 'pending' status.
+  - Clients are checked concurrently: at most REFUND_CONCURRENCY backend calls
+    are in flight per space, across all runs.  Results are still yielded in
+    the order of client_ids.
+
+Checkpointed runs (used by the API):
+  - start_run(client_ids, space, kind) → run_id   (rows in refund_runs / refund_run_items;
+                                   kind is 'manual' for API runs, 'sweep' for
+                                   refund_scheduler.py batches)
+  - iter_run(run_id)             → yields results like iter_refunds(), writing each
+                                   client's result to refund_run_items as soon as it
+                                   completes (one commit per client)
+  - Calling iter_run() again on the same id (resume) replays stored results and
+    only re-checks clients with no result yet or whose result was an error.
+    A crash or deploy therefore never repeats a successful backend call.
+  - A run executes in one place at a time: iter_run() first claims it by
+    moving refund_runs.status from 'pending' / 'interrupted' / 'completed'
+    to 'running' in a single UPDATE, and raises RunBusy when that changes no
+    row.  claim_run() does the same eagerly (the API calls it before
+    streaming so it can answer 409).  A running run refreshes its
+    updated_at every HEARTBEAT_INTERVAL seconds; one silent for
+    RUN_STALE_AFTER seconds (its process died) may be claimed again.
+  - Progress is pushed to the space's open pages as throttled "refund"
+    events (events.py).
+  - prune_runs() deletes finished runs (header, items and trace files) once
+    they are older than their kind's retention: REFUND_RUN_RETENTION_DAYS
+    for manual runs (default 90), REFUND_SWEEP_RETENTION_DAYS for sweep
+    batches (default 2) — a nightly sweep records one run per batch.
+  - With DB_LAYOUT=sharded the run header (refund_runs) lives in the catalog
+    and its items in the space's own database, so checkpoints of one space
+    never wait on another (see db.py).
+
+Tracing (tracing.py):
+  - Every checkpointed run records spans per client — queue (waiting for a
+    worker), slot_wait (the per-space backend cap), backend (with
+    backend.attempt / backend.backoff per retry from refund_backend) and
+    checkpoint — plus fetch_clients and settings for the run.
+  - When the run ends, .tmp/traces/refund-<run_id>.trace.json (Chrome
+    trace-event format) and .summary.json (phase breakdown and slowest
+    clients) are written.  A resumed run replaces them.
+  - Sweep batches are not traced unless REFUND_TRACE_SWEEPS=true; their
+    traces are then named sweep-<run_id>, a retention group of their own,
+    so a night of batches cannot evict the traces of interactive runs.
+  - REFUND_TRACE=false turns this off; REFUND_TRACE_DETAIL=true also puts
+    each client's {phase: ms} in its result's detail["timings"].
+  - run_refunds() / iter_refunds() take an optional tracing.Trace.
+
+Results store:
+  - Every checkpointed result also replaces the client's row in refund_results,
+    so latest_results(space) answers "what did Revenue last say" without a
+    backend call (filled by interactive runs and refund_scheduler.py sweeps).
 
 Return schema per client:
   {
@@ -23,55 +74,113 @@ Return schema per client:
   }
 """
 
+import json
+import os
 import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH  = BASE_DIR / ".tmp" / "finflowai.db"
+import db
+import events
+import refund_backend as rb
+import space_settings_manager as ssm
+import tracing
+
+_SQL_CHUNK = 900                        # stay below SQLite's host-parameter limit
+PROGRESS_INTERVAL = 0.5                 # seconds between "refund" progress events per run
+HEARTBEAT_INTERVAL = 30                 # seconds between updated_at refreshes of a running run
+RUN_STALE_AFTER    = 300                # seconds without a heartbeat before a 'running' run is dead
+CLAIMABLE = ("pending", "interrupted", "completed")
+RUN_KINDS = ("manual", "sweep")
+
+
+class RunBusy(Exception):
+    """The refund run is already being executed (claimed) elsewhere."""
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def _get_connection() -> sqlite3.Connection:
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+def _get_connection(space: str | None = None) -> sqlite3.Connection:
+    """The space's database for clients, run items and results; the catalog
+    (space=None) for run headers."""
+    return db.connect(space)
 
 
 def _utc_now() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
-def _fetch_client(client_id: int, space: str) -> dict | None:
-    """Return a client dict or None if not found in the space."""
-    con = _get_connection()
+def _fetch_clients(client_ids: list[int], space: str) -> dict[int, dict]:
+    """Return {id: client dict} for the ids that exist in the space (one query per 900 ids)."""
+    found = {}
+    ids = list(dict.fromkeys(client_ids))
+    con = _get_connection(space)
     try:
         cur = con.cursor()
-        cur.execute(
-            "SELECT * FROM clients WHERE id = ? AND space = ?",
-            (client_id, space.strip().lower()),
-        )
-        row = cur.fetchone()
-        return dict(row) if row else None
+        for i in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[i:i + _SQL_CHUNK]
+            cur.execute(
+                f"SELECT * FROM clients WHERE space = ? AND id IN ({', '.join('?' * len(chunk))})",
+                [space.strip().lower()] + chunk,
+            )
+            found.update((r["id"], dict(r)) for r in cur.fetchall())
+        return found
     finally:
         con.close()
 
 
-# ── Core refund logic (STUB — to be implemented) ───────────────────────────────
+_space_slots = {}                       # space -> BoundedSemaphore
+_space_slots_lock = threading.Lock()
 
-def _check_single_client(client: dict) -> dict:
-    """
-    Perform the refund check for one client.
 
-    THIS IS A STUB. Implementation will be added in the next phase.
-    When implemented, this function should:
-      - Log into Revenue Online (or query the appropriate API/source)
-      - Check refund status for the client's PPS number
-      - Return the structured result below
+def trace_enabled() -> bool:
+    """Trace checkpointed runs (REFUND_TRACE, default on)."""
+    return os.getenv("REFUND_TRACE", "true").strip().lower() in ("1", "true", "yes")
+
+
+def trace_sweeps() -> bool:
+    """Also trace scheduled sweep batches (REFUND_TRACE_SWEEPS, default off)."""
+    return os.getenv("REFUND_TRACE_SWEEPS", "false").strip().lower() in ("1", "true", "yes")
+
+
+def _trace_name(run_id: str, kind: str) -> str:
+    """Trace file name of a run; each prefix is its own tracing retention group."""
+    return f"{'sweep' if kind == 'sweep' else 'refund'}-{run_id}"
+
+
+def trace_detail() -> bool:
+    """Add per-client phase timings to result details (REFUND_TRACE_DETAIL)."""
+    return os.getenv("REFUND_TRACE_DETAIL", "false").strip().lower() in ("1", "true", "yes")
+
+
+def run_retention_days(kind: str) -> float:
+    """Days a finished run of *kind* is kept (REFUND_RUN_RETENTION_DAYS /
+    REFUND_SWEEP_RETENTION_DAYS)."""
+    if kind == "sweep":
+        return float(os.getenv("REFUND_SWEEP_RETENTION_DAYS", "2"))
+    return float(os.getenv("REFUND_RUN_RETENTION_DAYS", "90"))
+
+
+def _slots(space: str) -> threading.BoundedSemaphore:
+    """Per-space cap on in-flight backend calls, shared by every run."""
+    with _space_slots_lock:
+        if space not in _space_slots:
+            _space_slots[space] = threading.BoundedSemaphore(rb.concurrency())
+        return _space_slots[space]
+
+
+# ── Core refund logic ──────────────────────────────────────────────────────────
+
+def _check_single_client(client: dict, settings: dict) -> dict:
+    """
+    Perform the refund check for one client via the configured backend.
 
     Args:
-        client: Full client record dict from the database.
+        client:   Full client record dict from the database.
+        settings: The space's settings (TAIN, ROS ID).
 
     Returns:
         {
@@ -80,70 +189,431 @@ def _check_single_client(client: dict) -> dict:
             "detail":  dict,   # e.g. {"refund_amount": "€1,234.00", "tax_year": 2023}
         }
     """
-    # ------------------------------------------------------------------ STUB --
+    return rb.get_backend().check(client, settings)
+
+
+def _result(cid: int, client: dict | None, status: str, message: str,
+            detail: dict, ran_at: str) -> dict:
+    client = client or {}
     return {
-        "status":  "pending",
-        "message": "Refund check not yet implemented. Logic will be wired up in the next phase.",
-        "detail":  {},
+        "client_id":      cid,
+        "finflow_number": client.get("finflow_number", "—"),
+        "name":           client.get("name", f"(ID {cid})"),
+        "pps_number":     client.get("pps_number", "—"),
+        "status":         status,
+        "message":        message,
+        "detail":         detail,
+        "ran_at":         ran_at,
     }
-    # ------------------------------------------------------------------ /STUB -
+
+
+def _run_one(cid: int, client: dict | None, space: str, settings: dict,
+             trace: tracing.Trace | None = None, submitted: float | None = None,
+             timings: bool = False) -> dict:
+    """
+    Check one client.  With a *trace*, the wait since *submitted* (when the
+    work was queued) and each phase are recorded as spans, and *timings*
+    adds the client's {phase: ms} to the result's detail.
+    """
+    if trace is not None and submitted is not None:
+        trace.add("queue", submitted, time.perf_counter(), cid)
+    ran_at = _utc_now()
+    if client is None:
+        return _result(cid, None, "error", f"Client ID {cid} not found in space '{space}'.", {}, ran_at)
+    with tracing.activate(trace, cid):
+        try:
+            slots = _slots(space)
+            with tracing.span("slot_wait"):
+                slots.acquire()
+            try:
+                with tracing.span("backend"):
+                    outcome = _check_single_client(client, settings)
+            finally:
+                slots.release()
+            result = _result(cid, client, outcome["status"], outcome["message"],
+                             outcome.get("detail", {}), ran_at)
+        except rb.CircuitOpenError as exc:
+            result = _result(cid, client, "error", str(exc), {}, ran_at)
+        except Exception as exc:
+            result = _result(cid, client, "error", f"Unexpected error: {exc}", {}, ran_at)
+    if trace is not None and timings:
+        result["detail"] = {**result["detail"], "timings": trace.client_phases(cid)}
+    return result
 
 
 # ── Public API ─────────────────────────────────────────────────────────────────
 
-def run_refunds(client_ids: list[int], space: str) -> list[dict]:
+def run_refunds(client_ids: list[int], space: str, trace: tracing.Trace | None = None) -> list[dict]:
     """
-    Run the refund check for a list of client IDs, sequentially one by one.
+    Run the refund check for a list of client IDs.
 
     Args:
         client_ids:  Ordered list of client IDs to process.
         space:       Space name (e.g. 'ge-souza-tax').
+        trace:       Optional tracing.Trace to record phase spans into.
 
     Returns:
         List of result dicts, one per client ID, in the same order as client_ids.
         Clients not found in the space are recorded with status='error'.
     """
-    results = []
-
-    for cid in client_ids:
-        ran_at = _utc_now()
-        client = _fetch_client(cid, space)
-
-        if client is None:
-            results.append({
-                "client_id":      cid,
-                "finflow_number": "—",
-                "name":           f"(ID {cid})",
-                "pps_number":     "—",
-                "status":         "error",
-                "message":        f"Client ID {cid} not found in space '{space}'.",
-                "detail":         {},
-                "ran_at":         ran_at,
-            })
-            continue
+    return list(iter_refunds(client_ids, space, trace))
+
+
+def iter_refunds(client_ids: list[int], space: str, trace: tracing.Trace | None = None):
+    """
+    Generator form of run_refunds(): checks clients concurrently (bounded per
+    space) and yields each result in client_ids order as soon as it and all
+    earlier ones are ready, so callers can stream results during the run.
+    """
+    with tracing.activate(trace):
+        with tracing.span("fetch_clients", clients=len(client_ids)):
+            clients = _fetch_clients(client_ids, space)
+        with tracing.span("settings"):
+            settings = ssm.get_settings(space)
+    yield from _check_clients(client_ids, clients, space, settings, trace)
+
 
+def _check_clients(client_ids: list[int], clients: dict[int, dict], space: str, settings: dict,
+                   trace: tracing.Trace | None = None):
+    """Thread-pool core of iter_refunds(), also used by bench_refunds.py."""
+    with ThreadPoolExecutor(max_workers=rb.concurrency()) as pool:
+        futures = [
+            pool.submit(_run_one, cid, clients.get(cid), space, settings, trace, time.perf_counter())
+            for cid in client_ids
+        ]
         try:
-            outcome = _check_single_client(client)
-            results.append({
-                "client_id":      client["id"],
-                "finflow_number": client.get("finflow_number", "—"),
-                "name":           client.get("name", "—"),
-                "pps_number":     client.get("pps_number", "—"),
-                "status":         outcome["status"],
-                "message":        outcome["message"],
-                "detail":         outcome.get("detail", {}),
-                "ran_at":         ran_at,
-            })
-        except Exception as exc:
-            results.append({
-                "client_id":      client["id"],
-                "finflow_number": client.get("finflow_number", "—"),
-                "name":           client.get("name", "—"),
-                "pps_number":     client.get("pps_number", "—"),
-                "status":         "error",
-                "message":        f"Unexpected error: {exc}",
-                "detail":         {},
-                "ran_at":         ran_at,
+            for fut in futures:
+                yield fut.result()
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+
+# ── Checkpointed runs ──────────────────────────────────────────────────────────
+
+def _checkpoint(run_id: str, space: str, position: int, result: dict, store_latest: bool) -> None:
+    payload = json.dumps(result)
+    con = _get_connection(space)
+    try:
+        con.execute(
+            """UPDATE refund_run_items
+               SET status = ?, result = ?, attempts = attempts + 1, updated_at = ?
+               WHERE run_id = ? AND position = ?""",
+            (result["status"], payload, _utc_now(), run_id, position),
+        )
+        if store_latest:
+            con.execute(
+                """INSERT OR REPLACE INTO refund_results (space, client_id, status, result, checked_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (space, result["client_id"], result["status"], payload, result["ran_at"]),
+            )
+        con.commit()
+    finally:
+        con.close()
+
+
+def _set_run_status(run_id: str, status: str) -> None:
+    con = _get_connection()
+    try:
+        con.execute(
+            "UPDATE refund_runs SET status = ?, updated_at = ? WHERE id = ?",
+            (status, _utc_now(), run_id),
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def start_run(client_ids: list[int], space: str, kind: str = "manual") -> str:
+    """Record a new run of *kind* (RUN_KINDS) and its client list. Returns the run id."""
+    if kind not in RUN_KINDS:
+        raise ValueError(f"Unknown refund run kind '{kind}'.")
+    run_id = uuid.uuid4().hex
+    space  = space.strip().lower()
+    # Items first: a header without items would look like an empty, finished run
+    con = _get_connection(space)
+    try:
+        con.executemany(
+            "INSERT INTO refund_run_items (run_id, position, client_id) VALUES (?, ?, ?)",
+            [(run_id, pos, cid) for pos, cid in enumerate(client_ids)],
+        )
+        con.commit()
+    finally:
+        con.close()
+    con = _get_connection()
+    try:
+        con.execute(
+            "INSERT INTO refund_runs (id, space, kind, total, status) VALUES (?, ?, ?, ?, 'pending')",
+            (run_id, space, kind, len(client_ids)),
+        )
+        con.commit()
+        return run_id
+    finally:
+        con.close()
+
+
+def get_run(run_id: str, with_results: bool = True) -> dict | None:
+    """
+    Return the run record with progress counts (and stored results), or None.
+        { id, space, status, total, done, errors, pending, created_at, updated_at,
+          results: [...] }
+    """
+    con = _get_connection()
+    try:
+        row = con.execute("SELECT * FROM refund_runs WHERE id = ?", (run_id,)).fetchone()
+    finally:
+        con.close()
+    if row is None:
+        return None
+    run = dict(row)
+    con = _get_connection(run["space"])
+    try:
+        items = con.execute(
+            "SELECT status, result, updated_at FROM refund_run_items WHERE run_id = ? ORDER BY position",
+            (run_id,),
+        ).fetchall()
+        run["updated_at"] = max([run["updated_at"]] + [i["updated_at"] for i in items if i["updated_at"]])
+        run["done"]    = sum(1 for i in items if i["status"] and i["status"] != "error")
+        run["errors"]  = sum(1 for i in items if i["status"] == "error")
+        run["pending"] = sum(1 for i in items if i["status"] is None)
+        if with_results:
+            run["results"] = [json.loads(i["result"]) for i in items if i["result"]]
+        return run
+    finally:
+        con.close()
+
+
+def list_runs(space: str, limit: int = 20) -> list[dict]:
+    """Most recent runs for *space* (without results)."""
+    con = _get_connection()
+    try:
+        ids = [r[0] for r in con.execute(
+            "SELECT id FROM refund_runs WHERE space = ? ORDER BY created_at DESC LIMIT ?",
+            (space.strip().lower(), limit),
+        ).fetchall()]
+    finally:
+        con.close()
+    return [get_run(i, with_results=False) for i in ids]
+
+
+def prune_runs() -> int:
+    """
+    Delete finished runs older than their kind's retention (run_retention_days):
+    items first, then headers, then trace files.  Pending and running runs are
+    kept whatever their age.  Returns the number of runs deleted.
+    """
+    con = _get_connection()
+    try:
+        old = []
+        for kind in RUN_KINDS:
+            cutoff = datetime.fromtimestamp(time.time() - run_retention_days(kind) * 86400, timezone.utc)
+            old += con.execute(
+                "SELECT id, space FROM refund_runs WHERE kind = ? AND updated_at < ? "
+                "AND status NOT IN ('pending', 'running')",
+                (kind, cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")),
+            ).fetchall()
+    finally:
+        con.close()
+
+    by_space = {}
+    for run_id, space in old:
+        by_space.setdefault(space, []).append(run_id)
+    for space, ids in by_space.items():
+        if not db.path_for(space).exists():     # never-provisioned shard: no items
+            continue
+        con = _get_connection(space)
+        try:
+            for i in range(0, len(ids), _SQL_CHUNK):
+                chunk = ids[i:i + _SQL_CHUNK]
+                con.execute(f"DELETE FROM refund_run_items WHERE run_id IN ({', '.join('?' * len(chunk))})", chunk)
+            con.commit()
+        finally:
+            con.close()
+
+    ids = [run_id for run_id, _ in old]
+    con = _get_connection()
+    try:
+        for i in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[i:i + _SQL_CHUNK]
+            con.execute(f"DELETE FROM refund_runs WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+        con.commit()
+    finally:
+        con.close()
+    for run_id in ids:
+        for kind in RUN_KINDS:
+            tracing.trace_path(_trace_name(run_id, kind)).unlink(missing_ok=True)
+            tracing.summary_path(_trace_name(run_id, kind)).unlink(missing_ok=True)
+    return len(ids)
+
+
+def claim_run(run_id: str) -> bool:
+    """
+    Mark the run 'running' unless it already is (and is not stale).  Atomic,
+    so of several callers racing for the same run exactly one gets True.
+    """
+    cutoff = datetime.fromtimestamp(time.time() - RUN_STALE_AFTER, timezone.utc)
+    cutoff = cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+    con = _get_connection()
+    try:
+        cur = con.execute(
+            f"""UPDATE refund_runs SET status = 'running', updated_at = ?
+                WHERE id = ? AND (status IN ({", ".join("?" * len(CLAIMABLE))})
+                                  OR (status = 'running' AND updated_at < ?))""",
+            (_utc_now(), run_id, *CLAIMABLE, cutoff),
+        )
+        con.commit()
+        return cur.rowcount == 1
+    finally:
+        con.close()
+
+
+def iter_run(run_id: str, claimed: bool = False):
+    """
+    Execute (or resume) a checkpointed run, yielding one result per client in
+    the run's original order.  Clients that already have a non-error result
+    are yielded from the checkpoint without calling the backend again.
+    Claims the run first unless *claimed* (the caller already did, via
+    claim_run()); raises RunBusy if it is running elsewhere.
+    """
+    con = _get_connection()
+    try:
+        run = con.execute("SELECT * FROM refund_runs WHERE id = ?", (run_id,)).fetchone()
+    finally:
+        con.close()
+    if run is None:
+        raise ValueError(f"No refund run with id '{run_id}'.")
+    if not claimed and not claim_run(run_id):
+        raise RunBusy(f"Refund run '{run_id}' is already running.")
+    con = _get_connection(run["space"])
+    try:
+        items = [dict(r) for r in con.execute(
+            "SELECT position, client_id, status, result FROM refund_run_items "
+            "WHERE run_id = ? ORDER BY position",
+            (run_id,),
+        ).fetchall()]
+    finally:
+        con.close()
+
+    space = run["space"]
+    todo  = [i for i in items if i["status"] is None or i["status"] == "error"]
+
+    trace = None
+    if trace_enabled() and (run["kind"] != "sweep" or trace_sweeps()):
+        trace = tracing.Trace(_trace_name(run_id, run["kind"]), run_id=run_id, space=space,
+                              total=len(items), checked=len(todo))
+    timings = trace_detail()
+    with tracing.activate(trace):
+        with tracing.span("fetch_clients", clients=len(todo)):
+            clients = _fetch_clients([i["client_id"] for i in todo], space)
+        with tracing.span("settings"):
+            settings = ssm.get_settings(space)
+
+    def work(item, submitted):
+        cid = item["client_id"]
+        result = _run_one(cid, clients.get(cid), space, settings, trace, submitted, timings)
+        with tracing.activate(trace, cid), tracing.span("checkpoint"):
+            _checkpoint(run_id, space, item["position"], result, cid in clients)
+        return result
+
+    def wait(fut):
+        nonlocal beat
+        while True:
+            try:
+                return fut.result(timeout=HEARTBEAT_INTERVAL)
+            except TimeoutError:
+                pass
+            finally:
+                if time.monotonic() - beat >= HEARTBEAT_INTERVAL:
+                    beat = time.monotonic()
+                    _set_run_status(run_id, "running")
+
+    def progress(status, done, force=False):
+        nonlocal published
+        now = time.monotonic()
+        if force or now - published >= PROGRESS_INTERVAL:
+            published = now
+            events.publish(space, "refund", {
+                "run_id": run_id, "status": status, "done": done, "total": len(items),
             })
 
-    return results
+    finished, done, published, beat = False, 0, 0.0, time.monotonic()
+    progress("running", 0, force=True)
+    with ThreadPoolExecutor(max_workers=rb.concurrency()) as pool:
+        futures = {i["position"]: pool.submit(work, i, time.perf_counter()) for i in todo}
+        try:
+            for item in items:
+                fut = futures.get(item["position"])
+                yield wait(fut) if fut else json.loads(item["result"])
+                done += 1
+                progress("running", done)
+            finished = True
+        finally:
+            for fut in futures.values():
+                fut.cancel()
+            status = "completed" if finished else "interrupted"
+            _set_run_status(run_id, status)
+            progress(status, done, force=True)
+            if trace is not None:
+                trace.close()
+                trace.meta["status"] = status
+                try:
+                    tracing.save(trace)
+                except OSError:                  # a trace is never worth failing the run
+                    pass
+
+
+def run_timings(run_id: str) -> dict | None:
+    """Phase breakdown and slowest clients of the run's last execution, or None."""
+    for kind in RUN_KINDS:
+        summary = tracing.load_summary(_trace_name(run_id, kind))
+        if summary is not None:
+            return summary
+    return None
+
+
+def run_trace_path(run_id: str):
+    """Chrome trace-event file of the run's last execution (may not exist)."""
+    paths = [tracing.trace_path(_trace_name(run_id, kind)) for kind in RUN_KINDS]
+    return next((p for p in paths if p.exists()), paths[0])
+
+
+def latest_results(space: str, client_ids: list[int] | None = None) -> list[dict]:
+    """
+    Most recent stored result per client of *space* (from refund_results),
+    optionally limited to *client_ids*.  Never calls the backend.
+    """
+    space = space.strip().lower()
+    con = _get_connection(space)
+    try:
+        rows = con.execute(
+            "SELECT client_id, result FROM refund_results WHERE space = ? ORDER BY client_id",
+            (space,),
+        ).fetchall()
+    finally:
+        con.close()
+    wanted = set(client_ids) if client_ids is not None else None
+    return [json.loads(r["result"]) for r in rows if wanted is None or r["client_id"] in wanted]
+
+
+def resume_interrupted_runs() -> list[str]:
+    """
+    Finish every run left 'interrupted' or 'running' (e.g. by a restart).
+    Runs another process is still executing (fresh heartbeat) are skipped.
+    Blocking; intended for a background thread at startup or the CLI.
+    Returns the ids that were resumed.
+    """
+    con = _get_connection()
+    try:
+        ids = [r[0] for r in con.execute(
+            "SELECT id FROM refund_runs WHERE status IN ('running', 'interrupted') ORDER BY created_at"
+        ).fetchall()]
+    finally:
+        con.close()
+    resumed = []
+    for run_id in ids:
+        if not claim_run(run_id):
+            continue
+        for _ in iter_run(run_id, claimed=True):
+            pass
+        resumed.append(run_id)
+    return resumed
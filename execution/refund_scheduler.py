@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Refund Sweep Scheduler
+==================================
+Background refund checks for every client of a space, so daytime pages can
+read refund_results instead of calling Revenue.
+
+Each space may have one row in refund_schedules:
+  cron           — 5-field cron expression (minute hour day month weekday),
+                   supporting *, lists, ranges and steps, e.g. "0 1 * * *".
+                   Weekday 0 and 7 are Sunday; as in cron, when both day
+                   and weekday are restricted either one matching is enough
+  per_minute     — throughput budget: at most this many clients per minute
+  window_minutes — the sweep stops when this window closes, even if unfinished
+  enabled        — 0 / 1
+
+A sweep orders the space's clients by the age of their latest stored result
+(never-checked first, then oldest) and processes them as checkpointed runs
+(refund_processor.start_run / iter_run) of `per_minute` clients, starting at
+most one batch per minute.  The next sweep picks up where the window cut
+this one off, because the unfinished clients are now the oldest.
+Batches are recorded with kind 'sweep', and every sweep ends by pruning
+finished runs past their retention (refund_processor.prune_runs), so the
+run tables stay bounded however many batches a night takes.
+
+CLI Usage:
+    python execution/refund_scheduler.py set     --space acme --cron "0 1 * * *" --per-minute 30 --window 360
+    python execution/refund_scheduler.py list
+    python execution/refund_scheduler.py disable --space acme
+    python execution/refund_scheduler.py run-now --space acme
+    python execution/refund_scheduler.py serve              # scheduler loop in the foreground
+
+The Flask server starts the same loop in a daemon thread when
+REFUND_SCHEDULER=true.
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import db
+import refund_processor as rp
+
+TICK_SECONDS = 20
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _get_connection(space: str | None = None) -> sqlite3.Connection:
+    """Schedules live in the catalog; clients and results in the space's database."""
+    return db.connect(space)
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ── Cron ───────────────────────────────────────────────────────────────────────
+
+_CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _cron_field(expr: str, lo: int, hi: int) -> set[int]:
+    values = set()
+    for part in expr.split(","):
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            step = int(step_s)
+            if step < 1:
+                raise ValueError("step must be >= 1")
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if start < lo or end > hi or start > end:
+            raise ValueError(f"{part} is outside {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(cron: str) -> list[set[int]]:
+    """Parse "m h dom mon dow" into five sets. Raises ValueError if invalid."""
+    fields = cron.split()
+    if len(fields) != 5:
+        raise ValueError("Cron expression must have 5 fields: minute hour day month weekday.")
+    try:
+        sets = [_cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, _CRON_RANGES)]
+    except ValueError as e:
+        raise ValueError(f"Invalid cron expression '{cron}': {e}")
+    if 7 in sets[4]:
+        sets[4] = (sets[4] - {7}) | {0}
+    return sets
+
+
+def cron_matches(cron: str, when: datetime) -> bool:
+    """True if *when* (to the minute) matches *cron*.  Weekday 0 (or 7) = Sunday."""
+    minute, hour, dom, month, dow = parse_cron(cron)
+    day_ok, weekday_ok = when.day in dom, (when.isoweekday() % 7) in dow
+    _, _, dom_expr, _, dow_expr = cron.split()
+    if dom_expr.startswith("*") or dow_expr.startswith("*"):
+        day_matches = day_ok and weekday_ok
+    else:
+        day_matches = day_ok or weekday_ok           # both restricted: cron ORs them
+    return when.minute in minute and when.hour in hour and when.month in month and day_matches
+
+
+# ── Schedules ──────────────────────────────────────────────────────────────────
+
+def set_schedule(space: str, cron: str, per_minute: int, window_minutes: int) -> dict:
+    """Create or replace the schedule for *space*. Raises ValueError on bad input."""
+    space = space.strip().lower()
+    if not space:
+        raise ValueError("space is required.")
+    parse_cron(cron)
+    if per_minute < 1 or window_minutes < 1:
+        raise ValueError("per_minute and window_minutes must be at least 1.")
+    con = _get_connection()
+    try:
+        con.execute(
+            """INSERT INTO refund_schedules (space, cron, per_minute, window_minutes, enabled)
+               VALUES (?, ?, ?, ?, 1)
+               ON CONFLICT(space) DO UPDATE SET
+                   cron = excluded.cron, per_minute = excluded.per_minute,
+                   window_minutes = excluded.window_minutes, enabled = 1""",
+            (space, cron.strip(), per_minute, window_minutes),
+        )
+        con.commit()
+        return dict(con.execute("SELECT * FROM refund_schedules WHERE space = ?", (space,)).fetchone())
+    finally:
+        con.close()
+
+
+def disable_schedule(space: str) -> bool:
+    con = _get_connection()
+    try:
+        cur = con.execute(
+            "UPDATE refund_schedules SET enabled = 0 WHERE space = ?", (space.strip().lower(),)
+        )
+        con.commit()
+        return cur.rowcount > 0
+    finally:
+        con.close()
+
+
+def list_schedules() -> list[dict]:
+    con = _get_connection()
+    try:
+        return [dict(r) for r in con.execute("SELECT * FROM refund_schedules ORDER BY space")]
+    finally:
+        con.close()
+
+
+def _mark(space: str, **fields) -> None:
+    con = _get_connection()
+    try:
+        con.execute(
+            f"UPDATE refund_schedules SET {', '.join(f + ' = ?' for f in fields)} WHERE space = ?",
+            list(fields.values()) + [space],
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+# ── Sweeps ─────────────────────────────────────────────────────────────────────
+
+def _clients_by_staleness(space: str) -> list[int]:
+    """Client ids of *space*: never checked first, then oldest result first."""
+    con = _get_connection(space)
+    try:
+        return [r[0] for r in con.execute(
+            """SELECT c.id FROM clients c
+               LEFT JOIN refund_results r ON r.space = c.space AND r.client_id = c.id
+               WHERE c.space = ?
+               ORDER BY r.checked_at IS NOT NULL, r.checked_at, c.id""",
+            (space,),
+        ).fetchall()]
+    finally:
+        con.close()
+
+
+def sweep(space: str, per_minute: int, window_minutes: int, stop: threading.Event | None = None) -> int:
+    """
+    Check the space's clients, stalest first, at most *per_minute* per minute,
+    until all are done or *window_minutes* have passed.  Returns clients checked.
+    """
+    stop     = stop or threading.Event()
+    deadline = time.monotonic() + window_minutes * 60
+    queue    = _clients_by_staleness(space)
+    checked  = 0
+
+    _mark(space, last_started=_utc_now())
+    try:
+        while queue and time.monotonic() < deadline and not stop.is_set():
+            started = time.monotonic()
+            batch, queue = queue[:per_minute], queue[per_minute:]
+            for _ in rp.iter_run(rp.start_run(batch, space, kind="sweep")):
+                checked += 1
+            # Pace: next batch no sooner than one minute after this one started
+            stop.wait(max(0.0, 60 - (time.monotonic() - started)) if queue else 0)
+        rp.prune_runs()
+    finally:
+        _mark(space, last_finished=_utc_now(), last_checked=checked)
+    return checked
+
+
+def _sweep_logged(space: str, per_minute: int, window_minutes: int, stop: threading.Event) -> None:
+    """sweep() for a scheduler thread: a failure is logged, not raised."""
+    try:
+        sweep(space, per_minute, window_minutes, stop)
+    except Exception as e:
+        print(f"Refund sweep of '{space}' failed: {e!r}", file=sys.stderr)
+
+
+class Scheduler:
+    """Polls refund_schedules and starts due sweeps, at most one per space at a time."""
+
+    def __init__(self):
+        self._stop    = threading.Event()
+        self._running = {}               # space -> Thread
+        self._fired   = {}               # space -> minute already fired ("YYYY-mm-ddTHH:MM")
+
+    def tick(self, now: datetime | None = None) -> list[str]:
+        """Start every due sweep. Returns the spaces started."""
+        now    = now or datetime.now(timezone.utc)
+        minute = now.strftime("%Y-%m-%dT%H:%M")
+        started = []
+        for s in list_schedules():
+            space = s["space"]
+            if not s["enabled"] or self._fired.get(space) == minute:
+                continue
+            if space in self._running and self._running[space].is_alive():
+                continue
+            try:
+                due = cron_matches(s["cron"], now)
+            except ValueError:
+                continue
+            if due:
+                self._fired[space] = minute
+                t = threading.Thread(
+                    target=_sweep_logged,
+                    args=(space, s["per_minute"], s["window_minutes"], self._stop),
+                    name=f"refund-sweep-{space}",
+                    daemon=True,
+                )
+                self._running[space] = t
+                t.start()
+                started.append(space)
+        return started
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:                   # keep polling whatever went wrong
+                print(f"Refund scheduler: {e}", file=sys.stderr)
+            self._stop.wait(TICK_SECONDS)
+
+    def start(self) -> "Scheduler":
+        threading.Thread(target=self.run_forever, name="refund-scheduler", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI Refund Sweep Scheduler")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_set = sub.add_parser("set", help="Create or update a space's schedule")
+    p_set.add_argument("--space",      required=True)
+    p_set.add_argument("--cron",       default="0 1 * * *")
+    p_set.add_argument("--per-minute", type=int, default=30)
+    p_set.add_argument("--window",     type=int, default=360, help="Minutes")
+
+    sub.add_parser("list", help="List schedules")
+
+    p_dis = sub.add_parser("disable", help="Disable a space's schedule")
+    p_dis.add_argument("--space", required=True)
+
+    p_run = sub.add_parser("run-now", help="Sweep a space immediately using its schedule's budget")
+    p_run.add_argument("--space", required=True)
+
+    sub.add_parser("serve", help="Run the scheduler loop in the foreground")
+
+    args = parser.parse_args()
+
+    if args.command == "set":
+        try:
+            s = set_schedule(args.space, args.cron, args.per_minute, args.window)
+            print(f"Scheduled: {s['space']}  '{s['cron']}'  {s['per_minute']}/min  window {s['window_minutes']} min")
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+
+    elif args.command == "list":
+        rows = list_schedules()
+        if not rows:
+            print("No schedules.")
+        for s in rows:
+            print(f"{s['space']:<24} {s['cron']:<16} {s['per_minute']:>4}/min  {s['window_minutes']:>4} min  "
+                  f"{'on ' if s['enabled'] else 'off'}  last: {s['last_started'] or '—'} "
+                  f"({s['last_checked']} checked)")
+
+    elif args.command == "disable":
+        print("Disabled." if disable_schedule(args.space) else f"No schedule for '{args.space}'.")
+
+    elif args.command == "run-now":
+        s = next((x for x in list_schedules() if x["space"] == args.space.strip().lower()), None)
+        per_minute, window = (s["per_minute"], s["window_minutes"]) if s else (30, 360)
+        print(f"Checked {sweep(args.space.strip().lower(), per_minute, window)} client(s).")
+
+    elif args.command == "serve":
+        print("Refund scheduler running. Ctrl+C to stop.")
+        try:
+            Scheduler().run_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
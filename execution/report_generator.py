@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Report Generator
+============================
+Renders per-client financial summaries (PDF or PNG) from the transactions
+table, with a content-addressed on-disk cache.
+
+Architecture:
+  - Every report is keyed by a SHA-256 of its inputs: the client fields shown
+    on the report, the client's transactions, the output format and
+    RENDER_VERSION.  The file is stored at .tmp/reports/cache/<ab>/<hash>.<fmt>.
+  - If that file already exists the client is not re-rendered.
+  - run_space_reports() loads the whole space in two queries, hashes every
+    client in the parent process and only sends the changed ones to a
+    process pool.  Workers render with matplotlib's Agg backend.
+
+Bump RENDER_VERSION whenever the report layout changes so that every cached
+report is invalidated.
+
+Cache files not used for REPORT_CACHE_DAYS (default 40, so last month's
+reports survive until the next month-end run) are deleted by prune_cache(),
+which runs at most once per PRUNE_INTERVAL after a render; a cache hit
+refreshes the file's mtime.
+
+Usage:
+    python execution/report_generator.py --space ge-souza-tax [--format pdf] [--workers 4]
+    python execution/report_generator.py --space ge-souza-tax --client-id 12 --format png
+    python execution/report_generator.py --prune
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import db
+
+BASE_DIR  = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE_DIR / ".tmp" / "reports" / "cache"
+
+RENDER_VERSION = 1
+FORMATS        = ("pdf", "png")
+_SQL_CHUNK     = 900                 # stay below SQLite's host-parameter limit
+PRUNE_INTERVAL = 3600                # seconds between automatic cache prunes per process
+
+_last_prune = 0.0
+
+# Client fields printed on the report (and therefore part of the cache key)
+REPORT_FIELDS = ["id", "space", "name", "pps_number"]
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _get_connection(space: str) -> sqlite3.Connection:
+    return db.connect(space)
+
+
+def _validate_format(fmt: str) -> str:
+    fmt = (fmt or "").strip().lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported report format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    return fmt
+
+
+def _load_space(space: str, client_ids: list[int] | None = None) -> tuple[list[dict], dict]:
+    """
+    Return (clients, transactions_by_client_id) for *space*, or for only the
+    *client_ids* in it (filtered in SQL, so one client never scans the space).
+    Two queries regardless of the number of clients (per 900 ids when filtered).
+    """
+    con = _get_connection(space)
+    try:
+        cur = con.cursor()
+        cols = ", ".join(REPORT_FIELDS)
+        if client_ids is None:
+            chunks = [None]
+        else:
+            ids    = list(dict.fromkeys(client_ids))
+            chunks = [ids[i:i + _SQL_CHUNK] for i in range(0, len(ids), _SQL_CHUNK)]
+
+        clients, txns = [], defaultdict(list)
+        for chunk in chunks:
+            marks = "" if chunk is None else f"IN ({', '.join('?' * len(chunk))})"
+            params = [space] + (chunk or [])
+            cur.execute(
+                f"SELECT {cols} FROM clients WHERE space = ? {'AND id ' + marks if marks else ''} ORDER BY id",
+                params,
+            )
+            clients += [dict(r) for r in cur.fetchall()]
+            cur.execute(
+                f"""SELECT client_id, date, description, amount, category, type
+                    FROM transactions WHERE space = ? {'AND client_id ' + marks if marks else ''}
+                    ORDER BY client_id, date, id""",
+                params,
+            )
+            for r in cur.fetchall():
+                txns[r[0]].append((r[1], r[2], r[3], r[4], r[5]))
+        clients.sort(key=lambda c: c["id"])
+        return clients, txns
+    finally:
+        con.close()
+
+
+def input_digest(client: dict, transactions: list[tuple], fmt: str) -> str:
+    """Content hash of everything that affects the rendered output."""
+    h = hashlib.sha256()
+    h.update(f"v{RENDER_VERSION}|{fmt}|".encode("utf-8"))
+    h.update(json.dumps([client.get(f, "") for f in REPORT_FIELDS]).encode("utf-8"))
+    h.update(json.dumps(transactions, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
+
+
+def cache_path(digest: str, fmt: str) -> Path:
+    return CACHE_DIR / digest[:2] / f"{digest}.{fmt}"
+
+
+def _cache_hit(path: Path) -> bool:
+    """True if *path* is cached; marks it used so prune_cache() keeps it."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def cache_days() -> float:
+    """Days an unused cached report is kept (REPORT_CACHE_DAYS)."""
+    return float(os.getenv("REPORT_CACHE_DAYS", "40"))
+
+
+def prune_cache(days: float | None = None) -> int:
+    """Delete cached reports not used for *days* (default cache_days()). Returns files removed."""
+    cutoff  = time.time() - (cache_days() if days is None else days) * 86400
+    removed = 0
+    for path in CACHE_DIR.glob("*/*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:           # pruned or replaced concurrently
+            pass
+    return removed
+
+
+def _maybe_prune() -> None:
+    """prune_cache() if this process has not in the last PRUNE_INTERVAL seconds."""
+    global _last_prune
+    now = time.monotonic()
+    if _last_prune and now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    try:
+        prune_cache()
+    except OSError:                         # pruning is never worth failing a report
+        pass
+
+
+# ── Rendering (runs inside worker processes) ───────────────────────────────────
+
+def _summarise(transactions: list[tuple]) -> dict:
+    income   = sum(t[2] for t in transactions if t[4] == "income")
+    expenses = sum(abs(t[2]) for t in transactions if t[4] == "expense")
+
+    monthly = defaultdict(lambda: [0.0, 0.0])       # "YYYY-MM" -> [income, expenses]
+    by_cat  = defaultdict(float)
+    for date, _desc, amount, category, kind in transactions:
+        month = date[:7]
+        if kind == "income":
+            monthly[month][0] += amount
+        else:
+            monthly[month][1] += abs(amount)
+            by_cat[category] += abs(amount)
+
+    return {
+        "income":   income,
+        "expenses": expenses,
+        "net":      income - expenses,
+        "monthly":  dict(sorted(monthly.items())),
+        "by_cat":   sorted(by_cat.items(), key=lambda kv: kv[1], reverse=True)[:8],
+    }
+
+
+def _render(client: dict, transactions: list[tuple], fmt: str, out_path: str) -> str:
+    """Render one report to *out_path* (written atomically). Returns the path."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    s   = _summarise(transactions)
+    fig = Figure(figsize=(8.27, 11.69))              # A4 portrait
+    fig.suptitle(f"Financial Summary — {client.get('name', '')}", fontsize=14, fontweight="bold")
+    fig.text(
+        0.08, 0.92,
+        f"PPS: {client.get('pps_number') or '—'}    "
+        f"Income: €{s['income']:,.2f}    Expenses: €{s['expenses']:,.2f}    "
+        f"Net: €{s['net']:,.2f}    Transactions: {len(transactions)}",
+        fontsize=9,
+    )
+
+    ax1 = fig.add_axes([0.1, 0.55, 0.85, 0.32])
+    months = list(s["monthly"].keys())
+    if months:
+        x = range(len(months))
+        ax1.bar([i - 0.2 for i in x], [v[0] for v in s["monthly"].values()], width=0.4, label="Income")
+        ax1.bar([i + 0.2 for i in x], [v[1] for v in s["monthly"].values()], width=0.4, label="Expenses")
+        ax1.set_xticks(list(x))
+        ax1.set_xticklabels(months, rotation=45, ha="right", fontsize=8)
+        ax1.legend(fontsize=8)
+    ax1.set_title("Monthly cash flow", fontsize=11)
+
+    ax2 = fig.add_axes([0.3, 0.08, 0.65, 0.36])
+    if s["by_cat"]:
+        cats = [c for c, _ in s["by_cat"]][::-1]
+        vals = [v for _, v in s["by_cat"]][::-1]
+        ax2.barh(cats, vals)
+        ax2.tick_params(labelsize=8)
+    ax2.set_title("Top expense categories", fontsize=11)
+
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    fig.savefig(tmp, format=fmt, dpi=100)
+    os.replace(tmp, out)
+    return str(out)
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def render_client_report(client_id: int, space: str, fmt: str = "pdf") -> Path | None:
+    """
+    Return the path of the report for one client, rendering it only if the
+    cached copy is missing.  Returns None if the client is not in *space*.
+    """
+    fmt   = _validate_format(fmt)
+    space = space.strip().lower()
+    clients, txns = _load_space(space, [client_id])
+    if not clients:
+        return None
+
+    client = clients[0]
+    rows   = txns.get(client["id"], [])
+    path   = cache_path(input_digest(client, rows, fmt), fmt)
+    if not _cache_hit(path):
+        _render(client, rows, fmt, str(path))
+        _maybe_prune()
+    return path
+
+
+def run_space_reports(space: str, fmt: str = "pdf", workers: int | None = None) -> dict:
+    """
+    Month-end run: make sure every client in *space* has an up-to-date report.
+
+    Clients whose inputs hash to an existing cache file are skipped; the rest
+    are rendered in parallel across *workers* processes (default: CPU count).
+
+    Returns:
+        {
+          "space": str, "format": str,
+          "rendered": int, "cached": int, "failed": int,
+          "reports": [ {"client_id", "name", "status", "path" | "error"}, ... ],
+        }
+    """
+    fmt   = _validate_format(fmt)
+    space = space.strip().lower()
+    clients, txns = _load_space(space)
+
+    reports = []
+    pending = []
+    for c in clients:
+        rows = txns.get(c["id"], [])
+        path = cache_path(input_digest(c, rows, fmt), fmt)
+        if _cache_hit(path):
+            reports.append({"client_id": c["id"], "name": c["name"], "status": "cached", "path": str(path)})
+        else:
+            pending.append((c, rows, path))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_render, c, rows, fmt, str(path)): c
+                for c, rows, path in pending
+            }
+            for fut in as_completed(futures):
+                c = futures[fut]
+                try:
+                    reports.append({"client_id": c["id"], "name": c["name"],
+                                    "status": "rendered", "path": fut.result()})
+                except Exception as exc:
+                    reports.append({"client_id": c["id"], "name": c["name"],
+                                    "status": "error", "error": str(exc)})
+
+    reports.sort(key=lambda r: r["client_id"])
+    _maybe_prune()
+    return {
+        "space":    space,
+        "format":   fmt,
+        "rendered": sum(r["status"] == "rendered" for r in reports),
+        "cached":   sum(r["status"] == "cached" for r in reports),
+        "failed":   sum(r["status"] == "error" for r in reports),
+        "reports":  reports,
+    }
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI Report Generator")
+    parser.add_argument("--space",     default=None, help="Required unless --prune")
+    parser.add_argument("--format",    default="pdf", choices=FORMATS)
+    parser.add_argument("--client-id", type=int, default=None, help="Render a single client")
+    parser.add_argument("--workers",   type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--prune",     action="store_true",
+                        help="Delete cached reports unused for REPORT_CACHE_DAYS and exit")
+    args = parser.parse_args()
+
+    if args.prune:
+        print(f"Removed {prune_cache()} cached report(s).")
+        return
+    if not args.space:
+        parser.error("--space is required")
+
+    if args.client_id is not None:
+        path = render_client_report(args.client_id, args.space, args.format)
+        print(path if path else f"No client with id={args.client_id} in space '{args.space}'.")
+        return
+
+    summary = run_space_reports(args.space, args.format, args.workers)
+    print(f"Space '{summary['space']}': {summary['rendered']} rendered, "
+          f"{summary['cached']} cached, {summary['failed']} failed.")
+    for r in summary["reports"]:
+        if r["status"] == "error":
+            print(f"  client {r['client_id']}: {r['error']}")
+
+
+if __name__ == "__main__":
+    main()
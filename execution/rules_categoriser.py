@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Rule-based Merchant Categoriser
+===========================================
+Classifies transaction descriptions with per-space rules stored in the
+`category_rules` table, before anything is sent to the AI categoriser.
+
+Rules:
+  - keyword : plain text, matched as a whole word/phrase, case-insensitive
+              e.g.  TESCO → Groceries,  CIRCLE K → Fuel
+  - regex   : Python regular expression, matched against the normalised
+              (upper-case, single-spaced) description
+
+Matching:
+  The matching rule with the lowest priority wins (lower runs first; ties
+  go to the older rule), whether it is a keyword or a regex.
+  All keywords are compiled into ONE regex shaped as a character trie (a
+  miss costs one step per character, not one per keyword) and the regex
+  rules into a second one (one named group per rule, in priority order),
+  so each description is scanned at most twice no matter how many rules
+  exist.  Both are scanned at every position, so a high-priority hit is
+  found even when a lower-priority one starts further left.  Regex rules
+  that cannot share a pattern (inline global flags such as `(?i)`, or their
+  own groups and backreferences) are compiled and searched on their own.
+  Descriptions are normalised once and each distinct description is
+  classified once per run.
+
+CLI Usage:
+    python execution/rules_categoriser.py add    --space acme --pattern TESCO --category Groceries
+    python execution/rules_categoriser.py add    --space acme --pattern "^POS \\d+ SPAR" --category Groceries --regex
+    python execution/rules_categoriser.py list   --space acme
+    python execution/rules_categoriser.py delete --space acme --id 3
+    python execution/rules_categoriser.py test   --space acme --description "Tesco Store 12"
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from collections import Counter
+
+import db
+from ai_categoriser import UNCATEGORISED, normalise_description
+
+KINDS = ("keyword", "regex")
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def get_connection(space: str) -> sqlite3.Connection:
+    return db.connect(space)
+
+
+def _validate_rule(kind: str, pattern: str, category: str) -> tuple[str, str, str]:
+    kind     = (kind or "").strip().lower()
+    pattern  = (pattern or "").strip()
+    category = (category or "").strip()
+    if kind not in KINDS:
+        raise ValueError(f"Rule kind must be one of: {', '.join(KINDS)}.")
+    if not pattern or not category:
+        raise ValueError("Both 'pattern' and 'category' are required.")
+    if kind == "keyword":
+        pattern = normalise_description(pattern)
+    else:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid regex '{pattern}': {e}")
+    return kind, pattern, category
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """
+    Build a regex equivalent to `A|B|C...` but factored as a character trie,
+    e.g. ["TESCO", "TESLA"] -> "TES(?:CO|LA)".  Longer words are preferred
+    at the same position.
+    """
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        ends  = "" in node
+        alts  = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if ends else body
+
+    return build(trie)
+
+
+# ── Compiled rule set ──────────────────────────────────────────────────────────
+
+class RuleSet:
+    """All rules of one space compiled into two multi-pattern matchers."""
+
+    def __init__(self, rules: list[dict]):
+        rules = sorted(rules, key=lambda r: (r["priority"], r["id"]))
+
+        self._keyword_category = {}
+        for r in rules:
+            if r["kind"] == "keyword":
+                self._keyword_category.setdefault(normalise_description(r["pattern"]), r)
+        # Lookahead: one (longest) hit at every position, overlapping ones included
+        self._keywords = (
+            re.compile(r"(?<![A-Z0-9])(?=(" + _trie_pattern(list(self._keyword_category)) + r")(?![A-Z0-9]))")
+            if self._keyword_category else None
+        )
+
+        self._regex_rules = {f"r{r['id']}": r for r in rules if r["kind"] == "regex"}
+        combined, self._separate = {}, []
+        for g, r in self._regex_rules.items():
+            compiled = re.compile(r["pattern"])
+            if compiled.groups or compiled.flags != re.UNICODE:
+                self._separate.append((compiled, r))     # would break (or leak into) the others
+            else:
+                combined[g] = r
+        # At each position the first group that matches is the best rule starting there
+        self._regex = (
+            re.compile("(?=" + "|".join(f"(?P<{g}>{r['pattern']})" for g, r in combined.items()) + ")")
+            if combined else None
+        )
+
+        self.rule_count = len(self._keyword_category) + len(self._regex_rules)
+        self.hits   = Counter()               # rule id -> matched rows
+        self.misses = 0
+
+    def _match(self, key: str) -> dict | None:
+        hits = []
+        if self._keywords:
+            for m in self._keywords.finditer(key):
+                longest = m.group(1)
+                # Shorter keywords starting here end at a word boundary inside it
+                hits.extend(
+                    self._keyword_category[longest[:i]]
+                    for i in range(1, len(longest))
+                    if not longest[i].isalnum() and longest[:i] in self._keyword_category
+                )
+                hits.append(self._keyword_category[longest])
+        if self._regex:
+            hits.extend(self._regex_rules[m.lastgroup] for m in self._regex.finditer(key))
+        hits.extend(r for compiled, r in self._separate if compiled.search(key))
+        return min(hits, key=lambda r: (r["priority"], r["id"]), default=None)
+
+    def classify_many(self, descriptions: list[str]) -> list[str | None]:
+        """
+        Return one category (or None) per description and update hit stats.
+        Each distinct raw description is normalised and matched only once.
+        """
+        memo = {}
+        out  = []
+        for d in descriptions:
+            rule = memo.get(d, False)
+            if rule is False:
+                rule = memo[d] = self._match(normalise_description(d))
+            if rule is None:
+                self.misses += 1
+                out.append(None)
+            else:
+                self.hits[rule["id"]] += 1
+                out.append(rule["category"])
+        return out
+
+    def report(self) -> list[dict]:
+        """Per-rule hit counts, busiest first (rules with no hits included)."""
+        rules = list(self._keyword_category.values()) + list(self._regex_rules.values())
+        return sorted(
+            ({"id": r["id"], "kind": r["kind"], "pattern": r["pattern"],
+              "category": r["category"], "hits": self.hits.get(r["id"], 0)} for r in rules),
+            key=lambda r: r["hits"], reverse=True,
+        )
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def load_ruleset(space: str) -> RuleSet:
+    """Load and compile every rule for *space*."""
+    return RuleSet(list_rules(space))
+
+
+def categorise_transactions(transactions: list[dict], ruleset: RuleSet) -> dict:
+    """
+    Set the category of every Uncategorised transaction that matches a rule
+    (in place).  Returns { "rows", "matched", "unmatched" }.
+    """
+    todo = [t for t in transactions if (t.get("category") or UNCATEGORISED) == UNCATEGORISED]
+    matched = 0
+    for t, category in zip(todo, ruleset.classify_many([t.get("description", "") for t in todo])):
+        if category:
+            t["category"] = category
+            matched += 1
+    return {"rows": len(todo), "matched": matched, "unmatched": len(todo) - matched}
+
+
+def add_rule(space: str, kind: str, pattern: str, category: str, priority: int = 100) -> dict:
+    """Add a rule. Raises ValueError on invalid input or a duplicate pattern."""
+    space = space.strip().lower()
+    kind, pattern, category = _validate_rule(kind, pattern, category)
+    con = get_connection(space)
+    try:
+        cur = con.cursor()
+        cur.execute(
+            "INSERT INTO category_rules (space, kind, pattern, category, priority) VALUES (?, ?, ?, ?, ?)",
+            (space, kind, pattern, category, priority),
+        )
+        con.commit()
+        cur.execute("SELECT * FROM category_rules WHERE id = ?", (cur.lastrowid,))
+        return dict(cur.fetchone())
+    except sqlite3.IntegrityError:
+        raise ValueError(f"A {kind} rule '{pattern}' already exists in space '{space}'.")
+    finally:
+        con.close()
+
+
+def list_rules(space: str) -> list[dict]:
+    """Return all rules for *space*, in priority order."""
+    con = get_connection(space)
+    try:
+        cur = con.cursor()
+        cur.execute(
+            "SELECT * FROM category_rules WHERE space = ? ORDER BY priority, id",
+            (space.strip().lower(),),
+        )
+        return [dict(r) for r in cur.fetchall()]
+    finally:
+        con.close()
+
+
+def delete_rule(rule_id: int, space: str) -> bool:
+    """Delete a rule by ID within *space*. Returns True if a row was deleted."""
+    space = space.strip().lower()
+    con = get_connection(space)
+    try:
+        cur = con.cursor()
+        cur.execute("DELETE FROM category_rules WHERE id = ? AND space = ?", (rule_id, space))
+        con.commit()
+        return cur.rowcount > 0
+    finally:
+        con.close()
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI Merchant Rules")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_add = sub.add_parser("add", help="Add a rule")
+    p_add.add_argument("--space",    required=True)
+    p_add.add_argument("--pattern",  required=True)
+    p_add.add_argument("--category", required=True)
+    p_add.add_argument("--regex",    action="store_true", help="Treat pattern as a regex")
+    p_add.add_argument("--priority", type=int, default=100, help="Lower runs first")
+
+    p_lst = sub.add_parser("list", help="List rules for a space")
+    p_lst.add_argument("--space", required=True)
+
+    p_del = sub.add_parser("delete", help="Delete a rule by ID")
+    p_del.add_argument("--space", required=True)
+    p_del.add_argument("--id",    type=int, required=True)
+
+    p_tst = sub.add_parser("test", help="Classify one description")
+    p_tst.add_argument("--space",       required=True)
+    p_tst.add_argument("--description", required=True)
+
+    args = parser.parse_args()
+
+    if args.command == "add":
+        try:
+            r = add_rule(args.space, "regex" if args.regex else "keyword",
+                         args.pattern, args.category, args.priority)
+            print(f"Added: id={r['id']}  {r['kind']}  '{r['pattern']}' -> {r['category']}")
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+
+    elif args.command == "list":
+        rows = list_rules(args.space)
+        if not rows:
+            print("No rules found.")
+        else:
+            print(f"{'ID':<5} {'KIND':<8} {'PRIO':<5} {'PATTERN':<40} {'CATEGORY'}")
+            print("-" * 80)
+            for r in rows:
+                print(f"{r['id']:<5} {r['kind']:<8} {r['priority']:<5} {r['pattern']:<40} {r['category']}")
+
+    elif args.command == "delete":
+        deleted = delete_rule(args.id, args.space)
+        print(f"Deleted rule {args.id}." if deleted else f"No rule with id={args.id}.")
+
+    elif args.command == "test":
+        category = load_ruleset(args.space).classify_many([args.description])[0]
+        print(category or "(no rule matched)")
+
+
+if __name__ == "__main__":
+    main()
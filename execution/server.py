@@ -16,23 +16,34 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR / "execution"))
 
-from flask import Flask, request, jsonify, send_from_directory, Response
+from flask import Flask, request, jsonify, send_from_directory, send_file, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
-import csv, io
 
 import user_manager as um
+import password_hasher as ph
 import client_manager as cm
 import space_manager        as sm
 import refund_processor     as rp
+import refund_scheduler     as rsched
 import space_settings_manager as ssm
+import report_generator     as rg
+import export_engine        as exports
+import import_jobs          as imports
+import space_stats          as stats_engine
+from json_stream import FastJSONProvider, stream_json, wants_ndjson
+import compression
+import events
+import admission
 
 
 # ── Config ─────────────────────────────────────────────────────────────────────
 load_dotenv(BASE_DIR / ".env")
 
 app = Flask(__name__, static_folder=str(BASE_DIR / "web"))
+app.json = FastJSONProvider(app)
 CORS(app)
+compression.Compress(app)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-change-me")
 
 WEB_DIR = BASE_DIR / "web"
@@ -76,7 +87,15 @@ def static_files(filename):
 
 # ── API: Login ─────────────────────────────────────────────────────────────────
 
+def _busy(message: str):
+    response = jsonify({"error": message})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
 @app.post("/api/login")
+@admission.limit("login", concurrency=16, rate=10, burst=20)
 def api_login():
     """
     POST /api/login
@@ -87,7 +106,9 @@ def api_login():
       - The exact combination (space, login, password) must exist in the
         users table → 401 if not found, 200 if found.
       - Matching is case-insensitive (space and login are lowercased before lookup).
-      - The password is SHA-256 hashed before comparison — plain text is never stored.
+      - The password is checked against a salted scrypt hash in the hashing
+        pool (password_hasher.py) — plain text is never stored.  503 +
+        Retry-After when the pool is saturated.
     """
     data = request.get_json(silent=True) or {}
     space    = data.get("space", "").strip()
@@ -102,7 +123,10 @@ def api_login():
         }), 400
 
     # ── Credential lookup — all three fields must match ────────────────────────
-    user = um.get_user(space, login, password)
+    try:
+        user = um.get_user(space, login, password)
+    except ph.KDFBusy as e:
+        return _busy(str(e))
     if user is None:
         # Deliberately vague — do not reveal which field was wrong
         return jsonify({
@@ -129,11 +153,11 @@ def api_login():
 def api_list_users():
     """
     GET /api/users?space=<optional>
-    Returns all credential records (without password hashes).
+    Returns all credential records (without password hashes), streamed.
+    Send `Accept: application/x-ndjson` for one record per line.
     """
     space = request.args.get("space", None)
-    rows = um.list_users(space)
-    return jsonify(rows), 200
+    return stream_json(um.iter_users_json(space), ndjson=wants_ndjson(request))
 
 
 @app.post("/api/users")
@@ -162,6 +186,8 @@ def api_add_user():
         record = um.add_user(space, login, password, name)
         record.pop("password_hash", None)
         return jsonify(record), 201
+    except ph.KDFBusy as e:
+        return _busy(str(e))
     except ValueError as e:
         return jsonify({"error": str(e)}), 409
 
@@ -216,6 +242,26 @@ def api_get_space(space_name: str):
     return jsonify({"error": f"Space '{space_name}' is not registered."}), 404
 
 
+@app.get("/api/spaces/<name>/stats")
+def api_space_stats(name: str):
+    """
+    GET /api/spaces/<name>/stats — client counts, data completeness and the
+    latest refund status distribution (see space_stats.py).
+    Cached against the space's data version, sent as a weak ETag;
+    If-None-Match with the current one returns 304.
+    """
+    name = name.strip().lower()
+    if not sm.space_exists(name):
+        return jsonify({"error": f"Space '{name}' is not registered."}), 404
+    stats, version = stats_engine.space_stats(name)
+    if request.if_none_match.contains_weak(version):
+        response = Response(status=304)
+    else:
+        response = jsonify(stats)
+    response.set_etag(version, weak=True)
+    return response
+
+
 # ── API: Clients ───────────────────────────────────────────────────────────────
 # All client endpoints are scoped by space.  The caller always passes
 # ?space=<name>  (GET/DELETE) or { "space": "<name>" } in the JSON body
@@ -223,15 +269,53 @@ def api_get_space(space_name: str):
 
 @app.get("/api/clients")
 def api_list_clients():
-    """GET /api/clients?space=<name> — return all clients for the given space."""
+    """
+    GET /api/clients?space=<name> — return all clients for the given space.
+    Streamed straight from the database cursor as a JSON array, or as NDJSON
+    when the request sends `Accept: application/x-ndjson`.
+    Sends a weak ETag; If-None-Match with the current one returns 304.
+    """
     space = request.args.get("space", "").strip()
-    return jsonify(cm.list_clients(space)), 200
+    if not space:
+        return jsonify({"error": "'space' query parameter is required."}), 400
+    seq, count = cm.clients_version(space)   # read first: later changes are re-sent, never missed
+    etag = f"{seq}-{count}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = stream_json(cm.iter_clients_json(space), ndjson=wants_ndjson(request))
+    response.set_etag(etag, weak=True)
+    response.headers["X-Changes-Seq"] = str(seq)
+    response.vary.add("Accept")
+    return response
+
+
+@app.get("/api/clients/changes")
+def api_client_changes():
+    """
+    GET /api/clients/changes?space=<name>&since=<seq>
+    Clients added, updated or deleted after change *seq* (the X-Changes-Seq
+    header of GET /api/clients, or the `seq` of the previous call):
+        { "seq", "more", "reset", "deletes": [id, ...], "upserts": [client, ...] }
+    """
+    space = request.args.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "'space' query parameter is required."}), 400
+    try:
+        since = int(request.args.get("since", ""))
+    except ValueError:
+        return jsonify({"error": "since must be an integer sequence number."}), 400
+    changes = cm.client_changes(space, since)
+    upserts = changes.pop("upserts")
+    return stream_json(upserts, wrap="upserts", meta=changes)
 
 
 @app.get("/api/clients/<int:client_id>")
 def api_get_client(client_id: int):
     """GET /api/clients/<id>?space=<name> — return a single client."""
     space = request.args.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "'space' query parameter is required."}), 400
     record = cm.get_client(client_id, space)
     if record:
         return jsonify(record), 200
@@ -240,7 +324,10 @@ def api_get_client(client_id: int):
 
 @app.post("/api/clients")
 def api_add_client():
-    """POST /api/clients -- create a new client. Body must include 'space' and 'name'."""
+    """
+    POST /api/clients -- create a new client. Body must include 'space' and 'name'.
+    400 for invalid fields, 409 if the PPS number is already taken in the space.
+    """
     data  = request.get_json(silent=True) or {}
     space = data.pop("space", "").strip()
     if not space:
@@ -256,87 +343,166 @@ def api_add_client():
 
     try:
         record = cm.add_client(data, space)
-        return jsonify(record), 201
+    except cm.DuplicatePPS as e:
+        return jsonify({"error": str(e)}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    events.publish(space, "client", {"op": "created", "id": record["id"]})
+    return jsonify(record), 201
 
 
 @app.put("/api/clients/<int:client_id>")
 def api_update_client(client_id: int):
-    """PUT /api/clients/<id> — update a client. Body must include 'space'."""
+    """
+    PUT /api/clients/<id> — update a client. Body must include 'space'.
+    400 for invalid fields, 409 if the PPS number is already taken in the space.
+    """
     data  = request.get_json(silent=True) or {}
     space = data.pop("space", "").strip()
-    record = cm.update_client(client_id, data, space)
+    if not space:
+        return jsonify({"error": "'space' is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
+    try:
+        record = cm.update_client(client_id, data, space)
+    except cm.DuplicatePPS as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     if record:
+        events.publish(space, "client", {"op": "updated", "id": client_id})
         return jsonify(record), 200
     return jsonify({"error": f"No client with id={client_id} in space '{space}'."}), 404
 
 
+@app.post("/api/clients/bulk")
+def api_bulk_clients():
+    """
+    POST /api/clients/bulk
+    Body: {
+      "space": "...",
+      "operations": [
+        { "op": "update", "id": 12, "fields": { "city_county": "Cork" } },
+        { "op": "delete", "id": 13 }
+      ]
+    }
+    Applies every operation in one transaction.
+    Returns { updated, deleted, failed, results: [ {index, op, id, status, error?}, ... ] }
+    """
+    data  = request.get_json(silent=True) or {}
+    space = data.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "'space' is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
+    try:
+        result = cm.bulk_apply(data.get("operations"), space)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if result["updated"] or result["deleted"]:
+        events.publish(space, "clients", {
+            "op": "bulk", "updated": result["updated"], "deleted": result["deleted"],
+        })
+    return jsonify(result), 200
+
+
 @app.delete("/api/clients/<int:client_id>")
 def api_delete_client(client_id: int):
     """DELETE /api/clients/<id>?space=<name>"""
     space = request.args.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "'space' query parameter is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
     if cm.delete_client(client_id, space):
+        events.publish(space, "client", {"op": "deleted", "id": client_id})
         return jsonify({"message": f"Client {client_id} deleted."}), 200
     return jsonify({"error": f"No client with id={client_id} in space '{space}'."}), 404
 
 
-@app.get("/api/clients/export.csv")
-def api_export_clients_csv():
+@app.get("/api/clients/export.<fmt>")
+def api_export_clients(fmt: str):
     """
-    GET /api/clients/export.csv?space=<name>
-    Returns a downloadable CSV for the given space.
+    GET /api/clients/export.<csv|ndjson|xlsx|parquet>?space=<name>
+    Returns a downloadable export of the space's clients.
     Excluded fields: revenue_password, legacy_phone, space.
+
+    The file is generated once per version of the client list and then sent
+    from .tmp/exports (see export_engine.py); X-Export-Cache says hit|miss.
+    CSV and NDJSON are sent from a precompressed zstd/gzip copy when
+    Accept-Encoding allows.
+    400 for an unknown format (or Parquet without pyarrow), 404 if the
+    space is not registered.
     """
-    EXCLUDED = {"revenue_password", "legacy_phone", "space"}
     space = request.args.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "'space' query parameter is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
 
-    clients = cm.list_clients(space)
-    if not clients:
-        all_keys = ["finflow_number", "id", "name", "civil_status", "pps_number",
-                    "date_of_birth", "email", "mobile", "other_phone",
-                    "address_line1", "address_line2", "address_line3",
-                    "city_county", "eir_code", "bank_holder_name",
-                    "bank_iban", "bank_bic"]
-    else:
-        all_keys = [k for k in clients[0].keys() if k not in EXCLUDED]
-
-    buf = io.StringIO()
-    writer = csv.DictWriter(
-        buf,
-        fieldnames=all_keys,
-        extrasaction="ignore",
-        lineterminator="\r\n",
-    )
-    writer.writeheader()
-    for row in clients:
-        writer.writerow({k: row.get(k, "") for k in all_keys})
-
-    csv_bytes = buf.getvalue().encode("utf-8-sig")   # BOM for Excel compatibility
-    prefix = cm.space_code(space)
-    filename = f"finflowai_{prefix.lower()}_clients.csv"
-    return Response(
-        csv_bytes,
-        mimetype="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}",
-            "Content-Length": str(len(csv_bytes)),
-        }
-    )
+    def send():
+        path, cached = exports.export_clients(space, fmt)
+        # send_file bypasses compression.py: serve the precompressed copy instead
+        encoding = request.accept_encodings.best_match(exports.available_encodings(path))
+        if encoding and request.accept_encodings[encoding] <= 0:
+            encoding = None
+        response = send_file(
+            exports.encoded_path(path, encoding) if encoding else path,
+            mimetype=exports.FORMATS[fmt.lower()],
+            as_attachment=True,
+            download_name=exports.download_name(space, fmt.lower()),
+            conditional=True,
+            max_age=0,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if fmt.lower() in exports.PRECOMPRESSED:
+            response.vary.add("Accept-Encoding")
+        response.headers["X-Export-Cache"] = "hit" if cached else "miss"
+        return response
+
+    try:
+        try:
+            return send()
+        except FileNotFoundError:
+            # A newer export replaced (and deleted) the file before it was
+            # opened; once open, deleting it no longer affects the download
+            return send()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @app.post("/api/clients/import.csv")
+@admission.limit("import", concurrency=2, rate=0.2, burst=4)   # a dry run + import per upload
 def api_import_clients_csv():
     """
-    POST /api/clients/import.csv?space=<name>
+    POST /api/clients/import.csv?space=<name>&mode=insert|upsert|skip-existing[&dry_run=true]
     Accepts a multipart file upload (field name: 'file').
     Imports every row that has at least a 'name' column.
     Auto-assigns FinFlow numbers — no existing clients are deleted.
-    Returns { added, skipped, errors: [...] }
+    PPS number, IBAN, BIC, Eircode and date of birth are validated first;
+    rows with a bad value are listed in the errors CSV and not imported.
+    dry_run=true validates and matches the whole file but writes nothing.
+
+    mode (default 'upsert', as on the Clients page):
+      insert        — every row becomes a new client
+      upsert        — rows matching an existing client (PPS, email or client
+                      reg. number) update it; the rest are added
+      skip-existing — matching rows are skipped; the rest are added
+
+    The file is spooled to disk and imported by a background worker
+    (import_jobs.py).  Returns 202 with the job; follow its progress at
+    GET /api/clients/imports/<id> (also the Location header).
     """
-    space = request.args.get("space", "").strip()
+    space   = request.args.get("space", "").strip()
+    mode    = request.args.get("mode", "upsert").strip().lower()
+    dry_run = request.args.get("dry_run", "").strip().lower() in ("1", "true", "yes")
     if not space:
         return jsonify({"error": "'space' query parameter is required."}), 400
+    if mode not in cm.IMPORT_MODES:
+        return jsonify({
+            "error": f"'mode' must be one of: {', '.join(cm.IMPORT_MODES)}."
+        }), 400
 
     if not sm.space_exists(space):
         return jsonify({
@@ -350,48 +516,131 @@ def api_import_clients_csv():
     if not uploaded.filename.lower().endswith(".csv"):
         return jsonify({"error": "Only CSV files are accepted."}), 400
 
-    added   = 0
-    skipped = 0
-    errors  = []
-
     try:
-        text    = uploaded.stream.read().decode("utf-8-sig")   # handle BOM
-        reader  = csv.DictReader(io.StringIO(text))
-        valid_fields = set(cm.CLIENT_FIELDS)
+        job = imports.submit(space, mode, uploaded.stream, uploaded.filename, dry_run=dry_run)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers["Location"] = f"/api/clients/imports/{job['id']}"
+    return response
+
+
+@app.get("/api/clients/imports")
+def api_list_import_jobs():
+    """GET /api/clients/imports?space=<name> — recent import jobs with progress."""
+    space = request.args.get("space", "").strip()
+    return jsonify(imports.list_jobs(space)), 200
+
+
+@app.get("/api/clients/imports/<job_id>")
+def api_get_import_job(job_id: str):
+    """
+    GET /api/clients/imports/<id>
+    { id, space, mode, dry_run, filename, status, total, done, added, updated,
+      skipped, errors, message, created_at, updated_at }
+    status: queued | running | completed | failed | interrupted
+    """
+    job = imports.get_job(job_id)
+    if job is None:
+        return jsonify({"error": f"No import job with id '{job_id}'."}), 404
+    return jsonify(job), 200
+
+
+@app.get("/api/clients/imports/<job_id>/errors.csv")
+def api_import_job_errors(job_id: str):
+    """GET /api/clients/imports/<id>/errors.csv — rejected rows (row, name, field, error)."""
+    job  = imports.get_job(job_id)
+    path = imports.errors_path(job_id)
+    if job is None or not path.exists():
+        return jsonify({"error": f"No errors file for import job '{job_id}'."}), 404
+    return send_file(
+        path,
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name=f"import_errors_{job_id[:8]}.csv",
+        max_age=0,
+    )
 
-        for i, row in enumerate(reader, start=2):          # row 1 = header
-            # strip keys & values
-            row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
-            name = row.get("name", "").strip()
 
-            if not name:
-                skipped += 1
-                continue
+@app.post("/api/clients/imports/<job_id>/run")
+def api_run_import_job(job_id: str):
+    """
+    POST /api/clients/imports/<id>/run
+    Import the file of a completed dry run for real (no second upload).
+    Returns 202 with the re-queued job, 404 if unknown, 409 if not a completed dry run.
+    """
+    try:
+        job = imports.run_for_real(job_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if job is None:
+        return jsonify({"error": f"No import job with id '{job_id}'."}), 404
+    return jsonify(job), 202
 
-            # Keep only fields the client table knows about
-            data = {k: v for k, v in row.items() if k in valid_fields}
 
-            try:
-                cm.add_client(data, space)
-                added += 1
-            except Exception as e:
-                errors.append({"row": i, "name": name, "error": str(e)})
+# ── Reports ───────────────────────────────────────────────────────────────────
 
-    except Exception as e:
-        return jsonify({"error": f"Could not parse CSV: {e}"}), 400
+@app.get("/api/clients/<int:client_id>/report")
+@admission.limit("report", concurrency=4, rate=1, burst=10)     # one client; runs are "reports"
+def api_client_report(client_id: int):
+    """
+    GET /api/clients/<id>/report?space=<name>&format=pdf|png
+    Returns the client's financial summary, rendered only if its inputs changed.
+    """
+    space = request.args.get("space", "").strip()
+    fmt   = request.args.get("format", "pdf").strip().lower()
+    if not space:
+        return jsonify({"error": "'space' query parameter is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
+    try:
+        path = rg.render_client_report(client_id, space, fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if path is None:
+        return jsonify({"error": f"No client with id={client_id} in space '{space}'."}), 404
+    return send_file(
+        path,
+        mimetype="application/pdf" if fmt == "pdf" else "image/png",
+        download_name=f"{cm.space_code(space).lower()}_{client_id:04d}_summary.{fmt}",
+    )
 
-    return jsonify({"added": added, "skipped": skipped, "errors": errors}), 200
+
+@app.post("/api/reports/run")
+@admission.limit("reports", concurrency=2, rate=0.05, burst=2)
+def api_run_reports():
+    """
+    POST /api/reports/run
+    Body: { "space": "...", "format": "pdf" | "png" }
+    Month-end run for a whole space; only clients whose data changed are re-rendered.
+    """
+    data  = request.get_json(silent=True) or {}
+    space = data.get("space", "").strip()
+    fmt   = data.get("format", "pdf")
+    if not space:
+        return jsonify({"error": "'space' is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
+    try:
+        return jsonify(rg.run_space_reports(space, fmt)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 # ── Processes ─────────────────────────────────────────────────────────────────
 
 @app.post("/api/processes/refunds")
+@admission.limit("refunds", concurrency=4, rate=0.2, burst=3)
 def api_run_refunds():
     """
     POST /api/processes/refunds
     Body: { "space": "...", "client_ids": [1, 2, 3] }
-    Runs the refund check sequentially for each client_id in order.
-    Returns: { "results": [ { ...per-client result... }, ... ] }
+    Runs the refund check for each client_id as a checkpointed run.
+    Returns: { "run_id": "...", "results": [ { ...per-client result... }, ... ] }
+    Results are streamed as each client completes; with
+    `Accept: application/x-ndjson` each result is sent as its own line and
+    the run id is in the X-Refund-Run-Id header.
     """
     data       = request.get_json(silent=True) or {}
     space      = data.get("space", "").strip()
@@ -409,8 +658,128 @@ def api_run_refunds():
     except (TypeError, ValueError):
         return jsonify({"error": "All client_ids must be integers."}), 400
 
-    results = rp.run_refunds(client_ids, space)
-    return jsonify({"results": results}), 200
+    run_id = rp.start_run(client_ids, space)
+    return _stream_run(run_id)
+
+
+def _stream_run(run_id: str):
+    # Claim before streaming: once the body has started a conflict cannot be a 409
+    if not rp.claim_run(run_id):
+        return jsonify({"error": f"Refund run '{run_id}' is already running."}), 409
+    response = stream_json(
+        rp.iter_run(run_id, claimed=True),
+        ndjson=wants_ndjson(request),
+        wrap="results",
+        meta={"run_id": run_id},
+    )
+    response.headers["X-Refund-Run-Id"] = run_id
+    return response
+
+
+@app.get("/api/processes/refunds")
+def api_list_refund_runs():
+    """GET /api/processes/refunds?space=<name> — recent runs with progress counts."""
+    space = request.args.get("space", "").strip()
+    return jsonify(rp.list_runs(space)), 200
+
+
+@app.get("/api/processes/refunds/latest")
+def api_latest_refund_results():
+    """
+    GET /api/processes/refunds/latest?space=<name>[&ids=1,2,3]
+    Last stored refund result per client (from scheduled sweeps and runs).
+    Never calls Revenue.
+    """
+    space = request.args.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "space is required."}), 400
+    ids = request.args.get("ids", "").strip()
+    try:
+        client_ids = [int(x) for x in ids.split(",") if x.strip()] if ids else None
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers."}), 400
+    return jsonify(rp.latest_results(space, client_ids)), 200
+
+
+@app.get("/api/processes/refunds/schedule")
+def api_get_refund_schedule():
+    """GET /api/processes/refunds/schedule?space=<name> — the space's sweep schedule."""
+    space = request.args.get("space", "").strip().lower()
+    schedule = next((s for s in rsched.list_schedules() if s["space"] == space), None)
+    if schedule is None:
+        return jsonify({"error": f"No refund schedule for space '{space}'."}), 404
+    return jsonify(schedule), 200
+
+
+@app.put("/api/processes/refunds/schedule")
+def api_set_refund_schedule():
+    """
+    PUT /api/processes/refunds/schedule
+    Body: { "space": "...", "cron": "0 1 * * *", "per_minute": 30, "window_minutes": 360 }
+    """
+    data  = request.get_json(silent=True) or {}
+    space = data.get("space", "").strip()
+    if not space:
+        return jsonify({"error": "'space' is required."}), 400
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
+    try:
+        schedule = rsched.set_schedule(
+            space,
+            data.get("cron", "0 1 * * *"),
+            int(data.get("per_minute", 30)),
+            int(data.get("window_minutes", 360)),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(schedule), 200
+
+
+@app.get("/api/processes/refunds/<run_id>")
+def api_get_refund_run(run_id: str):
+    """GET /api/processes/refunds/<run_id> — run status, counts and stored results."""
+    run = rp.get_run(run_id)
+    if run is None:
+        return jsonify({"error": f"No refund run with id '{run_id}'."}), 404
+    return jsonify(run), 200
+
+
+@app.get("/api/processes/refunds/<run_id>/timings")
+def api_refund_run_timings(run_id: str):
+    """
+    GET /api/processes/refunds/<run_id>/timings — where the run spent its time:
+    { wall_ms, clients, phases: { name: {count, total_ms, mean_ms, p50_ms, p95_ms, max_ms} },
+      slowest: [ { client_id, total_ms, phases } ] }
+    404 until the run has finished (or if tracing is off).
+    """
+    timings = rp.run_timings(run_id)
+    if timings is None:
+        return jsonify({"error": f"No timings recorded for refund run '{run_id}'."}), 404
+    return jsonify(timings), 200
+
+
+@app.get("/api/processes/refunds/<run_id>/trace.json")
+def api_refund_run_trace(run_id: str):
+    """GET /api/processes/refunds/<run_id>/trace.json — Chrome trace-event file (open in Perfetto)."""
+    path = rp.run_trace_path(run_id)
+    if not path.exists():
+        return jsonify({"error": f"No trace recorded for refund run '{run_id}'."}), 404
+    return send_file(path, mimetype="application/json", as_attachment=True,
+                     download_name=f"refund-{run_id[:8]}.trace.json", max_age=0)
+
+
+@app.post("/api/processes/refunds/<run_id>/resume")
+@admission.limit("refunds", concurrency=4, rate=0.2, burst=3)
+def api_resume_refund_run(run_id: str):
+    """
+    POST /api/processes/refunds/<run_id>/resume
+    Re-runs only the clients of the run that have no result yet or errored;
+    completed clients are returned from the checkpoint.  Same response shape
+    as POST /api/processes/refunds; 409 while the run is still running.
+    """
+    if rp.get_run(run_id, with_results=False) is None:
+        return jsonify({"error": f"No refund run with id '{run_id}'."}), 404
+    return _stream_run(run_id)
 
 
 
@@ -449,9 +818,68 @@ def api_update_space_settings(name: str):
         return jsonify({"error": str(e)}), 400
 
 
+# ── Events ────────────────────────────────────────────────────────────────────
+
+@app.get("/api/spaces/<name>/events")
+def api_space_events(name: str):
+    """
+    GET /api/spaces/<name>/events — Server-Sent Events stream of activity in
+    the space (client, clients, import, refund, resync; see events.py).
+    """
+    space = name.strip().lower()
+    if not sm.space_exists(space):
+        return jsonify({"error": f"Space '{space}' is not registered."}), 404
+    subscriber = events.broadcaster(space).subscribe()
+    if subscriber is None:
+        response = jsonify({"error": "Too many open event streams for this space."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+    response = Response(
+        events.stream(space, subscriber, request.headers.get("Last-Event-ID")),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also covers a stream closed before its first chunk was sent
+    response.call_on_close(lambda: events.broadcaster(space).unsubscribe(subscriber))
+    return response
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+@app.get("/api/metrics/compression")
+def api_compression_metrics():
+    """
+    GET /api/metrics/compression
+    Returns { "<encoding>": { responses, bytes_in, bytes_out, ratio }, ... }
+    for every response compressed since the server started.
+    """
+    return jsonify(compression.stats()), 200
+
+
 if __name__ == "__main__":
 
     port = int(os.getenv("FLASK_PORT", 5000))
     debug = os.getenv("FLASK_DEBUG", "true").lower() == "true"
+    # Finish refund runs cut short by the last restart (once, not in the reloader parent)
+    resume = os.getenv("REFUND_RESUME_ON_START", "false").lower() == "true"
+    if resume and (not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        import threading
+        threading.Thread(target=rp.resume_interrupted_runs, daemon=True).start()
+    # Nightly refund sweeps (see refund_scheduler.py)
+    scheduler = os.getenv("REFUND_SCHEDULER", "false").lower() == "true"
+    if scheduler and (not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        rsched.Scheduler().start()
+    # Pick up client imports queued before the last restart
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        imports.recover()
+    # Keep the client change log bounded (see client_manager.compact_changes)
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        import threading
+        threading.Thread(target=cm.compact_changes_forever, name="client-changes-compactor",
+                         daemon=True).start()
+    # Start the password hashing workers before the first login arrives
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        ph.warm()
     print(f"FinFlowAI server starting at http://localhost:{port}")
     app.run(host="0.0.0.0", port=port, debug=debug)
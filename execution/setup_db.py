@@ -28,9 +28,11 @@ def setup():
             login         TEXT    NOT NULL,
             password_hash TEXT    NOT NULL,
             name          TEXT    NOT NULL DEFAULT "",
-            created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(space, login, password_hash)
+            created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+        -- (space, login, password) is unique, but hashes are salted, so
+        -- user_manager.add_user enforces it; this index serves the lookups
+        CREATE INDEX IF NOT EXISTS idx_users_space_login ON users (space, login);
     """)
 
     con.commit()
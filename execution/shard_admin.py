@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Shard Admin
+=======================
+Tooling for the per-space database layout (DB_LAYOUT=sharded, see db.py).
+
+Moving an existing install to shards:
+    1. python execution/shard_admin.py split            # copy each space's rows to its shard
+    2. set DB_LAYOUT=sharded in .env and restart the server
+    3. python execution/shard_admin.py split --purge    # optional: drop the copied rows from the catalog
+
+--purge never copies: once the server runs on shards the shard is the only
+live copy, and re-copying would bring back rows deleted there since step 1.
+It deletes from the catalog only rows whose key is already in the shard,
+and refuses to run unless DB_LAYOUT=sharded.
+
+CLI Usage:
+    python execution/shard_admin.py status
+    python execution/shard_admin.py split  [--space acme] [--purge]
+    python execution/shard_admin.py query  "SELECT count(*) AS clients FROM {db}.clients"
+    python execution/shard_admin.py exec   "ALTER TABLE clients ADD COLUMN notes TEXT DEFAULT ''"
+
+`query` runs across every shard (via ATTACH); `exec` applies a statement to
+every shard, e.g. after a migrate_*.py script changed the catalog schema.
+"""
+
+import argparse
+import sqlite3
+import sys
+
+import db
+
+
+# ── Split ──────────────────────────────────────────────────────────────────────
+
+def _columns(con: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    return [r[1] for r in con.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def _primary_key(con: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    rows = con.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+    return [r[1] for r in sorted(rows, key=lambda r: r[5]) if r[5]]
+
+
+def _where(table: str) -> str:
+    if table == "refund_run_items":
+        return "run_id IN (SELECT id FROM main.refund_runs WHERE space = ?)"
+    return "space = ?"
+
+
+def purge_space(space: str) -> dict:
+    """
+    Delete from the main database *space*'s rows that are already in its
+    shard (matched on primary key).  Copies nothing.  Returns {table: rows deleted}.
+    """
+    space = space.strip().lower()
+    path  = db.shard_path(space)
+    if not path.exists():
+        return {}
+    con = sqlite3.connect(db.CATALOG_PATH, timeout=db.BUSY_TIMEOUT)
+    try:
+        con.execute("ATTACH DATABASE ? AS shard", (str(path),))
+        main_tables  = {r[0] for r in con.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+        shard_tables = {r[0] for r in con.execute("SELECT name FROM shard.sqlite_master WHERE type = 'table'")}
+        deleted = {}
+        for table in db.SHARD_TABLES:
+            if table not in main_tables or table not in shard_tables:
+                continue
+            key = ", ".join(_primary_key(con, "main", table))
+            cur = con.execute(
+                f"DELETE FROM main.{table} WHERE {_where(table)} "
+                f"AND ({key}) IN (SELECT {key} FROM shard.{table})",
+                (space,),
+            )
+            deleted[table] = cur.rowcount
+        con.commit()
+        return deleted
+    finally:
+        con.close()
+
+
+def split_space(space: str) -> dict:
+    """
+    Copy *space*'s rows of every shard table from the main database into its
+    shard (existing rows with the same key are kept).  Returns {table: rows copied}.
+    """
+    space = space.strip().lower()
+    path  = db.provision_shard(space)
+    con   = sqlite3.connect(db.CATALOG_PATH, timeout=db.BUSY_TIMEOUT)
+    try:
+        con.execute("ATTACH DATABASE ? AS shard", (str(path),))
+        main_tables = {r[0] for r in con.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+        copied = {}
+        for table in db.SHARD_TABLES:
+            if table not in main_tables:
+                continue
+            cols = ", ".join(c for c in _columns(con, "main", table) if c in _columns(con, "shard", table))
+            cur = con.execute(
+                f"INSERT OR IGNORE INTO shard.{table} ({cols}) "
+                f"SELECT {cols} FROM main.{table} WHERE {_where(table)}",
+                (space,),
+            )
+            copied[table] = cur.rowcount
+        con.commit()
+        return copied
+    finally:
+        con.close()
+
+
+def exec_all(sql: str) -> list[str]:
+    """Execute *sql* in every existing shard. Returns the spaces it ran in."""
+    done = []
+    for space in db.shard_spaces():
+        con = db.connect(space)
+        try:
+            con.executescript(sql)
+        finally:
+            con.close()
+        done.append(space)
+    return done
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="FinFlowAI Shard Admin")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("status", help="Show the layout and each space's shard")
+
+    p_split = sub.add_parser("split", help="Copy each space's rows into its shard")
+    p_split.add_argument("--space", help="Only this space (default: all)")
+    p_split.add_argument("--purge", action="store_true",
+                         help="Delete rows already in the shard from the main database (sharded layout only; copies nothing)")
+
+    p_query = sub.add_parser("query", help="Read-only query across all spaces; use {db}.table")
+    p_query.add_argument("sql")
+
+    p_exec = sub.add_parser("exec", help="Execute a statement in every shard")
+    p_exec.add_argument("sql")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(f"Layout:  {db.layout()}")
+        print(f"Catalog: {db.CATALOG_PATH}")
+        con = db.connect()
+        try:
+            spaces = [r[0] for r in con.execute("SELECT name FROM spaces ORDER BY name")]
+        finally:
+            con.close()
+        for space in spaces:
+            path = db.shard_path(space)
+            size = f"{path.stat().st_size / 1024:,.0f} KB" if path.exists() else "—"
+            print(f"  {space:<28} {size:>10}  {path.name}")
+
+    elif args.command == "split":
+        con = db.connect()
+        try:
+            spaces = [r[0] for r in con.execute("SELECT name FROM spaces ORDER BY name")]
+        finally:
+            con.close()
+        if args.space:
+            spaces = [args.space.strip().lower()]
+        if args.purge and not db.sharded():
+            print("--purge needs DB_LAYOUT=sharded: until the server runs on shards the main database is live.")
+            sys.exit(1)
+        for space in spaces:
+            if args.purge:
+                deleted = purge_space(space)
+                summary = ", ".join(f"{t}={n}" for t, n in deleted.items() if n) or "nothing to purge"
+            else:
+                copied = split_space(space)
+                summary = ", ".join(f"{t}={n}" for t, n in copied.items() if n) or "nothing to copy"
+            print(f"{space}: {summary}")
+
+    elif args.command == "query":
+        try:
+            rows = db.query_all_spaces(args.sql)
+        except (sqlite3.Error, KeyError, IndexError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        if not rows:
+            print("No rows.")
+            return
+        print("\t".join(rows[0].keys()))
+        for r in rows:
+            print("\t".join("" if v is None else str(v) for v in r.values()))
+
+    elif args.command == "exec":
+        if not db.sharded():
+            print("DB_LAYOUT is not 'sharded'; run the statement against the main database instead.")
+            sys.exit(1)
+        try:
+            done = exec_all(args.sql)
+        except sqlite3.Error as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"Executed in {len(done)} shard(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ Each space has:
 import sqlite3
 from pathlib import Path
 
+import db
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DB_PATH  = BASE_DIR / ".tmp" / "finflowai.db"
 
@@ -103,9 +105,12 @@ def create_space(name: str, code: str) -> dict:
         )
         con.commit()
         cur.execute("SELECT * FROM spaces WHERE id = ?", (cur.lastrowid,))
-        return dict(cur.fetchone())
+        space = dict(cur.fetchone())
     finally:
         con.close()
+    if db.sharded():
+        db.provision_shard(space["name"])        # the only place a new space's shard is created
+    return space
 
 
 def delete_space(name: str) -> bool:
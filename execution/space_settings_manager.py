@@ -11,18 +11,15 @@ Each space has exactly one row.  Fields:
 
 import sqlite3
 from datetime import datetime, timezone
-from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH  = BASE_DIR / ".tmp" / "finflowai.db"
+import db
+import write_queue as wq
 
 WRITABLE_FIELDS = {"tain", "ros_id"}
 
 
-def _get_connection() -> sqlite3.Connection:
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+def _get_connection(space: str) -> sqlite3.Connection:
+    return db.connect(space)
 
 
 def _utc_now() -> str:
@@ -37,7 +34,7 @@ def get_settings(space: str) -> dict:
     If no row exists yet, returns an empty-field dict (does NOT insert).
     """
     space = space.strip().lower()
-    con = _get_connection()
+    con = _get_connection(space)
     try:
         cur = con.cursor()
         cur.execute("SELECT * FROM space_settings WHERE space = ?", (space,))
@@ -66,8 +63,8 @@ def upsert_settings(space: str, tain: str = None, ros_id: str = None) -> dict:
         raise ValueError("At least one of 'tain' or 'ros_id' must be provided.")
 
     now = _utc_now()
-    con = _get_connection()
-    try:
+
+    def op(con):
         cur = con.cursor()
         # Ensure the row exists
         cur.execute(
@@ -80,8 +77,7 @@ def upsert_settings(space: str, tain: str = None, ros_id: str = None) -> dict:
                 f"UPDATE space_settings SET {field} = ?, updated_at = ? WHERE space = ?",
                 (value, now, space),
             )
-        con.commit()
         cur.execute("SELECT * FROM space_settings WHERE space = ?", (space,))
         return dict(cur.fetchone())
-    finally:
-        con.close()
+
+    return wq.run(space, op)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Space Statistics
+============================
+Dashboard numbers for one space (client counts, how complete the PPS /
+IBAN / contact data is, and the latest refund status per client) without
+sending the client list to the browser.
+
+  - space_stats(space) → (stats dict, version string)
+
+Architecture:
+  - Stats are computed by one aggregated SQL pass over clients plus one
+    GROUP BY over refund_results, inside a single read transaction.
+  - The result is cached per space against the space's data version:
+    client_manager.clients_version() (client_changes seq + client count)
+    and the count and latest checked_at of its refund_results.  Reading the
+    version costs a few indexed lookups, so repeat requests never scan the
+    clients table until something changes.
+  - Entries older than MAX_AGE seconds are recomputed anyway, which covers
+    a refund result replaced within the same second as the last one.
+  - One lock per space: a burst of dashboard loads after a change computes
+    the stats once.
+
+Returned schema:
+  {
+    "space":      str,
+    "clients":    int,
+    "complete":   { "pps_number": n, "bank_iban": n, "bank_bic": n, "email": n,
+                    "mobile": n, "date_of_birth": n, "eir_code": n,
+                    "revenue_password": n, "refund_ready": n },
+    "refunds":    { "success": n, "error": n, "pending": n, "no_data": n,
+                    "unchecked": n },
+    "last_checked_at": str | None,   # newest refund result
+    "computed_at":     str,
+  }
+"refund_ready" counts clients with both a PPS number and a Revenue password.
+
+Usage:
+    python execution/space_stats.py --space ge-souza-tax
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import client_manager as cm
+
+MAX_AGE = 300                                   # seconds a cached entry is trusted
+
+# Fields whose completeness is reported (non-blank values counted)
+COMPLETENESS_FIELDS = (
+    "pps_number", "bank_iban", "bank_bic", "email", "mobile",
+    "date_of_birth", "eir_code", "revenue_password",
+)
+REFUND_STATUSES = ("success", "error", "pending", "no_data")
+
+_cache = {}                                     # space -> (version, stats, monotonic time)
+_locks = {}                                     # space -> Lock
+_locks_lock = threading.Lock()
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _lock(space: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(space, threading.Lock())
+
+
+def _version(space: str, con) -> str:
+    seq, count = cm.clients_version(space, con)
+    results, checked = con.execute(
+        "SELECT COUNT(*), MAX(checked_at) FROM refund_results WHERE space = ?", (space,)
+    ).fetchone()
+    return f"{seq}-{count}-{results}-{checked or ''}"
+
+
+def _compute(space: str, con) -> dict:
+    filled = ", ".join(
+        f"TOTAL(COALESCE(TRIM({f}), '') <> '') AS {f}" for f in COMPLETENESS_FIELDS
+    )
+    row = con.execute(
+        f"""SELECT COUNT(*) AS clients, {filled},
+                   TOTAL(COALESCE(TRIM(pps_number), '') <> ''
+                         AND COALESCE(revenue_password, '') <> '') AS refund_ready
+            FROM clients WHERE space = ?""",
+        (space,),
+    ).fetchone()
+    complete = {f: int(row[f]) for f in (*COMPLETENESS_FIELDS, "refund_ready")}
+
+    refunds = dict.fromkeys(REFUND_STATUSES, 0)
+    for status, n in con.execute(
+        """SELECT r.status, COUNT(*) FROM refund_results r
+           JOIN clients c ON c.id = r.client_id AND c.space = r.space
+           WHERE r.space = ? GROUP BY r.status""",
+        (space,),
+    ):
+        refunds[status] = n
+    refunds["unchecked"] = row["clients"] - sum(refunds.values())
+
+    last = con.execute(
+        "SELECT MAX(checked_at) FROM refund_results WHERE space = ?", (space,)
+    ).fetchone()[0]
+    return {
+        "space":           space,
+        "clients":         row["clients"],
+        "complete":        complete,
+        "refunds":         refunds,
+        "last_checked_at": last,
+        "computed_at":     _utc_now(),
+    }
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def space_stats(space: str) -> tuple[dict, str]:
+    """
+    Statistics for *space* and the data version they were computed at
+    (usable as an ETag).  Served from the cache while the version is
+    unchanged.  Raises ValueError if space is blank.
+    """
+    space = space.strip().lower()
+    if not space:
+        raise ValueError("space is required.")
+
+    with _lock(space):
+        con = cm.get_connection(space)
+        try:
+            con.execute("BEGIN")                 # one snapshot for version + stats
+            version = _version(space, con)
+            cached = _cache.get(space)
+            if cached and cached[0] == version and time.monotonic() - cached[2] < MAX_AGE:
+                return cached[1], version
+            stats = _compute(space, con)
+        finally:
+            con.close()
+        _cache[space] = (version, stats, time.monotonic())
+        return stats, version
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a space's dashboard statistics")
+    parser.add_argument("--space", required=True)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    stats, version = space_stats(args.space)
+    print(json.dumps(stats, indent=2))
+    print(f"version {version}, computed in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
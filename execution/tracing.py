@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Lightweight Tracing
+===============================
+Span timing for batch pipelines (refund runs): where did a slow run spend
+its time, and which clients were slowest?
+
+  - Trace(name)                     → collector for one run (thread-safe)
+  - trace.span(name, client_id=...) → time a block explicitly
+  - activate(trace, client_id)      → make *trace* current in this thread, so
+                                      code further down (e.g. refund_backend)
+                                      can call span(name) without being passed
+                                      the trace; span() is a no-op otherwise
+  - trace.client_phases(client_id)  → {phase: ms} for one client
+  - trace.summary()                 → per-phase stats + slowest clients
+  - save(trace) / load_summary(name) / trace_path(name)
+
+Phase names with a dot ("backend.attempt") are sub-phases of the part
+before the dot and are not added into a client's total.
+
+save() writes two files to .tmp/traces/:
+  <name>.trace.json    Chrome trace-event format: open it in Perfetto
+                       (ui.perfetto.dev), chrome://tracing or speedscope.
+                       One track per worker thread; time waiting in the
+                       queue is shown as async "queue" slices.
+  <name>.summary.json  trace.summary()
+Retention is per group — the part of the name before the first "-"
+("refund-<id>", "sweep-<id>"): only the newest MAX_TRACES traces of each
+group are kept, so a burst of one kind never evicts another's.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR  = Path(__file__).resolve().parent.parent
+TRACE_DIR = BASE_DIR / ".tmp" / "traces"
+
+MAX_TRACES = 50                                 # per group, see group()
+SLOWEST    = 10                                 # clients listed in summary()
+ASYNC_PHASES = ("queue",)                       # overlap other spans on the same thread
+
+_NULL  = contextlib.nullcontext()
+_local = threading.local()
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# ── Trace ──────────────────────────────────────────────────────────────────────
+
+class Trace:
+    """Spans of one run: (name, client_id, start, end, thread id, args)."""
+
+    def __init__(self, name: str, **meta):
+        self.name       = name
+        self.meta       = meta
+        self.started_at = _utc_now()
+        self.t0         = time.perf_counter()
+        self.t1         = None
+        self._lock      = threading.Lock()
+        self._spans     = []
+        self._threads   = {}                    # thread ident -> thread name
+        self._clients   = {}                    # client_id -> {phase: ms}
+
+    def add(self, name: str, start: float, end: float, client_id=None, **args) -> None:
+        """Record a span from perf_counter() readings."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._spans.append((name, client_id, start, end, ident, args))
+            if ident not in self._threads:
+                self._threads[ident] = threading.current_thread().name
+            if client_id is not None:
+                phases = self._clients.setdefault(client_id, {})
+                phases[name] = phases.get(name, 0.0) + (end - start) * 1000
+
+    @contextlib.contextmanager
+    def span(self, name: str, client_id=None, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), client_id, **args)
+
+    def close(self) -> None:
+        self.t1 = time.perf_counter()
+
+    # ── Aggregation ──
+
+    def client_phases(self, client_id) -> dict:
+        """{phase: ms} summed over *client_id*'s spans, plus "total"."""
+        with self._lock:
+            phases = dict(self._clients.get(client_id, {}))
+        out = {k: round(v, 2) for k, v in phases.items()}
+        out["total"] = round(sum(v for k, v in phases.items() if "." not in k), 2)
+        return out
+
+    def summary(self) -> dict:
+        with self._lock:
+            spans = list(self._spans)
+            clients = {cid: dict(p) for cid, p in self._clients.items()}
+        durations = {}
+        for name, _, start, end, _, _ in spans:
+            durations.setdefault(name, []).append((end - start) * 1000)
+
+        phases = {
+            name: {
+                "count":    len(v),
+                "total_ms": round(sum(v), 2),
+                "mean_ms":  round(sum(v) / len(v), 2),
+                "p50_ms":   round(_percentile(v, 50), 2),
+                "p95_ms":   round(_percentile(v, 95), 2),
+                "max_ms":   round(max(v), 2),
+            }
+            for name, v in sorted(durations.items())
+        }
+        totals = {cid: sum(ms for k, ms in p.items() if "." not in k) for cid, p in clients.items()}
+        slowest = sorted(totals, key=totals.get, reverse=True)[:SLOWEST]
+        end = self.t1 if self.t1 is not None else time.perf_counter()
+        return {
+            "name":       self.name,
+            **self.meta,
+            "started_at": self.started_at,
+            "wall_ms":    round((end - self.t0) * 1000, 2),
+            "clients":    len(clients),
+            "phases":     phases,
+            "slowest":    [
+                {"client_id": cid, "total_ms": round(totals[cid], 2),
+                 "phases": {k: round(v, 2) for k, v in clients[cid].items()}}
+                for cid in slowest
+            ],
+        }
+
+    # ── Export ──
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event JSON (timestamps in microseconds from the start)."""
+        with self._lock:
+            spans, threads = list(self._spans), dict(self._threads)
+        tids, events = {}, []
+        for name, cid, start, end, ident, args in spans:
+            tid = tids.setdefault(ident, len(tids) + 1)
+            ts, dur = round((start - self.t0) * 1e6, 1), round((end - start) * 1e6, 1)
+            fields = {"client_id": cid, **args} if cid is not None else dict(args)
+            if name in ASYNC_PHASES:
+                base = {"name": name, "cat": "refund", "id": f"{name}-{cid}", "pid": 1, "tid": tid}
+                events.append({**base, "ph": "b", "ts": ts, "args": fields})
+                events.append({**base, "ph": "e", "ts": round(ts + dur, 1)})
+            else:
+                events.append({"name": name, "cat": "refund", "ph": "X", "ts": ts, "dur": dur,
+                               "pid": 1, "tid": tid, "args": fields})
+        events.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": self.name}})
+        for ident, tid in tids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": threads.get(ident, str(ident))}})
+        return {
+            "traceEvents":     events,
+            "displayTimeUnit": "ms",
+            "otherData":       {"name": self.name, "started_at": self.started_at, **self.meta},
+        }
+
+
+# ── Current trace (per thread) ─────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def activate(trace: Trace | None, client_id=None):
+    """Make *trace* (and *client_id*) current for span() in this thread."""
+    previous = getattr(_local, "current", None)
+    _local.current = (trace, client_id) if trace is not None else None
+    try:
+        yield trace
+    finally:
+        _local.current = previous
+
+
+def span(name: str, **args):
+    """Time a block against the thread's current trace; no-op without one."""
+    current = getattr(_local, "current", None)
+    if current is None:
+        return _NULL
+    trace, client_id = current
+    return trace.span(name, client_id, **args)
+
+
+# ── Files ──────────────────────────────────────────────────────────────────────
+
+def trace_path(name: str) -> Path:
+    return TRACE_DIR / f"{name}.trace.json"
+
+
+def summary_path(name: str) -> Path:
+    return TRACE_DIR / f"{name}.summary.json"
+
+
+def group(name: str) -> str:
+    """Retention group of a trace: its name up to the first "-"."""
+    return name.split("-", 1)[0]
+
+
+def save(trace: Trace) -> Path:
+    """Write the trace and its summary; prune old traces of its group. Returns the trace file."""
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    for path, data in ((trace_path(trace.name), trace.to_chrome()),
+                       (summary_path(trace.name), trace.summary())):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    traces = sorted(TRACE_DIR.glob(f"{group(trace.name)}-*.trace.json"),
+                    key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in traces[MAX_TRACES:]:
+        old.unlink(missing_ok=True)
+        summary_path(old.name[: -len(".trace.json")]).unlink(missing_ok=True)
+    return trace_path(trace.name)
+
+
+def load_summary(name: str) -> dict | None:
+    try:
+        with open(summary_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 """
 FinFlowAI — Commit Log Updater
-Reads the full git log and rewrites COMMITS.md with the latest commits.
+Adds the commits made since the last run to COMMITS.md.
+
+The full hash of the newest commit written is kept in COMMITS.md itself
+(an HTML comment under "Last updated"), so each run reads only
+`git log <last>..HEAD` and splices the new rows and details into the
+existing file.  The log is parsed as it streams from git, never held as
+one string.  COMMITS.md is rebuilt from the whole history only when it has
+no marker, the marked commit is no longer an ancestor of HEAD (rewritten
+history), or --full is given.
 
 Usage:
-    python execution/update_commits.py
+    python execution/update_commits.py [--full]
 
 Run this after every push to keep COMMITS.md up to date.
 """
 
+import argparse
+import re
 import subprocess
-import os
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,45 +27,93 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 OUTPUT_FILE = BASE_DIR / "COMMITS.md"
 
+FIELD_SEP  = "\x1f"                      # between fields of one commit
+RECORD_SEP = "\x1e"                      # after each commit
+LOG_FORMAT = f"%H{FIELD_SEP}%h{FIELD_SEP}%s{FIELD_SEP}%ad{FIELD_SEP}%b{RECORD_SEP}"
+
+TABLE_RULE     = "|---|------|-------------|------|"
+DETAILS_HEAD   = "## Details"
+MARKER_RE      = re.compile(r"^<!-- last-commit: ([0-9a-f]{40}) -->$", re.M)
+UPDATED_RE     = re.compile(r"^> Last updated: .*$", re.M)
+TOP_NUMBER_RE  = re.compile(r"^\| (\d+) \| `", re.M)
+
+
+# ── git ────────────────────────────────────────────────────────────────────────
+
+def _git(*args) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True, cwd=BASE_DIR)
+
+
+def iter_commits(since: str | None = None):
+    """
+    Yield commits most recent first, parsed from a streamed `git log`.
+    With *since*, only the commits in since..HEAD.
+    """
+    cmd = ["git", "log", f"--pretty=format:{LOG_FORMAT}", "--date=format:%Y-%m-%d"]
+    if since:
+        cmd.append(f"{since}..HEAD")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding="utf-8", errors="replace", cwd=BASE_DIR)
+    buf = ""
+    try:
+        for line in proc.stdout:
+            buf += line
+            while RECORD_SEP in buf:
+                record, buf = buf.split(RECORD_SEP, 1)
+                commit = _parse(record)
+                if commit:
+                    yield commit
+        commit = _parse(buf)
+        if commit:
+            yield commit
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        if proc.wait() != 0:
+            print(f"ERROR: git log failed:\n{stderr}")
+            sys.exit(1)
+
+
+def _parse(record: str) -> dict | None:
+    parts = record.strip("\n").split(FIELD_SEP, 4)
+    if len(parts) < 4:
+        return None
+    return {
+        "full_hash": parts[0].strip(),
+        "hash":      parts[1].strip(),
+        "subject":   parts[2].strip(),
+        "date":      parts[3].strip(),
+        "body":      parts[4].strip() if len(parts) > 4 else "",
+    }
+
+
+def _is_ancestor(commit: str) -> bool:
+    return _git("merge-base", "--is-ancestor", commit, "HEAD").returncode == 0
+
+
+# ── Markdown ───────────────────────────────────────────────────────────────────
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
-def get_commits() -> list[dict]:
-    """Return all commits as a list of dicts, most recent first."""
-    result = subprocess.run(
-        [
-            "git", "log",
-            "--pretty=format:%h|%s|%ad|%b<END>",
-            "--date=format:%Y-%m-%d",
-        ],
-        capture_output=True,
-        text=True,
-        cwd=BASE_DIR,
-    )
-
-    if result.returncode != 0:
-        print(f"ERROR: git log failed:\n{result.stderr}")
-        sys.exit(1)
-
-    commits = []
-    raw_entries = result.stdout.split("<END>")
-    for entry in raw_entries:
-        entry = entry.strip()
-        if not entry:
-            continue
-        parts = entry.split("|", 3)
-        if len(parts) < 3:
-            continue
-        commits.append({
-            "hash":  parts[0].strip(),
-            "subject": parts[1].strip(),
-            "date":  parts[2].strip(),
-            "body":  parts[3].strip() if len(parts) > 3 else "",
-        })
-
-    return commits
+
+def _marker(full_hash: str) -> str:
+    return f"<!-- last-commit: {full_hash} -->"
+
+
+def _row(num: int, commit: dict) -> str:
+    return f"| {num} | `{commit['hash']}` | {commit['subject']} | {commit['date']} |"
+
+
+def _details(commit: dict) -> list[str]:
+    lines = [f"### `{commit['hash']}` — {commit['subject']}", f"**Date:** {commit['date']}"]
+    if commit["body"]:
+        lines.append(f"**Notes:** {commit['body']}")
+    return lines + ["", "---", ""]
 
 
 def build_markdown(commits: list[dict]) -> str:
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
     total = len(commits)
 
     lines = [
@@ -64,45 +121,75 @@ def build_markdown(commits: list[dict]) -> str:
         "",
         f"> This file is updated with every commit pushed to the repository.",
         f"> To regenerate it automatically, run: `python execution/update_commits.py`",
-        f"> Last updated: {now}",
+        f"> Last updated: {_now()}",
+    ]
+    if commits:
+        lines.append(_marker(commits[0]["full_hash"]))
+    lines += [
         "",
         "---",
         "",
         "## Commits",
         "",
         "| # | Hash | Description | Date |",
-        "|---|------|-------------|------|",
+        TABLE_RULE,
     ]
 
     for i, commit in enumerate(commits):
-        num = total - i
-        lines.append(
-            f"| {num} | `{commit['hash']}` | {commit['subject']} | {commit['date']} |"
-        )
+        lines.append(_row(total - i, commit))
 
-    lines += ["", "---", "", "## Details", ""]
+    lines += ["", "---", "", DETAILS_HEAD, ""]
 
-    for i, commit in enumerate(commits):
-        num = total - i
-        lines.append(f"### `{commit['hash']}` — {commit['subject']}")
-        lines.append(f"**Date:** {commit['date']}")
-        if commit["body"]:
-            lines.append(f"**Notes:** {commit['body']}")
-        lines.append("")
-        lines.append("---")
-        lines.append("")
+    for commit in commits:
+        lines += _details(commit)
 
     return "\n".join(lines)
 
 
-def main():
-    print("Reading git log...")
-    commits = get_commits()
-    print(f"Found {len(commits)} commit(s).")
+def splice_markdown(text: str, commits: list[dict]) -> str:
+    """Insert *commits* (most recent first) above the existing entries of *text*."""
+    top = TOP_NUMBER_RE.search(text)
+    start = int(top.group(1)) if top else 0
+    total = start + len(commits)
+
+    rows = "\n".join(_row(total - i, c) for i, c in enumerate(commits))
+    text = text.replace(TABLE_RULE + "\n", f"{TABLE_RULE}\n{rows}\n", 1)
+
+    details = "\n".join(line for c in commits for line in _details(c))
+    text = text.replace(f"{DETAILS_HEAD}\n\n", f"{DETAILS_HEAD}\n\n{details}\n", 1)
 
-    markdown = build_markdown(commits)
+    text = MARKER_RE.sub(_marker(commits[0]["full_hash"]), text, count=1)
+    return UPDATED_RE.sub(f"> Last updated: {_now()}", text, count=1)
 
-    OUTPUT_FILE.write_text(markdown, encoding="utf-8")
+
+# ── Main ───────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Update COMMITS.md from git log")
+    parser.add_argument("--full", action="store_true", help="rebuild from the whole history")
+    args = parser.parse_args()
+
+    text = OUTPUT_FILE.read_text(encoding="utf-8") if OUTPUT_FILE.exists() else ""
+    marker = MARKER_RE.search(text)
+    last = marker.group(1) if marker else None
+
+    if args.full or not last or not _is_ancestor(last) \
+            or TABLE_RULE not in text or DETAILS_HEAD not in text:
+        print("Reading full git log...")
+        commits = list(iter_commits())
+        print(f"Found {len(commits)} commit(s).")
+        OUTPUT_FILE.write_text(build_markdown(commits), encoding="utf-8")
+        print(f"COMMITS.md rebuilt at: {OUTPUT_FILE}")
+        return
+
+    print(f"Reading git log since {last[:7]}...")
+    commits = list(iter_commits(last))
+    if not commits:
+        print("COMMITS.md is already up to date.")
+        return
+    print(f"Found {len(commits)} new commit(s).")
+
+    OUTPUT_FILE.write_text(splice_markdown(text, commits), encoding="utf-8")
     print(f"COMMITS.md updated at: {OUTPUT_FILE}")
 
 
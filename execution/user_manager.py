@@ -3,9 +3,16 @@
 FinFlowAI — User / Credential Manager
 Handles all CRUD operations on the users table.
 
-Passwords are stored as SHA-256(password + APP_SECRET) — deterministic,
-so uniqueness can be enforced at the database level on the triple
-(space, login, password_hash).
+Passwords are stored as salted scrypt hashes (see password_hasher.py),
+computed in a small process pool so logins never hash on the request
+thread.  Because every hash has its own salt, the (space, login, password)
+uniqueness rule is checked by verifying the password against the existing
+rows for that login.  add_user() runs those KDF checks with no lock held,
+then takes the write lock (BEGIN IMMEDIATE) only to confirm the login's
+rows are unchanged and insert, so two concurrent adds of the same triple
+cannot both pass and other catalog writers never wait on scrypt.  Rows still holding a legacy SHA-256(password +
+APP_SECRET) hash are accepted and rehashed with scrypt on the next
+successful login.
 
 CLI Usage:
     python execution/user_manager.py add    --space acme --login alice --password secret --name Alice
@@ -15,29 +22,23 @@ CLI Usage:
 """
 
 import argparse
-import hashlib
 import os
 import sqlite3
 import sys
 from pathlib import Path
 from datetime import datetime
 
+import password_hasher as ph
+
 # ── Paths ──────────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent
 DB_PATH  = BASE_DIR / ".tmp" / "finflowai.db"
 
-# ── Secret salt (override via APP_SECRET env var) ─────────────────────────────
-APP_SECRET = os.getenv("APP_SECRET", "finflowai-default-secret-change-in-production")
+ADD_ATTEMPTS = 5                         # re-verifications when a login changes mid-add
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def hash_password(password: str) -> str:
-    """Deterministic SHA-256 hash of password + app secret."""
-    raw = f"{password}{APP_SECRET}".encode("utf-8")
-    return hashlib.sha256(raw).hexdigest()
-
-
 def get_connection() -> sqlite3.Connection:
     if not DB_PATH.exists():
         print("ERROR: Database not found. Run `python execution/setup_db.py` first.")
@@ -57,49 +58,80 @@ def normalise(value: str) -> str:
 def add_user(space: str, login: str, password: str, name: str = "") -> dict:
     """
     Add a new credential triple. Returns the new record on success.
-    Raises ValueError if the exact triple already exists.
+    Raises ValueError if the exact triple already exists, and
+    password_hasher.KDFBusy if the login keeps changing under it.
     """
     space = normalise(space)
     login = normalise(login)
     name  = name.strip()
-    password_hash = hash_password(password)
 
+    password_hash = ph.hash_password(password)
+    verified = {}                                    # (id, hash) -> matches password
     con = get_connection()
     try:
-        cur = con.cursor()
-        cur.execute(
-            "INSERT INTO users (space, login, password_hash, name) VALUES (?, ?, ?, ?)",
-            (space, login, password_hash, name),
-        )
-        con.commit()
-        row_id = cur.lastrowid
-        cur.execute("SELECT * FROM users WHERE id = ?", (row_id,))
-        record = dict(cur.fetchone())
-        return record
-    except sqlite3.IntegrityError:
-        raise ValueError(
-            f"A record with space='{space}', login='{login}', and that password already exists."
-        )
+        for _ in range(ADD_ATTEMPTS):
+            # Run the KDF with no lock held...
+            rows = _login_rows(con, space, login)
+            for key in rows:
+                if key not in verified:
+                    verified[key] = ph.check(password, key[1])
+            if any(verified[key] for key in rows):
+                raise ValueError(
+                    f"A record with space='{space}', login='{login}', and that password already exists."
+                )
+            # ...then, under the write lock, only confirm nothing changed since
+            con.execute("BEGIN IMMEDIATE")
+            if _login_rows(con, space, login) != rows:
+                con.rollback()
+                continue
+            cur = con.cursor()
+            cur.execute(
+                "INSERT INTO users (space, login, password_hash, name) VALUES (?, ?, ?, ?)",
+                (space, login, password_hash, name),
+            )
+            con.commit()
+            cur.execute("SELECT * FROM users WHERE id = ?", (cur.lastrowid,))
+            return dict(cur.fetchone())
+        raise ph.KDFBusy(f"Login '{login}' is being changed concurrently. Please retry shortly.")
     finally:
         con.close()
 
 
+def _login_rows(con: sqlite3.Connection, space: str, login: str) -> list[tuple[int, str]]:
+    return [tuple(r) for r in con.execute(
+        "SELECT id, password_hash FROM users WHERE space = ? AND login = ? ORDER BY id",
+        (space, login),
+    ).fetchall()]
+
+
+def _match(con: sqlite3.Connection, space: str, login: str, password: str) -> dict | None:
+    """
+    The user row of (space, login) whose hash matches *password*, or None.
+    A matching legacy SHA-256 hash is replaced with scrypt on the way.
+    """
+    rows = con.execute(
+        """SELECT id, space, login, name, created_at, password_hash
+           FROM users WHERE space = ? AND login = ? ORDER BY id""",
+        (space, login),
+    ).fetchall()
+    for row in rows:
+        stored = row["password_hash"]
+        if ph.check(password, stored):
+            if ph.needs_upgrade(stored):
+                con.execute(
+                    "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                    (ph.hash_password(password), row["id"], stored),
+                )
+                con.commit()
+            record = dict(row)
+            record.pop("password_hash")
+            return record
+    return None
+
+
 def verify_user(space: str, login: str, password: str) -> bool:
     """Return True if the exact (space, login, password) triple exists."""
-    space = normalise(space)
-    login = normalise(login)
-    password_hash = hash_password(password)
-
-    con = get_connection()
-    try:
-        cur = con.cursor()
-        cur.execute(
-            "SELECT id FROM users WHERE space = ? AND login = ? AND password_hash = ?",
-            (space, login, password_hash),
-        )
-        return cur.fetchone() is not None
-    finally:
-        con.close()
+    return get_user(space, login, password) is not None
 
 
 def get_user(space: str, login: str, password: str) -> dict | None:
@@ -107,22 +139,11 @@ def get_user(space: str, login: str, password: str) -> dict | None:
     Return the full user record if the exact (space, login, password) triple
     exists, or None if no match is found.
     The password_hash is excluded from the returned dict.
+    Raises password_hasher.KDFBusy when the hashing pool is saturated.
     """
-    space = normalise(space)
-    login = normalise(login)
-    password_hash = hash_password(password)
-
     con = get_connection()
     try:
-        cur = con.cursor()
-        cur.execute(
-            """SELECT id, space, login, name, created_at
-               FROM users
-               WHERE space = ? AND login = ? AND password_hash = ?""",
-            (space, login, password_hash),
-        )
-        row = cur.fetchone()
-        return dict(row) if row else None
+        return _match(con, normalise(space), normalise(login), password)
     finally:
         con.close()
 
@@ -146,6 +167,26 @@ def list_users(space: str | None = None) -> list[dict]:
         con.close()
 
 
+def iter_users_json(space: str | None = None):
+    """
+    Same records as list_users(), yielded one at a time as JSON object
+    strings rendered by SQLite (for streaming responses).
+    """
+    sql = """SELECT json_object('id', id, 'space', space, 'login', login,
+                                'name', name, 'created_at', created_at)
+             FROM users"""
+    params = ()
+    if space:
+        sql += " WHERE space = ?"
+        params = (normalise(space),)
+    con = get_connection()
+    try:
+        for row in con.execute(sql + " ORDER BY space, login", params):
+            yield row[0]
+    finally:
+        con.close()
+
+
 def delete_user(record_id: int) -> bool:
     """Delete a record by ID. Returns True if a row was deleted."""
     con = get_connection()
@@ -186,6 +227,7 @@ def main():
     p_del.add_argument("--id", type=int, required=True)
 
     args = parser.parse_args()
+    os.environ.setdefault("KDF_WORKERS", "0")        # one hash: not worth starting a pool
 
     if args.command == "add":
         try:
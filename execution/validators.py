@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Client Identifier Validation
+========================================
+Checks the identifiers the refund process depends on, so bad values are
+rejected when they are typed or imported instead of failing later against
+the Revenue backend.
+
+  pps_number     7 digits + check letter (+ optional second letter), mod 23
+  bank_iban      country code, check digits, country length, mod 97 == 1
+  bank_bic       4-letter bank, 2-letter country, 2-char location, optional branch
+  eir_code       routing key (or D6W) + 4-character unique identifier
+  date_of_birth  YYYY-MM-DD, DD/MM/YYYY or DD-MM-YYYY; not in the future, not before 1900
+
+Blank values are always accepted (every field is optional).  Valid values
+are returned normalised: PPS/IBAN/BIC upper-case without spaces, Eircode
+as "D02 X285", dates as YYYY-MM-DD.
+
+  - clean(data)            → normalised copy of one record; ValueError listing every bad field
+  - validate_rows(rows)    → (valid rows normalised, errors) for a whole import batch
+
+validate_rows() works column by column: each field's values are pulled out
+of the batch once and checked with precompiled patterns, and each distinct
+value is checked only once (imports repeat BICs, dates and blanks a lot).
+
+Usage:
+    python execution/validators.py --file clients.csv
+"""
+
+import argparse
+import csv
+import re
+import time
+from datetime import date, datetime
+
+# ── Patterns ───────────────────────────────────────────────────────────────────
+
+_SPACES   = re.compile(r"[\s-]+")
+_PPS      = re.compile(r"^(\d{7})([A-W])([A-Z]?)$")
+_IBAN     = re.compile(r"^([A-Z]{2})(\d{2})([A-Z0-9]{11,30})$")
+_BIC      = re.compile(r"^[A-Z]{4}[A-Z]{2}[A-Z0-9]{2}(?:[A-Z0-9]{3})?$")
+_EIRCODE  = re.compile(r"^([AC-FHKNPRTV-Y]\d{2}|D6W)([0-9AC-FHKNPRTV-Y]{4})$")
+_DATE_DMY = re.compile(r"^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$")
+
+# IBAN lengths for the countries clients are likely to bank in
+IBAN_LENGTHS = {
+    "IE": 22, "GB": 22, "NI": 22, "FR": 27, "DE": 22, "ES": 24, "IT": 27,
+    "NL": 18, "BE": 16, "PT": 25, "PL": 28, "LT": 20, "LV": 21, "RO": 24,
+    "LU": 20, "AT": 20, "CH": 21, "DK": 18, "SE": 24, "NO": 15, "FI": 18,
+    "BR": 29, "MT": 31, "CY": 28, "GR": 27, "HU": 28, "CZ": 24, "SK": 24,
+}
+
+# 'A' → 10 ... 'Z' → 35, for the IBAN mod-97 rearrangement
+_IBAN_DIGITS = str.maketrans({chr(c): str(c - 55) for c in range(ord("A"), ord("Z") + 1)})
+
+
+# ── Single-value checks: value → (normalised value, error or None) ─────────────
+
+def check_pps(value: str) -> tuple[str, str | None]:
+    v = _SPACES.sub("", value).upper()
+    m = _PPS.match(v)
+    if not m:
+        return value, "PPS number must be 7 digits followed by 1 or 2 letters."
+    digits, check, second = m.groups()
+    total = sum(int(d) * w for d, w in zip(digits, range(8, 1, -1)))
+    if second:
+        total += (0 if second == "W" else ord(second) - 64) * 9
+    expected = "W" if total % 23 == 0 else chr(64 + total % 23)
+    if check != expected:
+        return value, "PPS number check letter does not match."
+    return v, None
+
+
+def check_iban(value: str) -> tuple[str, str | None]:
+    v = _SPACES.sub("", value).upper()
+    m = _IBAN.match(v)
+    if not m:
+        return value, "IBAN must be a country code, 2 check digits and the account number."
+    country = m.group(1)
+    length = IBAN_LENGTHS.get(country)
+    if length and len(v) != length:
+        return value, f"{country} IBANs have {length} characters."
+    if int((v[4:] + v[:4]).translate(_IBAN_DIGITS)) % 97 != 1:
+        return value, "IBAN check digits do not match."
+    return v, None
+
+
+def check_bic(value: str) -> tuple[str, str | None]:
+    v = _SPACES.sub("", value).upper()
+    if not _BIC.match(v):
+        return value, "BIC must be 8 or 11 letters/digits (e.g. AIBKIE2D)."
+    return v, None
+
+
+def check_eircode(value: str) -> tuple[str, str | None]:
+    v = _SPACES.sub("", value).upper()
+    m = _EIRCODE.match(v)
+    if not m:
+        return value, "Eircode must look like D02 X285."
+    return f"{m.group(1)} {m.group(2)}", None
+
+
+def check_date(value: str) -> tuple[str, str | None]:
+    v = value.strip()
+    try:
+        m = _DATE_DMY.match(v)
+        d = date(int(m.group(3)), int(m.group(2)), int(m.group(1))) if m \
+            else datetime.strptime(v, "%Y-%m-%d").date()
+    except ValueError:
+        return value, "Date of birth must be YYYY-MM-DD or DD/MM/YYYY."
+    if d.year < 1900 or d > date.today():
+        return value, "Date of birth is out of range."
+    return d.isoformat(), None
+
+
+CHECKS = {
+    "pps_number":    check_pps,
+    "bank_iban":     check_iban,
+    "bank_bic":      check_bic,
+    "eir_code":      check_eircode,
+    "date_of_birth": check_date,
+}
+
+
+# ── Records and batches ────────────────────────────────────────────────────────
+
+def clean(data: dict) -> dict:
+    """
+    Copy of *data* with the validated fields that it contains normalised.
+    Raises ValueError naming every invalid field.
+    """
+    out, errors = dict(data), []
+    for field, check in CHECKS.items():
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            continue
+        out[field], error = check(value)
+        if error:
+            errors.append(error)
+    if errors:
+        raise ValueError(" ".join(errors))
+    return out
+
+
+def validate_rows(rows: list[tuple[int, dict]]) -> tuple[list[tuple[int, dict]], list[dict]]:
+    """
+    Validate an import batch of (row_number, data) pairs column by column.
+    Returns (rows that passed, normalised; errors as {row, name, field, error}).
+    A row with several bad fields gets one error entry per field.
+    """
+    bad = {}                                     # row index -> [(field, error)]
+    fixed = [dict(data) for _, data in rows]
+    for field, check in CHECKS.items():
+        column = [d.get(field) for d in fixed]
+        seen = {}                                # value -> (normalised, error)
+        for i, value in enumerate(column):
+            if not isinstance(value, str) or not value.strip():
+                continue
+            result = seen.get(value)
+            if result is None:
+                result = seen[value] = check(value)
+            fixed[i][field], error = result
+            if error:
+                bad.setdefault(i, []).append((field, error))
+
+    valid, errors = [], []
+    for i, (row_no, data) in enumerate(rows):
+        if i in bad:
+            name = (data.get("name") or "").strip()
+            errors.extend({"row": row_no, "name": name, "field": f, "error": e} for f, e in bad[i])
+        else:
+            valid.append((row_no, fixed[i]))
+    return valid, errors
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a client CSV without importing it")
+    parser.add_argument("--file", required=True)
+    parser.add_argument("--show", type=int, default=20, help="errors to print")
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8-sig", newline="") as f:
+        rows = [(i, row) for i, row in enumerate(csv.DictReader(f), start=2)]
+    t0 = time.perf_counter()
+    valid, errors = validate_rows(rows)
+    secs = time.perf_counter() - t0
+
+    print(f"{len(rows):,} rows checked in {secs:.2f} s: {len(valid):,} valid, "
+          f"{len(rows) - len(valid):,} with errors ({len(errors):,} error(s)).")
+    for e in errors[:args.show]:
+        print(f"  row {e['row']:>6}  {e['field']:<14} {e['error']}")
+
+
+if __name__ == "__main__":
+    main()
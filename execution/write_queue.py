@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+FinFlowAI — Group-commit Write Queue
+====================================
+Optional single writer per database file for small, frequent writes
+(add_client, update_client, upsert_settings).
+
+Without it every request thread opens a connection, takes SQLite's write
+lock and pays its own fsync on commit, so concurrent edits queue up behind
+each other one fsync at a time.  With WRITE_QUEUE=true, request threads
+hand their write to a writer thread instead.  The writer collects writes
+for up to WRITE_QUEUE_WINDOW_MS (or WRITE_QUEUE_BATCH writes), runs them
+in ONE transaction and commits once, then hands each caller its own result.
+
+Each write runs inside its own SAVEPOINT, so a write that raises (e.g. a
+duplicate PPS) is rolled back alone and its caller gets the exception,
+while the rest of the batch still commits.  Callers block until their
+batch is committed, so the per-call contract is unchanged: the function
+returns only once the change is durable.  A batch that fails for any
+other reason fails all its callers; the writer then reopens its connection
+and carries on.  Callers wait at most WRITE_QUEUE_TIMEOUT seconds and then
+get sqlite3.OperationalError, as an inline write would after the busy timeout.
+
+In the sharded layout (db.py) there is one writer per shard file.
+
+Usage:
+    import write_queue as wq
+
+    def op(con):                 # must not commit; runs in a transaction
+        con.execute("UPDATE ...")
+        return con.execute("SELECT ...").fetchone()
+
+    row = wq.run(space, op)      # queued when WRITE_QUEUE=true, else inline
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import db
+
+DEFAULT_WINDOW_MS = 2
+DEFAULT_BATCH     = 64
+DEFAULT_TIMEOUT   = 30                  # seconds a caller waits for its batch to commit
+
+
+def enabled() -> bool:
+    return os.getenv("WRITE_QUEUE", "false").strip().lower() == "true"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# ── Writer ─────────────────────────────────────────────────────────────────────
+
+class _Writer:
+    """One thread that owns a connection to *path* and group-commits writes."""
+
+    def __init__(self, path, window: float, max_batch: int):
+        self.path      = path
+        self.window    = window
+        self.max_batch = max_batch
+        self.batches   = 0
+        self.writes    = 0
+        self._queue    = queue.Queue()
+        threading.Thread(target=self._loop, name=f"write-queue-{path.stem}", daemon=True).start()
+
+    def submit(self, op) -> Future:
+        fut = Future()
+        self._queue.put((fut, op))
+        return fut
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=db.BUSY_TIMEOUT, isolation_level=None)
+        con.row_factory = sqlite3.Row
+        return con
+
+    def _loop(self) -> None:
+        con = None
+        while True:
+            batch = self._collect()
+            try:
+                if con is None:
+                    con = self._connect()
+                self._commit(con, batch)
+            except BaseException as exc:
+                # Never let one bad batch kill the writer: fail it, start afresh
+                _fail(batch, exc)
+                if con is not None:
+                    con.close()
+                    con = None
+
+    def _commit(self, con: sqlite3.Connection, batch: list) -> None:
+        outcomes = []                    # (future, result, exception)
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            for fut, op in batch:
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                con.execute("SAVEPOINT write_op")
+                try:
+                    result = op(con)
+                except Exception as exc:
+                    con.execute("ROLLBACK TO write_op")
+                    con.execute("RELEASE write_op")
+                    outcomes.append((fut, None, exc))
+                    continue
+                con.execute("RELEASE write_op")
+                outcomes.append((fut, result, None))
+            con.execute("COMMIT")
+        except sqlite3.Error as exc:
+            # Nothing in the batch was committed: every caller gets the error
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            _fail(batch, exc)
+            return
+        self.batches += 1
+        self.writes  += len(outcomes)
+        for fut, result, exc in outcomes:
+            if exc is None:
+                fut.set_result(result)
+            else:
+                fut.set_exception(exc)
+
+
+def _fail(batch: list, exc: BaseException) -> None:
+    for fut, _ in batch:
+        if not fut.done():
+            if fut.running():
+                fut.set_exception(exc)
+            elif fut.set_running_or_notify_cancel():
+                fut.set_exception(exc)
+
+
+_writers = {}                            # database path -> _Writer
+_writers_lock = threading.Lock()
+
+
+def _writer(space: str | None) -> _Writer:
+    path = db.path_for(space)
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = _Writer(
+                path,
+                window=_env_int("WRITE_QUEUE_WINDOW_MS", DEFAULT_WINDOW_MS) / 1000,
+                max_batch=_env_int("WRITE_QUEUE_BATCH", DEFAULT_BATCH),
+            )
+        return _writers[path]
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def run(space: str | None, op):
+    """
+    Run op(con) in a write transaction against *space*'s database (None =
+    catalog) and return its result, re-raising anything it raised.
+    """
+    if enabled() and db.path_for(space).exists():  # no shard file: db.connect() refuses the write
+        fut = _writer(space).submit(op)
+        timeout = _env_int("WRITE_QUEUE_TIMEOUT", DEFAULT_TIMEOUT)
+        try:
+            return fut.result(timeout=timeout)
+        except TimeoutError:
+            fut.cancel()                             # skipped if its batch has not started
+            raise sqlite3.OperationalError(f"write not committed within {timeout} s") from None
+    con = db.connect(space)
+    try:
+        result = op(con)
+        con.commit()
+        return result
+    finally:
+        con.close()
+
+
+def stats() -> dict:
+    """{ path: {batches, writes, avg_batch} } for every writer started so far."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    return {
+        str(w.path): {
+            "batches":   w.batches,
+            "writes":    w.writes,
+            "avg_batch": round(w.writes / w.batches, 2) if w.batches else 0,
+        }
+        for w in writers
+    }